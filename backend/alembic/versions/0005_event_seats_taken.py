@@ -0,0 +1,32 @@
+"""add denormalized seats_taken counter to events
+
+Revision ID: 0005_event_seats_taken
+Revises: 0004_org_profile_publish_favorites
+Create Date: 2025-12-02
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_event_seats_taken"
+down_revision = "0004_org_profile_publish_favorites"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("seats_taken", sa.Integer(), nullable=False, server_default="0"))
+    # Backfill from the registrations table so existing events start in sync.
+    op.execute(
+        """
+        UPDATE events
+        SET seats_taken = (
+            SELECT COUNT(*) FROM registrations WHERE registrations.event_id = events.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("events", "seats_taken")
@@ -0,0 +1,97 @@
+"""full-text search for events (tsvector + GIN, trigram on location; FTS5 on SQLite)
+
+Revision ID: 0006_event_search_index
+Revises: 0005_event_seats_taken
+Create Date: 2025-12-04
+"""
+
+from alembic import op
+
+
+revision = "0006_event_search_index"
+down_revision = "0005_event_seats_taken"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("ALTER TABLE events ADD COLUMN search_vector tsvector")
+        op.execute(
+            """
+            CREATE OR REPLACE FUNCTION events_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B') ||
+                    setweight(to_tsvector('simple', coalesce(NEW.location, '')), 'C');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER events_search_vector_trg
+            BEFORE INSERT OR UPDATE OF title, description, location ON events
+            FOR EACH ROW EXECUTE FUNCTION events_search_vector_update()
+            """
+        )
+        op.execute(
+            """
+            UPDATE events SET search_vector =
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(location, '')), 'C')
+            """
+        )
+        op.execute("CREATE INDEX ix_events_search_vector ON events USING gin (search_vector)")
+        op.execute("CREATE INDEX ix_events_location_trgm ON events USING gin (lower(location) gin_trgm_ops)")
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE events_fts USING fts5(title, description, location, content='events', content_rowid='id')"
+        )
+        op.execute(
+            """
+            CREATE TRIGGER events_fts_ai AFTER INSERT ON events BEGIN
+                INSERT INTO events_fts(rowid, title, description, location)
+                VALUES (new.id, new.title, new.description, new.location);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER events_fts_ad AFTER DELETE ON events BEGIN
+                INSERT INTO events_fts(events_fts, rowid, title, description, location)
+                VALUES ('delete', old.id, old.title, old.description, old.location);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER events_fts_au AFTER UPDATE OF title, description, location ON events BEGIN
+                INSERT INTO events_fts(events_fts, rowid, title, description, location)
+                VALUES ('delete', old.id, old.title, old.description, old.location);
+                INSERT INTO events_fts(rowid, title, description, location)
+                VALUES (new.id, new.title, new.description, new.location);
+            END
+            """
+        )
+        op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_events_location_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_events_search_vector")
+        op.execute("DROP TRIGGER IF EXISTS events_search_vector_trg ON events")
+        op.execute("DROP FUNCTION IF EXISTS events_search_vector_update()")
+        op.execute("ALTER TABLE events DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS events_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_ai")
+        op.execute("DROP TABLE IF EXISTS events_fts")
@@ -0,0 +1,23 @@
+"""add token_version to users
+
+Revision ID: 0007_user_token_version
+Revises: 0006_event_search_index
+Create Date: 2025-12-05
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_user_token_version"
+down_revision = "0006_event_search_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_version")
@@ -0,0 +1,52 @@
+"""add notification jobs and registrations.lang
+
+Revision ID: 0009_notification_jobs
+Revises: 0008_email_outbox
+Create Date: 2025-12-07
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_notification_jobs"
+down_revision = "0008_email_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("registrations", sa.Column("lang", sa.String(length=8), nullable=True))
+    op.create_table(
+        "notification_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("kind", sa.String(length=40), nullable=False),
+        sa.Column("context", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cursor", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("finished_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.create_index("ix_notification_jobs_id", "notification_jobs", ["id"])
+    op.create_index("ix_notification_jobs_event_id", "notification_jobs", ["event_id"])
+    op.create_table(
+        "notification_recipients",
+        sa.Column(
+            "job_id", sa.Integer(), sa.ForeignKey("notification_jobs.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("lang", sa.String(length=8), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_recipients")
+    op.drop_index("ix_notification_jobs_event_id", table_name="notification_jobs")
+    op.drop_index("ix_notification_jobs_id", table_name="notification_jobs")
+    op.drop_table("notification_jobs")
+    op.drop_column("registrations", "lang")
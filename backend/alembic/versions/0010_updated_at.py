@@ -0,0 +1,28 @@
+"""add updated_at to events and registrations
+
+Revision ID: 0010_updated_at
+Revises: 0009_notification_jobs
+Create Date: 2025-12-08
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_updated_at"
+down_revision = "0009_notification_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("events", "registrations"):
+        op.add_column(
+            table,
+            sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    for table in ("registrations", "events"):
+        op.drop_column(table, "updated_at")
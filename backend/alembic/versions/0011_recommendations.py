@@ -0,0 +1,39 @@
+"""add precomputed recommendation tables
+
+Revision ID: 0011_recommendations
+Revises: 0010_updated_at
+Create Date: 2025-12-09
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011_recommendations"
+down_revision = "0010_updated_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_tag_affinity",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("tag_id", sa.Integer(), sa.ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("weight", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "user_recommendations",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("reason", sa.String(length=255), nullable=True),
+        sa.Column("computed_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_user_recommendations_user_score", "user_recommendations", ["user_id", "score"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_recommendations_user_score", table_name="user_recommendations")
+    op.drop_table("user_recommendations")
+    op.drop_table("user_tag_affinity")
@@ -0,0 +1,32 @@
+"""add recommendation dirty-mark tables
+
+Revision ID: 0012_recommendation_dirty
+Revises: 0011_recommendations
+Create Date: 2025-12-10
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012_recommendation_dirty"
+down_revision = "0011_recommendations"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table, column in (("recommendation_dirty_users", "user_id"), ("recommendation_dirty_events", "event_id")):
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(column, sa.Integer(), nullable=False),
+            sa.Column("marked_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        )
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def downgrade() -> None:
+    for table, column in (("recommendation_dirty_events", "event_id"), ("recommendation_dirty_users", "user_id")):
+        op.drop_index(f"ix_{table}_{column}", table_name=table)
+        op.drop_table(table)
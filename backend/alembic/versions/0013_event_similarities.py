@@ -0,0 +1,40 @@
+"""add event similarities and per-strategy recommendation scores
+
+Revision ID: 0013_event_similarities
+Revises: 0012_recommendation_dirty
+Create Date: 2025-12-11
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013_event_similarities"
+down_revision = "0012_recommendation_dirty"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_similarities",
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column(
+            "similar_event_id", sa.Integer(), sa.ForeignKey("events.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("score", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_event_similarities_similar_event_id", "event_similarities", ["similar_event_id"])
+    op.add_column("user_recommendations", sa.Column("tag_score", sa.Float(), nullable=False, server_default="0"))
+    op.add_column("user_recommendations", sa.Column("cf_score", sa.Float(), nullable=False, server_default="0"))
+    op.add_column("user_recommendations", sa.Column("cf_reason", sa.String(length=255), nullable=True))
+    # Rows written before this revision were pure tag scores.
+    op.execute("UPDATE user_recommendations SET tag_score = score")
+
+
+def downgrade() -> None:
+    op.drop_column("user_recommendations", "cf_reason")
+    op.drop_column("user_recommendations", "cf_score")
+    op.drop_column("user_recommendations", "tag_score")
+    op.drop_index("ix_event_similarities_similar_event_id", table_name="event_similarities")
+    op.drop_table("event_similarities")
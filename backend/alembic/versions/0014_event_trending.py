@@ -0,0 +1,30 @@
+"""add event trending table
+
+Revision ID: 0014_event_trending
+Revises: 0013_event_similarities
+Create Date: 2025-12-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0014_event_trending"
+down_revision = "0013_event_similarities"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_trending",
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_event_trending_score", "event_trending", ["score"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_trending_score", table_name="event_trending")
+    op.drop_table("event_trending")
@@ -4,22 +4,33 @@ import time
 import re
 import logging
 import asyncio
+import base64
+import json
+import math
 import os
 import secrets
 from pathlib import Path
 
 from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, status, Request, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from sqlalchemy import func, text
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import exists, func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 
-from . import auth, models, schemas
+from . import auth, email_templates, exports, models, notifications, recommendations, schemas, trending
+from .cache import MISSING, create_backend, event_list_cache
 from .config import settings
-from .database import engine, get_db, SessionLocal
-from .email_service import send_registration_email, send_registration_email as send_email
-from .email_templates import render_registration_email, render_password_reset_email
-from .logging_utils import configure_logging, RequestIdMiddleware, log_event, log_warning
+from .database import async_pool_status, engine, get_db, pool_status, run_read, SessionLocal
+from .email_async import email_sender
+from .email_service import queue_email
+from .email_templates import negotiate_language, render_registration_email, render_password_reset_email
+from .http_cache import not_modified, validator_headers, weak_etag
+from .logging_utils import AccessLogMiddleware, configure_logging, RequestIdMiddleware, log_event, log_warning
+from .metrics import RATE_LIMIT_REJECTIONS, MetricsMiddleware, mark_process_dead, render_latest
+from .search import apply_search as search_events
 
 configure_logging()
 
@@ -56,6 +67,8 @@ def _check_configuration():
 
 app = FastAPI(title="Event Link API", version="1.0.0")
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(AccessLogMiddleware)
 app.add_middleware(RequestIdMiddleware)
 
 app.add_middleware(
@@ -75,6 +88,7 @@ def _validate_cover_url(url: str) -> None:
 @app.on_event("startup")
 def _on_startup():
     _check_configuration()
+    email_templates.registry.load()
     if getattr(settings, "auto_run_migrations", False):
         _run_migrations()
     elif settings.auto_create_tables:
@@ -87,6 +101,34 @@ def _on_startup():
         threading.Thread(target=lambda: asyncio.run(_cleanup_loop()), daemon=True).start()
 
 
+@app.on_event("startup")
+async def _start_recommendations_refresh():
+    if settings.recommendations_refresh_seconds > 0:
+        asyncio.get_running_loop().create_task(_recommendations_loop())
+
+
+@app.on_event("startup")
+async def _start_trending_refresh():
+    if settings.trending_refresh_seconds > 0:
+        asyncio.get_running_loop().create_task(_trending_loop())
+
+
+@app.on_event("startup")
+async def _start_email_sender():
+    if settings.email_delivery_mode == "async":
+        email_sender.start()
+
+
+@app.on_event("shutdown")
+async def _drain_email_sender():
+    await email_sender.stop()
+
+
+@app.on_event("shutdown")
+def _on_shutdown():
+    mark_process_dead()
+
+
 def _ensure_future_date(start_time: datetime) -> None:
     start_time = _normalize_dt(start_time)
     if start_time and start_time < datetime.now(timezone.utc):
@@ -126,7 +168,13 @@ def _run_cleanup_once(retention_days: int = 90) -> None:
             .filter(models.Event.start_time < cutoff)
             .delete(synchronize_session=False)
         )
+        if old_regs:
+            db.query(models.Event).filter(models.Event.start_time < cutoff, models.Event.seats_taken != 0).update(
+                {models.Event.seats_taken: 0}, synchronize_session=False
+            )
         db.commit()
+        if old_regs:
+            _invalidate_event_lists()
         log_event("cleanup_completed", expired_tokens=expired_tokens, old_registrations=old_regs)
     except Exception as exc:  # noqa: BLE001
         db.rollback()
@@ -141,13 +189,31 @@ async def _cleanup_loop() -> None:
         await asyncio.sleep(3600)
 
 
+async def _recommendations_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.recommendations_refresh_seconds)
+        try:
+            await run_in_threadpool(recommendations.refresh_dirty)
+        except Exception as exc:  # noqa: BLE001 - marks stay queued for the next run
+            log_warning("recommendations_refresh_failed", error=str(exc))
+
+
+async def _trending_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.trending_refresh_seconds)
+        try:
+            await run_in_threadpool(trending.refresh_trending)
+        except Exception as exc:  # noqa: BLE001 - the previous scores stay until the next run
+            log_warning("trending_refresh_failed", error=str(exc))
+
+
 def _event_to_ics(event: models.Event, uid_suffix: str = "") -> str:
     start = _format_ics_dt(event.start_time)
     end = _format_ics_dt(event.end_time) if event.end_time else ""
     lines = [
         "BEGIN:VEVENT",
         f"UID:event-{event.id}{uid_suffix}@eventlink",
-        f"DTSTAMP:{_format_ics_dt(datetime.now(timezone.utc))}",
+        f"DTSTAMP:{_format_ics_dt(event.updated_at or datetime.now(timezone.utc))}",
         f"DTSTART:{start}",
         f"SUMMARY:{event.title}",
         f"DESCRIPTION:{event.description or ''}",
@@ -172,25 +238,17 @@ def _attach_tags(db: Session, event: models.Event, tag_names: list[str]) -> None
     event.tags = tags
 
 
-def _events_with_counts_query(db: Session, base_query=None):
-    if base_query is None:
-        base_query = db.query(models.Event)
-    seats_subquery = (
-        db.query(
-            models.Registration.event_id,
-            func.count(models.Registration.id).label("seats_taken"),
-        )
-        .group_by(models.Registration.event_id)
-        .subquery()
-    )
-    query = (
-        base_query.outerjoin(seats_subquery, models.Event.id == seats_subquery.c.event_id)
-        .add_columns(func.coalesce(seats_subquery.c.seats_taken, 0).label("seats_taken"))
-    )
-    return query, seats_subquery
+def _invalidate_event_lists() -> None:
+    """Drop cached anonymous event lists after anything that changes what they show."""
+    event_list_cache.invalidate()
+
 
+# Loader options for every query whose rows go through _serialize_event: owner and tags arrive in
+# one batched SELECT each instead of two lazy loads per event.
+_EVENT_LIST_LOADERS = (selectinload(models.Event.owner), selectinload(models.Event.tags))
 
-def _serialize_event(event: models.Event, seats_taken: int, recommendation_reason: str | None = None) -> schemas.EventResponse:
+
+def _serialize_event(event: models.Event, recommendation_reason: str | None = None) -> schemas.EventResponse:
     owner_name = None
     if event.owner:
         owner_name = event.owner.full_name or event.owner.email
@@ -206,7 +264,7 @@ def _serialize_event(event: models.Event, seats_taken: int, recommendation_reaso
         owner_id=event.owner_id,
         owner_name=owner_name,
         tags=event.tags,
-        seats_taken=int(seats_taken or 0),
+        seats_taken=event.seats_taken or 0,
         cover_url=event.cover_url,
         status=event.status,
         publish_at=event.publish_at,
@@ -214,30 +272,77 @@ def _serialize_event(event: models.Event, seats_taken: int, recommendation_reaso
     )
 
 
+def _encode_cursor(*key: datetime | float | int | None) -> str:
+    """Opaque keyset cursor: the sort values of the last row on the page, its id last."""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int = 2) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        *raw_values, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if len(raw_values) != size - 1:
+            raise ValueError(cursor)
+        values = []
+        for raw_value in raw_values:
+            if isinstance(raw_value, str):
+                raw_value = datetime.fromisoformat(raw_value)
+            elif raw_value is not None and not isinstance(raw_value, (int, float)):
+                raise TypeError(raw_value)
+            values.append(raw_value)
+        return (*values, int(row_id))
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor invalid.")
+
+
+def _after_cursor(query, sort_column, id_column, cursor: str, descending: bool = False):
+    """Filter to rows strictly after the cursor position in (sort_column, id_column) order."""
+    sort_value, row_id = _decode_cursor(cursor)
+    if descending:
+        return query.filter((sort_column < sort_value) | ((sort_column == sort_value) & (id_column < row_id)))
+    return query.filter((sort_column > sort_value) | ((sort_column == sort_value) & (id_column > row_id)))
+
+
+def _find_user_by_email(db: Session, email: str) -> Optional[models.User]:
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
+def _save(db: Session, *instances) -> None:
+    for instance in instances:
+        db.add(instance)
+    db.commit()
+    for instance in instances:
+        db.refresh(instance)
+
+
+# The credential endpoints are async so bcrypt runs on auth's dedicated hashing pool;
+# their (short) database calls are pushed to the threadpool to keep the event loop free.
 @app.post("/register", response_model=schemas.Token)
-def register(user: schemas.StudentRegister, request: Request, db: Session = Depends(get_db)):
-    _enforce_rate_limit("register", request=request, identifier=user.email.lower())
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: schemas.StudentRegister, request: Request, response: Response, db: Session = Depends(get_db)):
+    await run_in_threadpool(
+        _enforce_rate_limit, "register", request=request, identifier=user.email.lower(), response=response
+    )
+    db_user = await run_in_threadpool(_find_user_by_email, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Acest email este deja folosit.")
     if user.password != user.confirm_password:
         raise HTTPException(status_code=400, detail="Parolele nu se potrivesc.")
 
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await auth.get_password_hash_async(user.password)
     new_user = models.User(
         email=user.email,
         password_hash=hashed_password,
         role=models.UserRole.student,
         full_name=user.full_name,
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(_save, db, new_user)
     log_event("user_registered", user_id=new_user.id, email=new_user.email)
 
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     refresh_expires = timedelta(minutes=settings.refresh_token_expire_minutes)
-    token_payload = {"sub": str(new_user.id), "email": new_user.email, "role": new_user.role.value}
+    token_payload = auth.token_claims(new_user)
     access_token = auth.create_access_token(data=token_payload, expires_delta=access_token_expires)
     refresh_token = auth.create_refresh_token(data=token_payload, expires_delta=refresh_expires)
     return {
@@ -250,10 +355,12 @@ def register(user: schemas.StudentRegister, request: Request, db: Session = Depe
 
 
 @app.post("/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, request: Request, db: Session = Depends(get_db)):
-    _enforce_rate_limit("login", request=request, identifier=user_credentials.email.lower())
-    user = db.query(models.User).filter(models.User.email == user_credentials.email).first()
-    if not user or not auth.verify_password(user_credentials.password, user.password_hash):
+async def login(user_credentials: schemas.UserLogin, request: Request, response: Response, db: Session = Depends(get_db)):
+    await run_in_threadpool(
+        _enforce_rate_limit, "login", request=request, identifier=user_credentials.email.lower(), response=response
+    )
+    user = await run_in_threadpool(_find_user_by_email, db, user_credentials.email)
+    if not user or not await auth.verify_password_async(user_credentials.password, user.password_hash):
         log_warning("login_failed", email=user_credentials.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -263,7 +370,7 @@ def login(user_credentials: schemas.UserLogin, request: Request, db: Session = D
 
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     refresh_expires = timedelta(minutes=settings.refresh_token_expire_minutes)
-    token_payload = {"sub": str(user.id), "email": user.email, "role": user.role.value}
+    token_payload = auth.token_claims(user)
     access_token = auth.create_access_token(data=token_payload, expires_delta=access_token_expires)
     refresh_token = auth.create_refresh_token(data=token_payload, expires_delta=refresh_expires)
     log_event("login_success", user_id=user.id, email=user.email, role=user.role.value)
@@ -294,7 +401,7 @@ def refresh_token(payload: schemas.RefreshRequest):
     if not user_id or not role:
         raise HTTPException(status_code=401, detail="Refresh token invalid.")
 
-    token_payload = {"sub": str(user_id), "email": email, "role": role}
+    token_payload = {"sub": str(user_id), "email": email, "role": role, "ver": decoded.get("ver", 0)}
     access_token = auth.create_access_token(
         data=token_payload, expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
     )
@@ -311,7 +418,7 @@ def refresh_token(payload: schemas.RefreshRequest):
 
 
 @app.get("/me", response_model=schemas.UserResponse)
-def get_me(current_user: models.User = Depends(auth.get_current_user)):
+def get_me(current_user: auth.Principal = Depends(auth.get_current_user)):
     return current_user
 
 
@@ -319,15 +426,17 @@ def get_me(current_user: models.User = Depends(auth.get_current_user)):
 def upgrade_to_organizer(
     request: schemas.OrganizerUpgradeRequest,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_current_user),
 ):
     if current_user.role == models.UserRole.organizator:
         return {"status": "already_organizer"}
     if not settings.organizer_invite_code or request.invite_code != settings.organizer_invite_code:
         raise HTTPException(status_code=403, detail="Cod invalid sau lipsă.")
-    current_user.role = models.UserRole.organizator
-    db.add(current_user)
+    user = db.get(models.User, current_user.id)
+    user.role = models.UserRole.organizator
+    db.add(user)
     db.commit()
+    auth.invalidate_principal(user.id, user.token_version)
     return {"status": "upgraded"}
 
 
@@ -341,9 +450,11 @@ def read_root():
 async def http_exception_handler(request: Request, exc: HTTPException):
     code = f"http_{exc.status_code}"
     message = exc.detail if isinstance(exc.detail, str) else "Eroare"
+    headers = {**getattr(request.state, "rate_limit_headers", {}), **(exc.headers or {})}
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": {"code": code, "message": message}, "detail": message},
+        headers=headers or None,
     )
 
 
@@ -355,7 +466,8 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
     )
 
 
-_RATE_LIMIT_STORE: dict[str, list[float]] = {}
+# Shared across workers when CACHE_BACKEND=redis.
+_rate_limit_backend = create_backend("rate_limit", settings.rate_limit_max_keys)
 
 
 def _enforce_rate_limit(
@@ -364,23 +476,50 @@ def _enforce_rate_limit(
     limit: int = 20,
     window_seconds: int = 60,
     identifier: str | None = None,
+    response: Response | None = None,
 ) -> None:
+    """Sliding-window-counter limit: two integers per key, weighted by how far into the window we are."""
+    identity = identifier or (request.client.host if request and request.client else "unknown")
     now = time.time()
-    identity = identifier or (request.client.host if request.client else "unknown")
-    key = f"{action}:{identity}"
-    entries = _RATE_LIMIT_STORE.get(key, [])
-    entries = [ts for ts in entries if now - ts < window_seconds]
-    if len(entries) >= limit:
+    window = int(now // window_seconds)
+    elapsed = (now % window_seconds) / window_seconds
+    base_key = f"{action}:{identity}"
+    previous = _rate_limit_backend.get(f"{base_key}:{window - 1}")
+    previous = 0 if previous is MISSING else int(previous)
+    # Counters live for two windows: one as "current", one as "previous".
+    current = _rate_limit_backend.incr(f"{base_key}:{window}", ttl=2 * window_seconds)
+    estimated = previous * (1 - elapsed) + current
+    reset_after = max(1, math.ceil((1 - elapsed) * window_seconds))
+    headers = {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(max(0, math.floor(limit - estimated))),
+        "X-RateLimit-Reset": str(reset_after),
+    }
+    if estimated > limit:
+        if current > limit:
+            # Wait for this window to end, then for its weight (as "previous") to decay enough.
+            retry_after = (1 - elapsed) + (1 - limit / current)
+        else:
+            retry_after = (1 - (limit - current) / previous) - elapsed
+        headers["Retry-After"] = str(max(1, math.ceil(retry_after * window_seconds)))
+        log_warning("rate_limited", action=action, identity=identity, estimated=round(estimated, 2), limit=limit)
+        RATE_LIMIT_REJECTIONS.labels(action=action).inc()
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Prea multe cereri. Încearcă din nou în câteva momente.",
+            headers=headers,
         )
-    entries.append(now)
-    _RATE_LIMIT_STORE[key] = entries
+    if response is not None:
+        response.headers.update(headers)
+    if request is not None:
+        # Error responses are rebuilt by http_exception_handler, which re-attaches these.
+        request.state.rate_limit_headers = headers
 
 
+# The read-heavy public endpoints below are async: their bodies stay ordinary ORM code and run
+# through database.run_read (AsyncSession.run_sync over asyncpg/aiosqlite when ASYNC_DB_ENABLED).
 @app.get("/api/events", response_model=schemas.PaginatedEvents)
-def get_events(
+async def get_events(
     search: Optional[str] = None,
     category: Optional[str] = None,
     start_date: Optional[date] = None,
@@ -391,33 +530,60 @@ def get_events(
     include_past: bool = False,
     page: int = 1,
     page_size: int = 10,
-    db: Session = Depends(get_db),
-    current_user: Optional[models.User] = Depends(auth.get_optional_user),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    sort: Optional[str] = None,
+    current_user: Optional[auth.Principal] = Depends(auth.get_optional_user),
 ):
+    return await run_read(
+        _list_events,
+        search=search,
+        category=category,
+        start_date=start_date,
+        end_date=end_date,
+        tags=tags,
+        tags_csv=tags_csv,
+        location=location,
+        include_past=include_past,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        include_total=include_total,
+        sort=sort,
+        current_user=current_user,
+    )
+
+
+def _check_paging(page: int, page_size: int) -> None:
     if page < 1:
         raise HTTPException(status_code=400, detail="Pagina trebuie să fie cel puțin 1.")
     if page_size < 1 or page_size > 100:
         raise HTTPException(status_code=400, detail="Dimensiunea paginii trebuie să fie între 1 și 100.")
-    now = datetime.now(timezone.utc)
-    query = db.query(models.Event)
-    if not include_past:
-        query = query.filter(models.Event.start_time >= now)
-    # only published and already live
-    query = query.filter(models.Event.status == "published").filter(
-        (models.Event.publish_at == None) | (models.Event.publish_at <= now)  # noqa: E711
-    )
-    if search:
-        query = query.filter(func.lower(models.Event.title).like(f"%{search.lower()}%"))
-    if category:
-        query = query.filter(func.lower(models.Event.category) == category.lower())
+
+
+def _tag_filters(tags: Optional[list[str]], tags_csv: Optional[str]) -> list[str]:
     tag_filters: list[str] = []
     if tags:
         tag_filters.extend(tags)
     if tags_csv:
         tag_filters.extend([t.strip() for t in tags_csv.split(",") if t.strip()])
-    if tag_filters:
-        lowered = [t.lower() for t in tag_filters]
-        query = query.join(models.Event.tags).filter(func.lower(models.Tag.name).in_(lowered))
+    return sorted({t.lower() for t in tag_filters})
+
+
+def _filter_events(
+    query,
+    category: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    lowered_tags: list[str],
+    location: Optional[str],
+):
+    """The category/tag/location/date filters shared by the event list and recommendations."""
+    if category:
+        query = query.filter(func.lower(models.Event.category) == category.lower())
+    if lowered_tags:
+        # EXISTS instead of a join keeps one row per event, so no DISTINCT is needed.
+        query = query.filter(models.Event.tags.any(func.lower(models.Tag.name).in_(lowered_tags)))
     if location:
         query = query.filter(func.lower(models.Event.location).like(f"%{location.lower()}%"))
     if start_date:
@@ -426,23 +592,217 @@ def get_events(
     if end_date:
         end_dt = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc)
         query = query.filter(models.Event.start_time <= end_dt)
-    query = query.distinct(models.Event.id)
-    total = query.count()
-    query = query.order_by(models.Event.start_time)
-    query, seats_subquery = _events_with_counts_query(db, query)
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    events = query.all()
-    items = [_serialize_event(event, seats) for event, seats in events]
-    return {"items": items, "total": total, "page": page, "page_size": page_size}
+    return query
+
+
+def _list_events(
+    db: Session,
+    search: Optional[str],
+    category: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    tags: Optional[list[str]],
+    tags_csv: Optional[str],
+    location: Optional[str],
+    include_past: bool,
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+    include_total: Optional[bool],
+    sort: Optional[str],
+    current_user: Optional[auth.Principal],
+):
+    _check_paging(page, page_size)
+    # Searches are ranked by relevance unless the caller asks for chronological order.
+    sort = sort or ("relevance" if search else "start_time")
+    if sort not in ("relevance", "start_time"):
+        raise HTTPException(status_code=400, detail="Sortare invalidă.")
+    if cursor and sort == "relevance":
+        raise HTTPException(status_code=400, detail="Cursorul este disponibil doar la sortarea după dată.")
+    # Offset pages keep reporting the total for backwards compatibility; cursor pages skip it by default.
+    if include_total is None:
+        include_total = cursor is None
+    lowered_tags = _tag_filters(tags, tags_csv)
+
+    # Anonymous responses are identical for everyone, so they are served from a short-lived cache.
+    cache_key = None
+    if current_user is None and event_list_cache.enabled:
+        cache_key = (
+            (search or "").strip().lower(),
+            (category or "").lower(),
+            start_date,
+            end_date,
+            tuple(lowered_tags),
+            (location or "").lower(),
+            include_past,
+            page,
+            page_size,
+            cursor,
+            include_total,
+            sort,
+        )
+        cached = event_list_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+
+    now = datetime.now(timezone.utc)
+    query = db.query(models.Event)
+    if not include_past:
+        query = query.filter(models.Event.start_time >= now)
+    # only published and already live
+    query = query.filter(models.Event.status == "published").filter(
+        (models.Event.publish_at == None) | (models.Event.publish_at <= now)  # noqa: E711
+    )
+    rank = None
+    if search:
+        query, rank = search_events(db, query, search)
+    query = _filter_events(query, category, start_date, end_date, lowered_tags, location)
+    total = query.count() if include_total else None
+    if sort == "relevance" and rank is not None:
+        query = query.order_by(rank.desc(), models.Event.start_time, models.Event.id)
+    else:
+        query = query.order_by(models.Event.start_time, models.Event.id)
+    if cursor:
+        query = _after_cursor(query, models.Event.start_time, models.Event.id, cursor)
+    else:
+        query = query.offset((page - 1) * page_size)
+    events = query.options(*_EVENT_LIST_LOADERS).limit(page_size + 1).all()
+    next_cursor = None
+    if len(events) > page_size:
+        events = events[:page_size]
+        if sort == "start_time":
+            next_cursor = _encode_cursor(events[-1].start_time, events[-1].id)
+    items = [_serialize_event(event) for event in events]
+    result = {"items": items, "total": total, "page": page, "page_size": page_size, "next_cursor": next_cursor}
+    if cache_key is not None:
+        event_list_cache.set(cache_key, jsonable_encoder(result))
+    return result
+
+
+# Registered before /api/events/{event_id}, which would otherwise capture "trending".
+@app.get("/api/events/trending", response_model=schemas.PaginatedEvents)
+async def trending_events(
+    category: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tags: Optional[list[str]] = Query(None),
+    tags_csv: Optional[str] = None,
+    location: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+):
+    _check_paging(page, page_size)
+    return await run_read(
+        _trending_events,
+        category=category,
+        start_date=start_date,
+        end_date=end_date,
+        lowered_tags=_tag_filters(tags, tags_csv),
+        location=location,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+    )
+
+
+def _trending_events(
+    db: Session,
+    category: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    lowered_tags: Optional[list[str]] = None,
+    location: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+):
+    # Scores come from the event_trending table (app.trending); nothing is aggregated here.
+    now = datetime.now(timezone.utc)
+    query = _filter_events(
+        db.query(models.Event, models.EventTrending.score)
+        .join(models.EventTrending, models.EventTrending.event_id == models.Event.id)
+        .filter(
+            models.Event.start_time >= now,
+            models.Event.status == "published",
+            (models.Event.publish_at == None) | (models.Event.publish_at <= now),  # noqa: E711
+        ),
+        category,
+        start_date,
+        end_date,
+        lowered_tags or [],
+        location,
+    )
+    rows, next_cursor = _page_by_score(query, models.EventTrending.score, page, page_size, cursor)
+    items = [_serialize_event(event) for event, _score in rows]
+    return {"items": items, "total": None, "page": page, "page_size": page_size, "next_cursor": next_cursor}
+
+
+def _page_by_score(query, sort_column, page: int, page_size: int, cursor: Optional[str]):
+    """One page of ``(Event, score, ...)`` rows and the cursor for the next.
+
+    Best score first; ties go to the event that starts first (as in ``recommendations._keep_top``).
+    """
+    start, event_id = models.Event.start_time, models.Event.id
+    query = query.order_by(sort_column.desc(), start, event_id)
+    if cursor:
+        score, start_value, row_id = _decode_cursor(cursor, size=3)
+        query = query.filter(
+            (sort_column < score)
+            | ((sort_column == score) & ((start > start_value) | ((start == start_value) & (event_id > row_id))))
+        )
+    else:
+        query = query.offset((page - 1) * page_size)
+    rows = query.options(*_EVENT_LIST_LOADERS).limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(rows[-1][1], rows[-1][0].start_time, rows[-1][0].id)
+    return rows, next_cursor
 
 
 @app.get("/api/events/{event_id}", response_model=schemas.EventDetailResponse)
-def get_event(event_id: int, db: Session = Depends(get_db), current_user: Optional[models.User] = Depends(auth.get_optional_user)):
-    query, seats_subquery = _events_with_counts_query(db, db.query(models.Event).filter(models.Event.id == event_id))
-    result = query.first()
-    if not result:
+async def get_event(
+    event_id: int,
+    request: Request,
+    response: Response,
+    current_user: Optional[auth.Principal] = Depends(auth.get_optional_user),
+):
+    headers = await run_read(_event_detail_validators, event_id, current_user)
+    if headers:
+        unchanged = not_modified(request, headers)
+        if unchanged:
+            return unchanged
+        response.headers.update(headers)
+    return await run_read(_event_detail, event_id, current_user)
+
+
+def _event_detail_validators(db: Session, event_id: int, current_user: Optional[auth.Principal]) -> Optional[dict]:
+    """ETag/Last-Modified from one indexed lookup; None when the full path must answer (404s)."""
+    columns = [models.Event.updated_at, models.Event.status, models.Event.publish_at, models.Event.owner_id]
+    if current_user:
+        columns += [
+            exists().where(models.Registration.event_id == event_id, models.Registration.user_id == current_user.id),
+            exists().where(models.FavoriteEvent.event_id == event_id, models.FavoriteEvent.user_id == current_user.id),
+        ]
+    row = db.query(*columns).filter(models.Event.id == event_id).first()
+    if row is None:
+        return None
+    updated_at, event_status, publish_at, owner_id = row[:4]
+    is_owner = current_user is not None and current_user.id == owner_id
+    publish_at = _normalize_dt(publish_at)
+    if (event_status != "published" or (publish_at and publish_at > datetime.now(timezone.utc))) and not is_owner:
+        return None
+    user_state = (current_user.id, *row[4:]) if current_user else ()
+    etag = weak_etag("event", event_id, _normalize_dt(updated_at).isoformat(), *user_state)
+    return validator_headers(etag, updated_at, private=current_user is not None)
+
+
+def _event_detail(db: Session, event_id: int, current_user: Optional[auth.Principal]):
+    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    if not event:
         raise HTTPException(status_code=404, detail="Evenimentul nu există")
-    event, seats_taken = result
+    seats_taken = event.seats_taken or 0
     now = datetime.now(timezone.utc)
     if (event.status != "published" or (event.publish_at and event.publish_at > now)) and not (
         current_user and current_user.id == event.owner_id
@@ -478,7 +838,7 @@ def get_event(event_id: int, db: Session = Depends(get_db), current_user: Option
         owner_id=event.owner_id,
         owner_name=owner_name,
         tags=event.tags,
-        seats_taken=seats_taken or 0,
+        seats_taken=seats_taken,
         is_registered=is_registered,
         is_owner=current_user.id == event.owner_id if current_user else False,
         available_seats=available_seats,
@@ -488,7 +848,7 @@ def get_event(event_id: int, db: Session = Depends(get_db), current_user: Option
 
 @app.post("/api/events", response_model=schemas.EventResponse, status_code=status.HTTP_201_CREATED)
 def create_event(
-    event: schemas.EventCreate, db: Session = Depends(get_db), current_user: models.User = Depends(auth.require_organizer)
+    event: schemas.EventCreate, db: Session = Depends(get_db), current_user: auth.Principal = Depends(auth.require_organizer)
 ):
     start_time = _normalize_dt(event.start_time)
     end_time = _normalize_dt(event.end_time)
@@ -518,18 +878,23 @@ def create_event(
     )
     _attach_tags(db, new_event, event.tags or [])
     db.add(new_event)
+    db.flush()
+    recommendations.mark_event_dirty(db, new_event.id)
     db.commit()
     db.refresh(new_event)
+    _invalidate_event_lists()
     log_event("event_created", event_id=new_event.id, owner_id=current_user.id)
-    return _serialize_event(new_event, 0)
+    return _serialize_event(new_event)
 
 
 @app.put("/api/events/{event_id}", response_model=schemas.EventResponse)
 def update_event(
     event_id: int,
     update: schemas.EventUpdate,
+    background_tasks: BackgroundTasks,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_organizer),
+    current_user: auth.Principal = Depends(auth.require_organizer),
 ):
     db_event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not db_event:
@@ -537,6 +902,7 @@ def update_event(
     if db_event.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Nu aveți dreptul să modificați acest eveniment.")
 
+    schedule_before = (_normalize_dt(db_event.start_time), _normalize_dt(db_event.end_time), db_event.location)
     if update.title is not None:
         db_event.title = update.title
     if update.description is not None:
@@ -566,6 +932,8 @@ def update_event(
         db_event.cover_url = update.cover_url
     if update.tags is not None:
         _attach_tags(db, db_event, update.tags)
+        # Tag changes only touch event_tags, so onupdate would not fire for the event row.
+        db_event.updated_at = datetime.now(timezone.utc)
     if update.status is not None:
         if update.status not in ("draft", "published"):
             raise HTTPException(status_code=400, detail="Status invalid")
@@ -573,36 +941,69 @@ def update_event(
     if update.publish_at is not None:
         db_event.publish_at = _normalize_dt(update.publish_at)
 
+    job = None
+    if (_normalize_dt(db_event.start_time), _normalize_dt(db_event.end_time), db_event.location) != schedule_before:
+        job = notifications.create_job(db, db_event, "event_updated", current_user.id)
+    recommendations.mark_event_dirty(db, db_event.id)
+
     db.commit()
     db.refresh(db_event)
+    _invalidate_event_lists()
     log_event("event_updated", event_id=db_event.id, owner_id=current_user.id)
-    seats_count = (
-        db.query(func.count(models.Registration.id))
-        .filter(models.Registration.event_id == db_event.id)
-        .scalar()
-    ) or 0
-    return _serialize_event(db_event, seats_count)
+    if job:
+        _start_notification_job(background_tasks, response, job)
+    return _serialize_event(db_event)
+
+
+def _start_notification_job(background_tasks: BackgroundTasks, response: Response, job: models.NotificationJob) -> None:
+    # Registrants are emailed after the response; progress is at GET /api/notification-jobs/{id}.
+    background_tasks.add_task(notifications.run_job, job.id)
+    response.headers["X-Notification-Job"] = str(job.id)
+    log_event("notification_job_queued", job_id=job.id, event_id=job.event_id, kind=job.kind, total=job.total)
 
 
 @app.delete("/api/events/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(event_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(auth.require_organizer)):
+def delete_event(
+    event_id: int,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.require_organizer),
+):
     db_event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not db_event:
         raise HTTPException(status_code=404, detail="Evenimentul nu există")
     if db_event.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Nu aveți dreptul să ștergeți acest eveniment.")
 
+    # Recipients are copied before the registrations go away with the event.
+    job = notifications.create_job(db, db_event, "event_cancelled", current_user.id)
     db.delete(db_event)
     db.commit()
+    _invalidate_event_lists()
     log_event("event_deleted", event_id=db_event.id, owner_id=current_user.id)
+    if job:
+        _start_notification_job(background_tasks, response, job)
     return
 
 
+@app.get("/api/notification-jobs/{job_id}", response_model=schemas.NotificationJobResponse)
+def notification_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.require_organizer),
+):
+    job = db.get(models.NotificationJob, job_id)
+    if not job or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Notificarea nu există.")
+    return job
+
+
 @app.post("/api/events/{event_id}/clone", response_model=schemas.EventResponse)
 def clone_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_organizer),
+    current_user: auth.Principal = Depends(auth.require_organizer),
 ):
     orig = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not orig:
@@ -631,34 +1032,38 @@ def clone_event(
     db.add(new_event)
     db.commit()
     db.refresh(new_event)
+    _invalidate_event_lists()
     log_event("event_cloned", source_event_id=orig.id, new_event_id=new_event.id, owner_id=current_user.id)
-    seats = (
-        db.query(func.count(models.Registration.id))
-        .filter(models.Registration.event_id == new_event.id)
-        .scalar()
-    ) or 0
-    return _serialize_event(new_event, seats)
+    return _serialize_event(new_event)
 
 
 @app.get("/api/organizer/events", response_model=List[schemas.EventResponse])
 def organizer_events(
-    db: Session = Depends(get_db), current_user: models.User = Depends(auth.require_organizer)
+    db: Session = Depends(get_db), current_user: auth.Principal = Depends(auth.require_organizer)
 ):
-    base_query = db.query(models.Event).filter(models.Event.owner_id == current_user.id).order_by(models.Event.start_time)
-    query, seats_subquery = _events_with_counts_query(db, base_query)
-    events = query.all()
-    return [_serialize_event(event, seats) for event, seats in events]
+    events = (
+        db.query(models.Event)
+        .options(*_EVENT_LIST_LOADERS)
+        .filter(models.Event.owner_id == current_user.id)
+        .order_by(models.Event.start_time)
+        .all()
+    )
+    return [_serialize_event(event) for event in events]
 
 
-def _serialize_profile(user: models.User, db: Session) -> schemas.OrganizerProfileResponse:
-    base_query = db.query(models.Event).filter(models.Event.owner_id == user.id)
+def _public_events_of(query, organizer_id: int):
     now = datetime.now(timezone.utc)
-    base_query = base_query.filter(
+    return query.filter(
+        models.Event.owner_id == organizer_id,
         models.Event.status == "published",
         (models.Event.publish_at == None) | (models.Event.publish_at <= now),  # noqa: E711
-    ).order_by(models.Event.start_time)
-    query, seats_subquery = _events_with_counts_query(db, base_query)
-    events = [_serialize_event(ev, seats) for ev, seats in query.all()]
+    )
+
+
+def _serialize_profile(user: models.User, db: Session) -> schemas.OrganizerProfileResponse:
+    base_query = _public_events_of(db.query(models.Event).options(*_EVENT_LIST_LOADERS), user.id)
+    base_query = base_query.order_by(models.Event.start_time)
+    events = [_serialize_event(ev) for ev in base_query.all()]
     return schemas.OrganizerProfileResponse(
         user_id=user.id,
         email=user.email,
@@ -672,10 +1077,20 @@ def _serialize_profile(user: models.User, db: Session) -> schemas.OrganizerProfi
 
 
 @app.get("/api/organizers/{organizer_id}", response_model=schemas.OrganizerProfileResponse)
-def get_organizer_profile(organizer_id: int, db: Session = Depends(get_db)):
+def get_organizer_profile(organizer_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.id == organizer_id, models.User.role == models.UserRole.organizator).first()
     if not user:
         raise HTTPException(status_code=404, detail="Organizatorul nu există")
+    # The count notices events becoming visible at publish_at; profile fields have no timestamp,
+    # so only an ETag is sent (no Last-Modified).
+    summary = db.query(func.count(models.Event.id), func.max(models.Event.updated_at))
+    count, last_update = _public_events_of(summary, user.id).one()
+    profile = (user.full_name, user.org_name, user.org_description, user.org_logo_url, user.org_website)
+    headers = validator_headers(weak_etag("organizer", user.id, *profile, count, last_update), None)
+    unchanged = not_modified(request, headers)
+    if unchanged:
+        return unchanged
+    response.headers.update(headers)
     return _serialize_profile(user, db)
 
 
@@ -683,18 +1098,20 @@ def get_organizer_profile(organizer_id: int, db: Session = Depends(get_db)):
 def update_organizer_profile(
     payload: schemas.OrganizerProfileUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_organizer),
+    current_user: auth.Principal = Depends(auth.require_organizer),
 ):
     if payload.org_logo_url and len(payload.org_logo_url) > 500:
         raise HTTPException(status_code=400, detail="URL logo prea lung")
-    current_user.org_name = payload.org_name or current_user.org_name
-    current_user.org_description = payload.org_description
-    current_user.org_logo_url = payload.org_logo_url
-    current_user.org_website = payload.org_website
-    db.add(current_user)
+    user = db.get(models.User, current_user.id)
+    user.org_name = payload.org_name or user.org_name
+    user.org_description = payload.org_description
+    user.org_logo_url = payload.org_logo_url
+    user.org_website = payload.org_website
+    db.add(user)
     db.commit()
-    db.refresh(current_user)
-    return _serialize_profile(current_user, db)
+    db.refresh(user)
+    auth.invalidate_principal(user.id, user.token_version)
+    return _serialize_profile(user, db)
 
 
 @app.get("/api/organizer/events/{event_id}/participants", response_model=schemas.ParticipantListResponse)
@@ -704,8 +1121,10 @@ def event_participants(
     page_size: int = 20,
     sort_by: str = "registration_time",
     sort_dir: str = "asc",
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_organizer),
+    current_user: auth.Principal = Depends(auth.require_organizer),
 ):
     event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not event:
@@ -718,17 +1137,41 @@ def event_participants(
         sort_column = models.User.email
     elif sort_by == "name":
         sort_column = models.User.full_name
-    order_clause = sort_column.asc() if sort_dir.lower() != "desc" else sort_column.desc()
+    # Keyset cursors are only defined for the (registration_time, user_id) ordering.
+    keyset = sort_by not in ("email", "name")
+    if cursor and not keyset:
+        raise HTTPException(status_code=400, detail="Cursorul este disponibil doar la sortarea după data înscrierii.")
+    descending = sort_dir.lower() == "desc"
+    order_clauses = (
+        [sort_column.desc(), models.Registration.user_id.desc()]
+        if descending
+        else [sort_column.asc(), models.Registration.user_id.asc()]
+    )
+    if include_total is None:
+        include_total = cursor is None
 
     base_query = (
         db.query(models.User, models.Registration.registration_time, models.Registration.attended)
         .join(models.Registration, models.User.id == models.Registration.user_id)
         .filter(models.Registration.event_id == event_id)
     )
-    total = base_query.count()
+    total = base_query.count() if include_total else None
     page = max(page, 1)
     page_size = max(1, min(page_size, 200))
-    participants = base_query.order_by(order_clause).offset((page - 1) * page_size).limit(page_size).all()
+    base_query = base_query.order_by(*order_clauses)
+    if cursor:
+        base_query = _after_cursor(
+            base_query, models.Registration.registration_time, models.Registration.user_id, cursor, descending=descending
+        )
+    else:
+        base_query = base_query.offset((page - 1) * page_size)
+    participants = base_query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(participants) > page_size:
+        participants = participants[:page_size]
+        if keyset:
+            last_user, last_reg_time, _ = participants[-1]
+            next_cursor = _encode_cursor(last_reg_time, last_user.id)
     participant_list = [
         schemas.ParticipantResponse(
             id=user.id,
@@ -739,17 +1182,42 @@ def event_participants(
         )
         for user, reg_time, attended in participants
     ]
-    seats_taken = total
     return schemas.ParticipantListResponse(
         event_id=event.id,
         title=event.title,
         cover_url=event.cover_url,
-        seats_taken=seats_taken,
+        seats_taken=event.seats_taken or 0,
         max_seats=event.max_seats,
         participants=participant_list,
         total=total,
         page=page,
         page_size=page_size,
+        next_cursor=next_cursor,
+    )
+
+
+@app.get("/api/organizer/events/{event_id}/participants.csv")
+def export_participants_csv(
+    event_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(auth.require_organizer),
+):
+    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Evenimentul nu există")
+    if event.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Nu aveți dreptul să accesați acest eveniment.")
+
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
+    headers = {"Content-Disposition": f'attachment; filename="participanti-{event_id}.csv"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    log_event("participants_exported", event_id=event_id, owner_id=current_user.id, gzip=compress)
+    return StreamingResponse(
+        exports.participants_csv(event_id, event.cover_url, compress=compress),
+        media_type="text/csv; charset=utf-8",
+        headers=headers,
     )
 
 
@@ -759,7 +1227,7 @@ def update_participant_attendance(
     user_id: int,
     attended: bool,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_organizer),
+    current_user: auth.Principal = Depends(auth.require_organizer),
 ):
     event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not event:
@@ -777,6 +1245,7 @@ def update_participant_attendance(
 
     registration.attended = attended
     db.add(registration)
+    recommendations.mark_user_dirty(db, user_id)
     db.commit()
     log_event("attendance_updated", event_id=registration.event_id, user_id=user_id, owner_id=current_user.id, attended=attended)
     return
@@ -788,7 +1257,7 @@ def register_for_event(
     background_tasks: BackgroundTasks,
     request: Request,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_student),
+    current_user: auth.Principal = Depends(auth.require_student),
 ):
     event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not event:
@@ -800,10 +1269,7 @@ def register_for_event(
     if start_time and start_time < now:
         raise HTTPException(status_code=400, detail="Evenimentul a început deja.")
 
-    seats_taken = (
-        db.query(func.count(models.Registration.id)).filter(models.Registration.event_id == event_id).scalar() or 0
-    )
-    if event.max_seats is not None and seats_taken >= event.max_seats:
+    if event.max_seats is not None and (event.seats_taken or 0) >= event.max_seats:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Evenimentul este plin.")
 
     existing = (
@@ -814,14 +1280,33 @@ def register_for_event(
     if existing:
         raise HTTPException(status_code=400, detail="Ești deja înscris la eveniment.")
 
-    registration = models.Registration(user_id=current_user.id, event_id=event_id)
-    db.add(registration)
-    db.commit()
-    log_event("event_registered", event_id=event.id, user_id=current_user.id)
+    # The checks above are only a fast path; the conditional UPDATE is what actually
+    # reserves a seat, so concurrent requests can never push seats_taken past max_seats.
+    reserved = (
+        db.query(models.Event)
+        .filter(
+            models.Event.id == event_id,
+            (models.Event.max_seats == None) | (models.Event.seats_taken < models.Event.max_seats),  # noqa: E711
+        )
+        .update({models.Event.seats_taken: models.Event.seats_taken + 1}, synchronize_session=False)
+    )
+    if not reserved:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Evenimentul este plin.")
 
-    lang = (request.headers.get("accept-language") if request else None) or "ro"
+    lang = negotiate_language(request.headers.get("accept-language") if request else None)
+    registration = models.Registration(user_id=current_user.id, event_id=event_id, lang=lang)
+    db.add(registration)
+    recommendations.mark_user_dirty(db, current_user.id)
+    if event.max_seats is not None:
+        seats_taken = db.query(models.Event.seats_taken).filter(models.Event.id == event_id).scalar()
+        if seats_taken >= event.max_seats:
+            # That was the last seat: rescore the event so other students' rows drop it.
+            recommendations.mark_event_dirty(db, event_id)
     subject, body_text, body_html = render_registration_email(event, current_user, lang=lang)
-    send_registration_email(
+    # The confirmation is committed together with the registration (outbox mode).
+    queue_email(
+        db,
         background_tasks,
         current_user.email,
         subject,
@@ -829,6 +1314,14 @@ def register_for_event(
         body_html,
         context={"user_id": current_user.id, "event_id": event.id, "lang": lang},
     )
+    try:
+        db.commit()
+    except IntegrityError:
+        # A parallel request for the same student won the race on uq_registration.
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Ești deja înscris la eveniment.")
+    _invalidate_event_lists()
+    log_event("event_registered", event_id=event.id, user_id=current_user.id)
     return {"status": "registered"}
 
 
@@ -837,10 +1330,18 @@ def resend_registration_email(
     event_id: int,
     background_tasks: BackgroundTasks,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_student),
+    current_user: auth.Principal = Depends(auth.require_student),
 ):
-    _enforce_rate_limit("resend_registration", request=request, identifier=current_user.email.lower(), limit=3, window_seconds=600)
+    _enforce_rate_limit(
+        "resend_registration",
+        request=request,
+        identifier=current_user.email.lower(),
+        limit=3,
+        window_seconds=600,
+        response=response,
+    )
     event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Evenimentul nu există")
@@ -852,9 +1353,10 @@ def resend_registration_email(
     if not registration:
         raise HTTPException(status_code=400, detail="Nu ești înscris la acest eveniment.")
 
-    lang = (request.headers.get("accept-language") or "ro")
+    lang = negotiate_language(request.headers.get("accept-language"))
     subject, body_text, body_html = render_registration_email(event, current_user, lang=lang)
-    send_registration_email(
+    queue_email(
+        db,
         background_tasks,
         current_user.email,
         subject,
@@ -862,6 +1364,7 @@ def resend_registration_email(
         body_html,
         context={"user_id": current_user.id, "event_id": event.id, "lang": lang, "resend": True},
     )
+    db.commit()
     return {"status": "resent"}
 
 
@@ -869,7 +1372,7 @@ def resend_registration_email(
 def unregister_from_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_student),
+    current_user: auth.Principal = Depends(auth.require_student),
 ):
     event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not event:
@@ -888,7 +1391,14 @@ def unregister_from_event(
         raise HTTPException(status_code=400, detail="Nu ești înscris la acest eveniment.")
 
     db.delete(registration)
+    db.query(models.Event).filter(models.Event.id == event_id, models.Event.seats_taken > 0).update(
+        {models.Event.seats_taken: models.Event.seats_taken - 1}, synchronize_session=False
+    )
+    # The freed seat can bring a full event back into other students' recommendations.
+    recommendations.mark_user_dirty(db, current_user.id)
+    recommendations.mark_event_dirty(db, event_id)
     db.commit()
+    _invalidate_event_lists()
     log_event("event_unregistered", event_id=event.id, user_id=current_user.id)
     return
 
@@ -897,7 +1407,7 @@ def unregister_from_event(
 def favorite_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_student),
+    current_user: auth.Principal = Depends(auth.require_student),
 ):
     event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not event:
@@ -911,6 +1421,7 @@ def favorite_event(
         return {"status": "exists"}
     fav = models.FavoriteEvent(user_id=current_user.id, event_id=event_id)
     db.add(fav)
+    recommendations.mark_user_dirty(db, current_user.id)
     db.commit()
     return {"status": "added"}
 
@@ -919,7 +1430,7 @@ def favorite_event(
 def unfavorite_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_student),
+    current_user: auth.Principal = Depends(auth.require_student),
 ):
     fav = (
         db.query(models.FavoriteEvent)
@@ -929,103 +1440,146 @@ def unfavorite_event(
     if not fav:
         raise HTTPException(status_code=404, detail="Favoritul nu există")
     db.delete(fav)
+    recommendations.mark_user_dirty(db, current_user.id)
     db.commit()
     return
 
 
 @app.get("/api/me/favorites", response_model=schemas.FavoriteListResponse)
-def list_favorites(db: Session = Depends(get_db), current_user: models.User = Depends(auth.require_student)):
+async def list_favorites(current_user: auth.Principal = Depends(auth.require_student)):
+    return await run_read(_favorite_events, current_user.id)
+
+
+def _favorite_events(db: Session, user_id: int):
     base_query = (
         db.query(models.Event)
         .join(models.FavoriteEvent, models.Event.id == models.FavoriteEvent.event_id)
-        .filter(models.FavoriteEvent.user_id == current_user.id)
+        .filter(models.FavoriteEvent.user_id == user_id)
     )
     now = datetime.now(timezone.utc)
     base_query = base_query.filter(
         models.Event.status == "published",
         (models.Event.publish_at == None) | (models.Event.publish_at <= now),  # noqa: E711
     )
-    query, seats_subquery = _events_with_counts_query(db, base_query)
-    items = [_serialize_event(ev, seats) for ev, seats in query.order_by(models.Event.start_time).all()]
+    items = [_serialize_event(ev) for ev in base_query.options(*_EVENT_LIST_LOADERS).order_by(models.Event.start_time).all()]
     return {"items": items}
 
 
 @app.get("/api/me/events", response_model=List[schemas.EventResponse])
-def my_events(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+def my_events(db: Session = Depends(get_db), current_user: auth.Principal = Depends(auth.get_current_user)):
     current_user = auth.require_student(current_user)
     base_query = (
         db.query(models.Event)
+        .options(*_EVENT_LIST_LOADERS)
         .join(models.Registration, models.Event.id == models.Registration.event_id)
         .filter(models.Registration.user_id == current_user.id)
         .order_by(models.Event.start_time)
     )
-    query, seats_subquery = _events_with_counts_query(db, base_query)
-    events = query.all()
-    return [_serialize_event(event, seats) for event, seats in events]
+    return [_serialize_event(event) for event in base_query.all()]
 
 
-@app.get("/api/recommendations", response_model=List[schemas.EventResponse])
-def recommended_events(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.require_student),
+@app.get("/api/recommendations", response_model=schemas.PaginatedEvents)
+async def recommended_events(
+    strategy: str = "blend",
+    category: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tags: Optional[list[str]] = Query(None),
+    tags_csv: Optional[str] = None,
+    location: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+    current_user: auth.Principal = Depends(auth.require_student),
+):
+    if strategy not in recommendations.STRATEGIES:
+        raise HTTPException(status_code=400, detail="Strategie de recomandare invalidă.")
+    _check_paging(page, page_size)
+    return await run_read(
+        _recommendations,
+        current_user.id,
+        strategy,
+        category=category,
+        start_date=start_date,
+        end_date=end_date,
+        lowered_tags=_tag_filters(tags, tags_csv),
+        location=location,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+    )
+
+
+_RECOMMENDATION_ORDER = {
+    "blend": models.UserRecommendation.score,
+    "tags": models.UserRecommendation.tag_score,
+    "cf": models.UserRecommendation.cf_score,
+}
+
+
+def _recommendations(
+    db: Session,
+    user_id: int,
+    strategy: str = "blend",
+    category: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    lowered_tags: Optional[list[str]] = None,
+    location: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
 ):
     now = datetime.now(timezone.utc)
-    registered_event_ids = [
-        e.event_id
-        for e in db.query(models.Registration.event_id)
-        .filter(models.Registration.user_id == current_user.id)
-        .all()
-    ]
-    tag_names = [
-        t[0]
-        for t in (
-            db.query(models.Tag.name)
-            .join(models.event_tags, models.Tag.id == models.event_tags.c.tag_id)
-            .join(models.Event, models.Event.id == models.event_tags.c.event_id)
-            .join(models.Registration, models.Registration.event_id == models.Event.id)
-            .filter(models.Registration.user_id == current_user.id)
-            .all()
-        )
-    ]
+    registered = db.query(models.Registration.event_id).filter(models.Registration.user_id == user_id)
+    # Capacity is checked here rather than after the LIMIT, so full events never shorten a page.
+    visible = (
+        models.Event.start_time >= now,
+        models.Event.status == "published",
+        (models.Event.publish_at == None) | (models.Event.publish_at <= now),  # noqa: E711
+        (models.Event.max_seats == None) | (models.Event.seats_taken < models.Event.max_seats),  # noqa: E711
+        ~models.Event.id.in_(registered),
+    )
+    filters = (category, start_date, end_date, lowered_tags or [], location)
 
-    events: List[tuple[models.Event, int, Optional[str]]] = []
-    if tag_names:
-        base_query = (
-            db.query(models.Event)
-            .join(models.Event.tags)
-            .filter(func.lower(models.Tag.name).in_([name.lower() for name in tag_names]))
-            .filter(models.Event.start_time >= now)
-            .filter(models.Event.status == "published")
-            .filter((models.Event.publish_at == None) | (models.Event.publish_at <= now))  # noqa: E711
+    # Precomputed by app.recommendations; events may have filled up or started since.
+    order = _RECOMMENDATION_ORDER[strategy]
+    query = _filter_events(
+        db.query(
+            models.Event,
+            order,
+            models.UserRecommendation.tag_score,
+            models.UserRecommendation.cf_score,
+            models.UserRecommendation.reason,
+            models.UserRecommendation.cf_reason,
         )
-        if registered_event_ids:
-            base_query = base_query.filter(~models.Event.id.in_(registered_event_ids))
-        base_query = base_query.distinct().order_by(models.Event.start_time)
-        query, seats_subquery = _events_with_counts_query(db, base_query)
-        reason = f"Similar tags: {', '.join(sorted(set(tag_names))[:3])}"
-        events = [(ev, seats, reason) for ev, seats in query.limit(10).all()]
-
-    if not events:
-        base_query = db.query(models.Event).filter(models.Event.start_time >= now)
-        if registered_event_ids:
-            base_query = base_query.filter(~models.Event.id.in_(registered_event_ids))
-        base_query = base_query.filter(models.Event.status == "published").filter(
-            (models.Event.publish_at == None) | (models.Event.publish_at <= now)  # noqa: E711
+        .join(models.UserRecommendation, models.UserRecommendation.event_id == models.Event.id)
+        .filter(models.UserRecommendation.user_id == user_id, order > 0, *visible),
+        *filters,
+    )
+    # Students without matching precomputed rows get trending events, then the rest by start, so a
+    # quiet week (or an empty event_trending table) still fills the page.
+    if db.query(query.exists()).scalar():
+        sort_column = order
+    else:
+        sort_column = func.coalesce(models.EventTrending.score, 0.0)
+        query = _filter_events(
+            db.query(models.Event, sort_column)
+            .outerjoin(models.EventTrending, models.EventTrending.event_id == models.Event.id)
+            .filter(*visible),
+            *filters,
         )
-        query, seats_subquery = _events_with_counts_query(db, base_query)
-        events = [
-            (ev, seats, "Popular / upcoming events")
-            for ev, seats in query.order_by(
-                func.coalesce(seats_subquery.c.seats_taken, 0).desc(), models.Event.start_time
-            ).limit(10).all()
-        ]
+    rows, next_cursor = _page_by_score(query, sort_column, page, page_size, cursor)
+    items = []
+    for row in rows:
+        if sort_column is order:
+            event, _score, tag_score, cf_score, reason, cf_reason = row
+            reason = recommendations.pick_reason(strategy, tag_score, cf_score, reason, cf_reason)
+        else:
+            event, reason = row[0], "Trending / upcoming events"
+        items.append(_serialize_event(event, recommendation_reason=reason))
+    return {"items": items, "total": None, "page": page, "page_size": page_size, "next_cursor": next_cursor}
 
-    filtered = []
-    for event, seats, reason in events:
-        if event.max_seats is not None and seats >= event.max_seats:
-            continue
-        filtered.append(_serialize_event(event, seats, recommendation_reason=reason))
-    return filtered[:10]
 
 @app.get("/api/health")
 def health_check(db: Session = Depends(get_db)):
@@ -1036,23 +1590,81 @@ def health_check(db: Session = Depends(get_db)):
         raise HTTPException(status_code=503, detail="Database unavailable")
 
 
+@app.get("/api/health/cache")
+def cache_stats():
+    return {
+        "event_list": event_list_cache.stats(),
+        "principal": auth.principal_cache.stats(),
+        "email_templates": email_templates.registry.render_cache.stats(),
+    }
+
+
+@app.get("/api/health/db")
+def db_pool_stats():
+    return {"pool": pool_status(), "async_pool": async_pool_status()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/api/events/{event_id}/ics")
-def event_ics(event_id: int, db: Session = Depends(get_db)):
+async def event_ics(event_id: int, request: Request):
+    updated_at = await run_read(_event_updated_at, event_id)
+    headers = {}
+    if updated_at is not None:
+        headers = validator_headers(weak_etag("ics", event_id, _normalize_dt(updated_at).isoformat()), updated_at)
+        unchanged = not_modified(request, headers)
+        if unchanged:
+            return unchanged
+    ics = await run_read(_event_calendar, event_id)
+    return Response(content=ics, media_type="text/calendar", headers=headers)
+
+
+def _event_updated_at(db: Session, event_id: int) -> Optional[datetime]:
+    return db.query(models.Event.updated_at).filter(models.Event.id == event_id).scalar()
+
+
+def _event_calendar(db: Session, event_id: int) -> str:
     event = db.query(models.Event).filter(models.Event.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Evenimentul nu există")
-    ics = "\n".join([
+    return "\n".join([
         "BEGIN:VCALENDAR",
         "VERSION:2.0",
         "PRODID:-//EventLink//EN",
         _event_to_ics(event),
         "END:VCALENDAR",
     ])
-    return Response(content=ics, media_type="text/calendar")
 
 
 @app.get("/api/me/calendar")
-def user_calendar(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+def user_calendar(
+    request: Request, db: Session = Depends(get_db), current_user: auth.Principal = Depends(auth.get_current_user)
+):
+    # Calendar clients poll this; answer from an aggregate over the user's registrations when nothing changed.
+    # The count catches unregistrations (and deleted events), the maxima catch edits and new registrations.
+    count, registrations_updated, events_updated = (
+        db.query(
+            func.count(models.Registration.id),
+            func.max(models.Registration.updated_at),
+            func.max(models.Event.updated_at),
+        )
+        .join(models.Event, models.Event.id == models.Registration.event_id)
+        .filter(models.Registration.user_id == current_user.id)
+        .one()
+    )
+    stamps = [_normalize_dt(value) for value in (registrations_updated, events_updated) if value]
+    headers = validator_headers(
+        weak_etag("calendar", current_user.id, count, *(stamp.isoformat() for stamp in stamps)),
+        max(stamps) if stamps else None,
+        private=True,
+    )
+    unchanged = not_modified(request, headers)
+    if unchanged:
+        return unchanged
     regs = (
         db.query(models.Event)
         .join(models.Registration, models.Registration.event_id == models.Event.id)
@@ -1067,7 +1679,7 @@ def user_calendar(db: Session = Depends(get_db), current_user: models.User = Dep
         *vevents,
         "END:VCALENDAR",
     ])
-    return Response(content=ics, media_type="text/calendar")
+    return Response(content=ics, media_type="text/calendar", headers=headers)
 
 
 @app.post("/password/forgot")
@@ -1075,9 +1687,12 @@ def password_forgot(
     payload: schemas.PasswordResetRequest,
     background_tasks: BackgroundTasks,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    _enforce_rate_limit("password_forgot", request=request, identifier=payload.email.lower(), limit=5, window_seconds=300)
+    _enforce_rate_limit(
+        "password_forgot", request=request, identifier=payload.email.lower(), limit=5, window_seconds=300, response=response
+    )
     user = db.query(models.User).filter(func.lower(models.User.email) == payload.email.lower()).first()
     if user:
         db.query(models.PasswordResetToken).filter(
@@ -1087,35 +1702,45 @@ def password_forgot(
         expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
         reset = models.PasswordResetToken(user_id=user.id, token=token, expires_at=expires_at, used=False)
         db.add(reset)
-        db.commit()
         frontend_hint = settings.allowed_origins[0] if settings.allowed_origins else ""
         link = f"{frontend_hint}/reset-password?token={token}" if frontend_hint else token
-        lang = (request.headers.get("accept-language") if request else None) or "ro"
+        lang = negotiate_language(request.headers.get("accept-language") if request else None)
         subject, body, body_html = render_password_reset_email(user, link, lang=lang)
-        send_email(background_tasks, user.email, subject, body, body_html, context={"user_id": user.id, "lang": lang})
+        queue_email(db, background_tasks, user.email, subject, body, body_html, context={"user_id": user.id, "lang": lang})
+        db.commit()
     return {"status": "ok"}
 
 
 @app.post("/password/reset")
-def password_reset(payload: schemas.PasswordResetConfirm, request: Request, db: Session = Depends(get_db)):
-    _enforce_rate_limit("password_reset", request=request, limit=10, window_seconds=300)
-    token_row = (
-        db.query(models.PasswordResetToken)
-        .filter(models.PasswordResetToken.token == payload.token, models.PasswordResetToken.used == False)
-        .first()
+async def password_reset(
+    payload: schemas.PasswordResetConfirm, request: Request, response: Response, db: Session = Depends(get_db)
+):
+    await run_in_threadpool(
+        _enforce_rate_limit, "password_reset", request=request, limit=10, window_seconds=300, response=response
     )
+
+    def _load_reset_target():
+        token_row = (
+            db.query(models.PasswordResetToken)
+            .filter(models.PasswordResetToken.token == payload.token, models.PasswordResetToken.used == False)
+            .first()
+        )
+        user = db.query(models.User).filter(models.User.id == token_row.user_id).first() if token_row else None
+        return token_row, user
+
+    token_row, user = await run_in_threadpool(_load_reset_target)
     expires_at = _normalize_dt(token_row.expires_at) if token_row else None
     if not token_row or (expires_at and expires_at < datetime.now(timezone.utc)):
         raise HTTPException(status_code=400, detail="Token invalid sau expirat.")
-
-    user = db.query(models.User).filter(models.User.id == token_row.user_id).first()
     if not user:
         raise HTTPException(status_code=400, detail="Utilizator inexistent.")
 
-    user.password_hash = auth.get_password_hash(payload.new_password)
+    user.password_hash = await auth.get_password_hash_async(payload.new_password)
+    # Revokes every token issued before the reset.
+    previous_version = user.token_version or 0
+    user.token_version = previous_version + 1
     token_row.used = True
-    db.add(user)
-    db.add(token_row)
-    db.commit()
+    await run_in_threadpool(_save, db, user, token_row)
+    auth.invalidate_principal(user.id, previous_version)
     log_event("password_reset", user_id=user.id)
     return {"status": "password_reset"}
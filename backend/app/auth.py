@@ -1,3 +1,6 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
@@ -7,11 +10,18 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from . import schemas, models, database
+from .cache import MISSING, create_backend
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
+# bcrypt releases the GIL, so a small dedicated thread pool hashes in parallel without
+# borrowing threads from Starlette's shared pool that every sync endpoint depends on.
+_password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+)
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -21,6 +31,16 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_hash_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_hash_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     to_encode["type"] = "access"
@@ -37,7 +57,74 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+def token_claims(user: models.User) -> dict:
+    return {"sub": str(user.id), "email": user.email, "role": user.role.value, "ver": user.token_version or 0}
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Detached snapshot of the authenticated ``models.User``.
+
+    Handlers only read from it; the ones that modify the user load the ORM row themselves and
+    call ``invalidate_principal`` after committing.
+    """
+
+    id: int
+    email: str
+    role: models.UserRole
+    full_name: Optional[str] = None
+    org_name: Optional[str] = None
+    org_description: Optional[str] = None
+    org_logo_url: Optional[str] = None
+    org_website: Optional[str] = None
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            full_name=user.full_name,
+            org_name=user.org_name,
+            org_description=user.org_description,
+            org_logo_url=user.org_logo_url,
+            org_website=user.org_website,
+            token_version=user.token_version or 0,
+        )
+
+
+# Principals keyed by "<user id>:<token version>", so the cached hot path needs no DB round-trip.
+principal_cache = create_backend("principal", settings.principal_cache_max_entries)
+
+
+def _principal_key(user_id: int, token_version: int) -> str:
+    return f"{user_id}:{token_version}"
+
+
+def invalidate_principal(user_id: int, token_version: int) -> None:
+    """Drop a cached principal; call after committing a change to the user row."""
+    principal_cache.delete(_principal_key(user_id, token_version or 0))
+
+
+def _load_principal(db: Session, user_id: int, token_version: int) -> Optional[Principal]:
+    key = _principal_key(user_id, token_version)
+    if settings.principal_cache_ttl_seconds > 0:
+        cached = principal_cache.get(key)
+        if cached is not MISSING:
+            return Principal(**{**cached, "role": models.UserRole(cached["role"])})
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None or (user.token_version or 0) != token_version:
+        return None
+    principal = Principal.from_user(user)
+    if settings.principal_cache_ttl_seconds > 0:
+        principal_cache.set(
+            key, {**asdict(principal), "role": principal.role.value}, ttl=settings.principal_cache_ttl_seconds
+        )
+    return principal
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -53,18 +140,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         if user_id is None or role is None:
             raise credentials_exception
         token_data = schemas.TokenData(email=email, user_id=int(user_id), role=role)
+        token_version = int(payload.get("ver", 0))
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expirat. Autentificați-vă din nou.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except JWTError:
+    except (JWTError, ValueError):
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.id == token_data.user_id).first()
-    if user is None:
+    # The session is lazy, so a cache hit never checks out a connection.
+    principal = _load_principal(db, token_data.user_id, token_version)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
 
 
 def get_optional_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
@@ -76,13 +165,13 @@ def get_optional_user(token: str = Depends(oauth2_scheme), db: Session = Depends
         return None
 
 
-def require_student(user: models.User = Depends(get_current_user)):
+def require_student(user: Principal = Depends(get_current_user)):
     if user.role != models.UserRole.student:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acces doar pentru studenți.")
     return user
 
 
-def require_organizer(user: models.User = Depends(get_current_user)):
+def require_organizer(user: Principal = Depends(get_current_user)):
     if user.role != models.UserRole.organizator:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acces doar pentru organizatori.")
     return user
@@ -0,0 +1,294 @@
+"""Shared cache backends.
+
+``MemoryCacheBackend`` keeps state in the current process (single worker, tests). ``RedisCacheBackend``
+talks to any Redis-protocol server so that every uvicorn worker sees the same cache entries and
+counters. Consumers (the event list response cache, the rate limiter) obtain a backend through
+``create_backend`` and namespace their keys, so one Redis instance can serve all of them.
+"""
+
+import json
+import math
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from hashlib import sha1
+from typing import Any, Hashable, Optional
+
+from .config import settings
+
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    """Minimal key/value interface shared by the memory and Redis implementations."""
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Return the stored value or ``MISSING``."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add ``amount``; ``ttl`` applies only when the key is created."""
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    def sweep(self) -> int:
+        """Drop expired entries; returns how many were removed."""
+        return 0
+
+    @abstractmethod
+    def stats(self) -> dict[str, Any]: ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Thread-safe LRU map whose entries can also expire.
+
+    ``max_entries`` is a hard cap (least recently used keys go first) and expired keys are swept
+    every ``sweep_interval`` seconds on write, so idle keys never accumulate.
+    """
+
+    def __init__(self, max_entries: int, sweep_interval: float = 60):
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[str, tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def _live_entry(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def _sweep_locked(self, now: float) -> int:
+        expired_keys = [key for key, (expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]
+        for key in expired_keys:
+            del self._entries[key]
+        self.expired += len(expired_keys)
+        self._next_sweep = now + self.sweep_interval
+        return len(expired_keys)
+
+    def _store(self, key: str, expires_at: Optional[float], value: Any) -> None:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep_locked(now)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, time.monotonic() + ttl if ttl else None, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is None:
+                expires_at, value = (now + ttl if ttl else None), 0
+            else:
+                expires_at, value = entry
+            value += amount
+            self._store(key, expires_at, value)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_locked(time.monotonic())
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-protocol backend; values are stored as JSON under ``prefix`` and keys expire natively."""
+
+    def __init__(self, client, prefix: str):
+        self.client = client
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self._key(key))
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return MISSING
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.client.set(self._key(key), json.dumps(value), px=math.ceil(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._key(key))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        full_key = self._key(key)
+        pipe = self.client.pipeline()
+        pipe.incrby(full_key, amount)
+        if ttl:
+            # NX keeps the expiry set by whichever worker created the key.
+            pipe.pexpire(full_key, math.ceil(ttl * 1000), nx=True)
+        return int(pipe.execute()[0])
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "prefix": self.prefix,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_redis_client = None
+
+
+def _get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        if not settings.redis_url:
+            raise RuntimeError("CACHE_BACKEND=redis requires REDIS_URL")
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - depends on optional dependency
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        _redis_client = redis.Redis.from_url(settings.redis_url)
+    return _redis_client
+
+
+def create_backend(namespace: str, max_entries: int) -> CacheBackend:
+    """Backend for one consumer; ``max_entries`` bounds the in-memory implementation only."""
+    if settings.cache_backend == "redis":
+        return RedisCacheBackend(_get_redis_client(), prefix=f"eventlink:{namespace}")
+    return MemoryCacheBackend(max_entries)
+
+
+class ResponseCache:
+    """Response cache with generation-based invalidation.
+
+    Entries are stored under the current generation token; ``invalidate`` swaps the token, which
+    makes every older entry unreachable on all workers at once without scanning keys. Stale
+    entries simply age out through their TTL (or LRU eviction in memory).
+    """
+
+    _GENERATION_KEY = "generation"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _generation(self) -> str:
+        generation = self.backend.get(self._GENERATION_KEY)
+        if generation is MISSING:
+            # Fresh (or evicted) token: never reuse one, so old entries cannot resurface.
+            generation = uuid.uuid4().hex
+            self.backend.set(self._GENERATION_KEY, generation)
+        return generation
+
+    def _key(self, params: Hashable) -> str:
+        digest = sha1(repr(params).encode()).hexdigest()
+        return f"{self._generation()}:{digest}"
+
+    def get(self, params: Hashable) -> Any:
+        value = self.backend.get(self._key(params))
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, params: Hashable, value: Any) -> None:
+        if self.enabled:
+            self.backend.set(self._key(params), value, ttl=self.ttl_seconds)
+
+    def invalidate(self) -> None:
+        self.backend.set(self._GENERATION_KEY, uuid.uuid4().hex)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        # Backend hit counters also include generation lookups, so report our own.
+        with self._lock:
+            lookups = self.hits + self.misses
+            hits, misses = self.hits, self.misses
+        return {
+            **self.backend.stats(),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Anonymous GET /api/events responses, keyed on the normalized query parameters.
+event_list_cache = ResponseCache(
+    create_backend("event_list", settings.event_list_cache_max_entries), settings.event_list_cache_ttl_seconds
+)
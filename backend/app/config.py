@@ -14,9 +14,22 @@ DEFAULT_ALLOWED_ORIGINS = [
 
 class Settings(BaseSettings):
     database_url: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int | None = None
+    slow_query_ms: float = 200
+    async_db_enabled: bool = True
+    async_database_url: str | None = None
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    principal_cache_ttl_seconds: float = 30
+    principal_cache_max_entries: int = 10_000
     refresh_token_expire_minutes: int = 60 * 24 * 30
     allowed_origins: list[str] = DEFAULT_ALLOWED_ORIGINS
     auto_create_tables: bool = False
@@ -29,7 +42,32 @@ class Settings(BaseSettings):
     smtp_password: str | None = None
     smtp_sender: str | None = None
     smtp_use_tls: bool = True
-    
+    email_delivery_mode: str = "outbox"
+    email_outbox_batch_size: int = 50
+    email_outbox_poll_seconds: float = 5
+    email_outbox_max_attempts: int = 6
+    email_outbox_backoff_seconds: float = 30
+    email_outbox_backoff_max_seconds: float = 3600
+    email_async_workers: int = 4
+    email_async_queue_size: int = 1000
+    email_async_overflow: str = "defer"
+    email_async_drain_seconds: float = 10
+    email_template_cache_max_entries: int = 1000
+    notification_chunk_size: int = 500
+    recommendations_top_n: int = 50
+    recommendations_refresh_seconds: float = 60
+    recommendations_chunk_size: int = 500
+    recommendations_cf_weight: float = 0.8
+    recommendations_neighbours: int = 20
+    trending_half_life_hours: float = 48
+    trending_window_days: int = 14
+    trending_refresh_seconds: float = 300
+    cache_backend: str = "memory"
+    redis_url: str | None = None
+    rate_limit_max_keys: int = 100_000
+    event_list_cache_ttl_seconds: float = 30
+    event_list_cache_max_entries: int = 512
+
     model_config = SettingsConfigDict(env_file=".topsecret", extra="ignore")
 
     @field_validator("allowed_origins", mode="before")
@@ -1,11 +1,217 @@
-from sqlalchemy import create_engine
+import re
+import threading
+import time
+from hashlib import sha1
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from starlette.concurrency import run_in_threadpool
 
 from .config import settings
+from .logging_utils import log_warning, record_db_query
+
+
+class PoolMetrics:
+    """Counters fed by pool events; ``snapshot`` adds the pool's live occupancy."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self.waits += 1
+            self.timeouts += int(timed_out)
+            self.wait_seconds_total += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                pool_size=pool.size(),
+                max_overflow=pool.max_overflow,
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers block when every connection is checked out."""
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+
+    def connect(self):
+        if self.max_overflow < 0 or self.checkedout() < self.size() + self.max_overflow:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started, timed_out=False)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Same instrumentation for the asyncio engine's pool."""
+
+
+def _engine_options(database_url: str, poolclass=InstrumentedQueuePool) -> dict:
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite needs its single-connection default pool.
+        return {}
+    options = {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if settings.db_statement_timeout_ms and url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return options
+
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|\$\d+|(?<!:):\w+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def statement_fingerprint(statement: str) -> tuple[str, str]:
+    """``(fingerprint, normalized)``: literals and bind parameters become ``?`` and IN lists collapse,
+    so every execution of the same query shape shares one fingerprint."""
+    normalized = " ".join(statement.split())
+    normalized = _IN_LIST_RE.sub("(?)", _LITERAL_RE.sub("?", normalized))
+    return sha1(normalized.encode()).hexdigest()[:16], normalized
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    record_db_query(elapsed)
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        fingerprint, normalized = statement_fingerprint(statement)
+        log_warning(
+            "slow_query", duration_ms=round(elapsed * 1000, 2), fingerprint=fingerprint, statement=normalized[:1000]
+        )
+
+
+def _on_error(exception_context):
+    # after_cursor_execute does not fire for failed statements; drop their start time.
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def _instrument(target_engine, metrics: PoolMetrics) -> None:
+    event.listen(target_engine, "connect", lambda *args: metrics.incr("connects"))
+    event.listen(target_engine, "checkout", lambda *args: metrics.incr("checkouts"))
+    event.listen(target_engine, "checkin", lambda *args: metrics.incr("checkins"))
+    event.listen(target_engine, "invalidate", lambda *args: metrics.incr("invalidations"))
+    event.listen(target_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target_engine, "handle_error", _on_error)
 
-engine = create_engine(settings.database_url)
+
+pool_metrics = PoolMetrics()
+InstrumentedQueuePool.metrics = pool_metrics
+engine = create_engine(settings.database_url, **_engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_instrument(engine, pool_metrics)
+
+
+def pool_status() -> dict:
+    return pool_metrics.snapshot(engine.pool)
+
+
+def _async_database_url() -> URL:
+    if settings.async_database_url:
+        return make_url(settings.async_database_url)
+    url = make_url(settings.database_url)
+    drivers = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+    backend = url.get_backend_name()
+    if backend not in drivers:
+        raise RuntimeError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{drivers[backend]}")
+
+
+def _async_engine_options(url: URL) -> dict:
+    if url.get_backend_name() == "sqlite":
+        # aiosqlite connections are bound to the loop that opened them; SQLite connects cheaply.
+        return {"poolclass": NullPool}
+    options = _engine_options(url.render_as_string(hide_password=False), poolclass=InstrumentedAsyncQueuePool)
+    if settings.db_statement_timeout_ms:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}}
+    return options
+
+
+async_pool_metrics = PoolMetrics()
+InstrumentedAsyncQueuePool.metrics = async_pool_metrics
+_async_engine = None
+_async_session_factory = None
+_async_lock = threading.Lock()
+
+
+def get_async_engine():
+    """The asyncio engine (asyncpg / aiosqlite), created on first use so sync-only tools never need the drivers."""
+    global _async_engine, _async_session_factory
+    with _async_lock:
+        if _async_engine is None:
+            url = _async_database_url()
+            _async_engine = create_async_engine(url, **_async_engine_options(url))
+            _instrument(_async_engine.sync_engine, async_pool_metrics)
+            _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_session_factory()
+
+
+def async_pool_status() -> dict | None:
+    if _async_engine is None:
+        return None
+    return async_pool_metrics.snapshot(_async_engine.sync_engine.pool)
+
 
 Base = declarative_base()
 
@@ -14,4 +220,30 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _call_with_session(fn, args, kwargs):
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def run_read(fn, *args, **kwargs):
+    """Run ``fn(session, *args, **kwargs)`` for a read-heavy endpoint without holding a worker thread.
+
+    With ``ASYNC_DB_ENABLED`` the (sync ORM) function runs through ``AsyncSession.run_sync`` on the
+    async driver, so waiting on the database only suspends the coroutine. Otherwise it runs on
+    Starlette's threadpool with a regular session, which is how the sync handlers behave.
+    """
+    if settings.async_db_enabled:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(_call_with_session, fn, args, kwargs)
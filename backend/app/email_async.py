@@ -0,0 +1,234 @@
+"""In-process async email delivery (``EMAIL_DELIVERY_MODE=async``).
+
+Messages go onto a bounded asyncio queue served by ``EMAIL_ASYNC_WORKERS`` coroutines, each holding
+one persistent aiosmtplib connection, so sending never occupies a threadpool thread and retries
+wait with ``asyncio.sleep``. Messages the sender cannot take or deliver (queue full, retries
+exhausted, still queued when the drain window on shutdown runs out) follow ``EMAIL_ASYNC_OVERFLOW``:
+``defer`` writes them to ``email_outbox`` for ``python -m app.email_worker``, ``drop`` logs and
+discards them.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import aiosmtplib
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import SessionLocal
+from .email_service import build_message, enqueue_email
+from .logging_utils import log_event, log_warning
+from .metrics import EMAIL_QUEUE_DEPTH, EMAILS
+
+SEND_ERRORS = (OSError, asyncio.TimeoutError, aiosmtplib.SMTPException)
+
+
+@dataclass
+class EmailJob:
+    to_email: str
+    subject: str
+    body_text: str
+    body_html: Optional[str] = None
+    context: Dict[str, Any] = field(default_factory=dict)
+
+
+class AsyncSmtpConnection:
+    """One aiosmtplib client kept open across messages; opened lazily, reopened once if dropped."""
+
+    def __init__(self):
+        self._client: Optional[aiosmtplib.SMTP] = None
+        self.connections_opened = 0
+
+    async def _ensure_connected(self) -> aiosmtplib.SMTP:
+        if self._client is None or not self._client.is_connected:
+            client = aiosmtplib.SMTP(
+                hostname=settings.smtp_host,
+                port=settings.smtp_port or 25,
+                start_tls=settings.smtp_use_tls,
+                timeout=10,
+            )
+            await client.connect()
+            try:
+                if settings.smtp_username:
+                    await client.login(settings.smtp_username, settings.smtp_password or "")
+            except Exception:
+                client.close()
+                raise
+            self._client = client
+            self.connections_opened += 1
+        return self._client
+
+    async def send(self, message) -> None:
+        try:
+            await (await self._ensure_connected()).send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            self._client = None
+            await (await self._ensure_connected()).send_message(message)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.quit()
+            except SEND_ERRORS:
+                self._client.close()
+            self._client = None
+
+
+def _defer_to_outbox(jobs: List[EmailJob]) -> None:
+    db = SessionLocal()
+    try:
+        for job in jobs:
+            enqueue_email(db, job.to_email, job.subject, job.body_text, job.body_html, job.context)
+        db.commit()
+    finally:
+        db.close()
+
+
+class AsyncEmailSender:
+    """Bounded queue plus a fixed set of consumer coroutines, bound to the loop that started it."""
+
+    def __init__(self, attempts: int = 3, retry_delay: float = 0.5):
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        self.connections: List[AsyncSmtpConnection] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._in_flight: Dict[int, EmailJob] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Spawn the consumers on the running loop; a no-op if they already run there."""
+        loop = asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+        self._loop = loop
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=settings.email_async_queue_size)
+        self._in_flight = {}
+        self.connections = [AsyncSmtpConnection() for _ in range(settings.email_async_workers)]
+        self._tasks = [loop.create_task(self._consume(idx, conn)) for idx, conn in enumerate(self.connections)]
+
+    async def enqueue(self, job: EmailJob) -> bool:
+        """Queue ``job`` without waiting; returns False if it was deferred or dropped instead."""
+        if not settings.email_enabled:
+            EMAILS.labels(outcome="skipped").inc()
+            log_warning("email_disabled", to=job.to_email, subject=job.subject, **job.context)
+            return False
+        if not settings.smtp_host or not settings.smtp_sender:
+            EMAILS.labels(outcome="skipped").inc()
+            log_warning("email_smtp_not_configured", to=job.to_email, subject=job.subject, **job.context)
+            return False
+        if self._stopping:
+            await self._overflow([job], "shutting_down")
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            await self._overflow([job], "queue_full")
+            return False
+        EMAIL_QUEUE_DEPTH.inc()
+        return True
+
+    def submit(self, job: EmailJob) -> bool:
+        """``enqueue`` from a thread outside the sender's loop (threadpool tasks, notification jobs).
+
+        Waits until the job is queued, deferred or dropped; returns False without taking it if the
+        sender is not running (e.g. in a CLI process), so the caller must deliver it another way.
+        """
+        loop = self._loop
+        if not self.running or loop is None or not loop.is_running():
+            return False
+        asyncio.run_coroutine_threadsafe(self.enqueue(job), loop).result()
+        return True
+
+    async def _consume(self, idx: int, conn: AsyncSmtpConnection) -> None:
+        while True:
+            job = await self._queue.get()
+            self._in_flight[idx] = job
+            try:
+                await self._deliver(conn, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - one bad message must not kill the consumer
+                log_warning("email_async_consumer_error", to=job.to_email, subject=job.subject, error=str(exc))
+            finally:
+                self._in_flight.pop(idx, None)
+                self._queue.task_done()
+                EMAIL_QUEUE_DEPTH.dec()
+
+    async def _deliver(self, conn: AsyncSmtpConnection, job: EmailJob) -> None:
+        message = build_message(job.to_email, job.subject, job.body_text, job.body_html)
+        for attempt in range(1, self.attempts + 1):
+            try:
+                await conn.send(message)
+            except SEND_ERRORS as exc:
+                await conn.close()
+                log_warning(
+                    "email_send_failed_attempt",
+                    to=job.to_email,
+                    subject=job.subject,
+                    attempt=attempt,
+                    error=str(exc) or type(exc).__name__,
+                    **job.context,
+                )
+                if attempt < self.attempts:
+                    await asyncio.sleep(self.retry_delay * attempt)
+            else:
+                EMAILS.labels(outcome="sent").inc()
+                log_event("email_sent", to=job.to_email, subject=job.subject, attempt=attempt, **job.context)
+                return
+        await self._overflow([job], "send_failed")
+
+    async def _overflow(self, jobs: List[EmailJob], reason: str) -> None:
+        if settings.email_async_overflow == "defer":
+            try:
+                await run_in_threadpool(_defer_to_outbox, jobs)
+            except Exception as exc:  # noqa: BLE001
+                log_warning("email_defer_failed", reason=reason, count=len(jobs), error=str(exc))
+            else:
+                EMAILS.labels(outcome="deferred").inc(len(jobs))
+                for job in jobs:
+                    log_warning("email_deferred", reason=reason, to=job.to_email, subject=job.subject, **job.context)
+                return
+        EMAILS.labels(outcome="dropped").inc(len(jobs))
+        for job in jobs:
+            log_warning("email_dropped", reason=reason, to=job.to_email, subject=job.subject, **job.context)
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting, give queued messages ``timeout`` seconds to go out, then hand off the rest."""
+        if not self.running:
+            return
+        self._stopping = True
+        timeout = settings.email_async_drain_seconds if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        # Messages interrupted mid-send may already have reached the server (at-least-once).
+        leftover = list(self._in_flight.values())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+            EMAIL_QUEUE_DEPTH.dec()
+        for conn in self.connections:
+            await conn.close()
+        self._tasks = []
+        if leftover:
+            await self._overflow(leftover, "shutdown")
+        log_event("email_async_stopped", undelivered=len(leftover))
+        self._stopping = False
+
+
+email_sender = AsyncEmailSender()
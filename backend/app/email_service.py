@@ -5,14 +5,42 @@ from email.message import EmailMessage
 from typing import Any, Dict, Optional
 
 from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
 
+from . import models
 from .config import settings
 from .logging_utils import log_event, log_warning
+from .metrics import EMAIL_QUEUE_DEPTH, EMAILS
 
 emails_sent_ok = 0
 emails_send_failed = 0
 
 
+def build_message(to_email: str, subject: str, body_text: str, body_html: Optional[str] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.smtp_sender
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(body_text)
+    if body_html:
+        message.add_alternative(body_html, subtype="html")
+    return message
+
+
+def open_smtp_connection() -> smtplib.SMTP:
+    """Connected, STARTTLS-upgraded and authenticated SMTP session."""
+    server = smtplib.SMTP(settings.smtp_host, settings.smtp_port or 25, timeout=10)
+    try:
+        if settings.smtp_use_tls:
+            server.starttls()
+        if settings.smtp_username:
+            server.login(settings.smtp_username, settings.smtp_password or "")
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
 def _send_email(
     to_email: str,
     subject: str,
@@ -22,30 +50,23 @@ def _send_email(
 ) -> None:
     context = context or {}
     if not settings.email_enabled:
+        EMAILS.labels(outcome="skipped").inc()
         log_warning("email_disabled", to=to_email, subject=subject, **context)
         return
     if not settings.smtp_host or not settings.smtp_sender:
+        EMAILS.labels(outcome="skipped").inc()
         log_warning("email_smtp_not_configured", to=to_email, subject=subject, **context)
         return
 
-    message = EmailMessage()
-    message["From"] = settings.smtp_sender
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.set_content(body_text)
-    if body_html:
-        message.add_alternative(body_html, subtype="html")
+    message = build_message(to_email, subject, body_text, body_html)
 
     global emails_sent_ok, emails_send_failed
     for attempt in range(1, 4):
         try:
-            with smtplib.SMTP(settings.smtp_host, settings.smtp_port or 25, timeout=10) as server:
-                if settings.smtp_use_tls:
-                    server.starttls()
-                if settings.smtp_username:
-                    server.login(settings.smtp_username, settings.smtp_password or "")
+            with open_smtp_connection() as server:
                 server.send_message(message)
             emails_sent_ok += 1
+            EMAILS.labels(outcome="sent").inc()
             log_event("email_sent", to=to_email, subject=subject, attempt=attempt, **context)
             return
         except Exception as exc:  # noqa: BLE001
@@ -62,6 +83,7 @@ def _send_email(
             if attempt < 3:
                 time.sleep(0.5 * attempt)
     emails_send_failed += 1
+    EMAILS.labels(outcome="failed").inc()
     logging.exception(
         "Failed to send email after retries",
         extra={
@@ -83,4 +105,59 @@ def send_registration_email(
     context: Dict[str, Any] | None = None,
 ) -> None:
     # Run email sending outside the request/response flow
-    background_tasks.add_task(_send_email, to_email, subject, body_text, body_html, context or {})
+    EMAIL_QUEUE_DEPTH.inc()
+    background_tasks.add_task(_send_queued_email, to_email, subject, body_text, body_html, context or {})
+
+
+def _send_queued_email(*args) -> None:
+    try:
+        _send_email(*args)
+    finally:
+        EMAIL_QUEUE_DEPTH.dec()
+
+
+def enqueue_email(
+    db: Session,
+    to_email: str,
+    subject: str,
+    body_text: str,
+    body_html: Optional[str] = None,
+    context: Dict[str, Any] | None = None,
+) -> Optional[models.EmailOutbox]:
+    """Add a message to the outbox; it is only delivered once the caller commits."""
+    if not settings.email_enabled:
+        EMAILS.labels(outcome="skipped").inc()
+        log_warning("email_disabled", to=to_email, subject=subject, **(context or {}))
+        return None
+    row = models.EmailOutbox(
+        to_email=to_email, subject=subject, body_text=body_text, body_html=body_html, context=context or {}
+    )
+    db.add(row)
+    return row
+
+
+def queue_email(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    to_email: str,
+    subject: str,
+    body_text: str,
+    body_html: Optional[str] = None,
+    context: Dict[str, Any] | None = None,
+) -> None:
+    """Hand a message to the configured delivery path (``EMAIL_DELIVERY_MODE``).
+
+    ``outbox`` (default) adds a row to the caller's transaction, so commit afterwards;
+    ``background`` sends from a FastAPI background task after the response;
+    ``async`` hands the message to the in-process aiosmtplib sender after the response.
+    """
+    if settings.email_delivery_mode == "background":
+        send_registration_email(background_tasks, to_email, subject, body_text, body_html, context)
+    elif settings.email_delivery_mode == "async":
+        from .email_async import EmailJob, email_sender
+
+        background_tasks.add_task(
+            email_sender.enqueue, EmailJob(to_email, subject, body_text, body_html, context or {})
+        )
+    else:
+        enqueue_email(db, to_email, subject, body_text, body_html, context)
@@ -1,8 +1,31 @@
+"""Email templates.
+
+Every language is a directory under ``templates/email`` holding ``<name>.subject.txt``,
+``<name>.txt`` and ``<name>.html``, so adding a language needs no code. Templates are compiled once
+(``registry.load()`` runs at startup, or on first use) and ``.html`` files are autoescaped.
+
+Event emails are rendered once per ``(template, lang, event_id)`` with the recipient left as a
+placeholder, and the rendered parts are kept in a small LRU; bulk sends for one event then only
+substitute the recipient's name.
+"""
+
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from markupsafe import Markup, escape
+
+from .cache import MISSING, MemoryCacheBackend
+from .config import settings
 from .models import Event, User
 
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates" / "email"
+DEFAULT_LANG = "ro"
+_PARTS = (".subject.txt", ".txt", ".html")
+_RECIPIENT = "\x00recipient\x00"
+
 
 def _format_dt(dt: Optional[datetime]) -> str:
     if not dt:
@@ -11,74 +34,117 @@ def _format_dt(dt: Optional[datetime]) -> str:
     return dt.strftime("%Y-%m-%d %H:%M")
 
 
-def render_registration_email(event: Event, user: User, lang: str = "ro") -> tuple[str, str, str]:
-    lang = (lang or "ro").split(",")[0][:2].lower()
-    start_text = _format_dt(event.start_time)
-    common = {
+@lru_cache(maxsize=256)
+def parse_accept_language(header: Optional[str]) -> tuple[str, ...]:
+    """Primary language subtags from an ``Accept-Language`` header, best first; ``q=0`` entries are dropped."""
+    ranked = []
+    for position, part in enumerate((header or "").split(",")):
+        tag, _, params = part.partition(";")
+        tag = tag.strip().lower()
+        if not tag:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranked.append((-quality, position, tag.split("-")[0]))
+    languages: list[str] = []
+    for _, _, lang in sorted(ranked):
+        if lang not in languages:
+            languages.append(lang)
+    return tuple(languages)
+
+
+class TemplateRegistry:
+    """Compiled templates keyed by ``(name, lang)`` plus the per-event render cache."""
+
+    def __init__(self, root: Path = TEMPLATE_DIR, default_lang: str = DEFAULT_LANG):
+        self.root = root
+        self.default_lang = default_lang
+        self.env = Environment(
+            loader=FileSystemLoader(str(root)),
+            autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+            undefined=StrictUndefined,
+        )
+        self.render_cache = MemoryCacheBackend(settings.email_template_cache_max_entries)
+        self._templates: dict = {}
+        self.languages: frozenset[str] = frozenset()
+
+    def load(self) -> None:
+        compiled = {}
+        for lang_dir in sorted(path for path in self.root.iterdir() if path.is_dir()):
+            for subject in lang_dir.glob("*.subject.txt"):
+                name = subject.name[: -len(".subject.txt")]
+                compiled[(name, lang_dir.name)] = tuple(
+                    self.env.get_template(f"{lang_dir.name}/{name}{suffix}") for suffix in _PARTS
+                )
+        self._templates = compiled
+        self.languages = frozenset(lang for _, lang in compiled)
+        self.render_cache.clear()
+
+    def negotiate(self, accept_language: Optional[str]) -> str:
+        """Best available language for a header (or a bare code such as ``"en"``)."""
+        if not self._templates:
+            self.load()
+        for lang in parse_accept_language(accept_language):
+            if lang in self.languages:
+                return lang
+            if lang == "*":
+                break
+        return self.default_lang
+
+    def render(self, template: str, lang: str, **context) -> tuple[str, str, str]:
+        if not self._templates:
+            self.load()
+        templates = self._templates.get((template, lang)) or self._templates[(template, self.default_lang)]
+        subject, text, html = (compiled.render(**context) for compiled in templates)
+        # Collapse line breaks too: a header value may not contain CR/LF (older titles may carry them).
+        return " ".join(subject.split()), text, html
+
+    def render_for_event(self, template: str, lang: str, event: Event, recipient: str) -> tuple[str, str, str]:
+        return self.render_personalized(template, lang, event.id, event_context(event), recipient)
+
+    def render_personalized(
+        self, template: str, lang: str, event_id: int, context: dict, recipient: str
+    ) -> tuple[str, str, str]:
+        key = f"{template}:{lang}:{event_id}"
+        cached = self.render_cache.get(key)
+        # The stored context guards against serving an entry rendered before the event was edited.
+        if cached is MISSING or cached[0] != context:
+            cached = (context, self.render(template, lang, name=Markup(_RECIPIENT), **context))
+            self.render_cache.set(key, cached)
+        subject, text, html = cached[1]
+        return (
+            subject.replace(_RECIPIENT, recipient),
+            text.replace(_RECIPIENT, recipient),
+            html.replace(_RECIPIENT, str(escape(recipient))),
+        )
+
+
+def event_context(event: Event) -> dict:
+    """Event fields available to templates (also snapshotted by notification jobs)."""
+    return {
         "title": event.title,
         "location": event.location or "-",
-        "start": start_text,
-        "name": user.full_name or user.email,
+        "start": _format_dt(event.start_time),
     }
-    if lang == "en":
-        subject = f"Registration confirmed: {common['title']}"
-        body = (
-            f"Hi {common['name']},\n\n"
-            f"You are registered for '{common['title']}'.\n"
-            f"Starts at: {common['start']}\n"
-            f"Location: {common['location']}\n\n"
-            "See you there!"
-        )
-        html = (
-            f"<p>Hi {common['name']},</p>"
-            f"<p>You are registered for <strong>{common['title']}</strong>.</p>"
-            f"<p><strong>Starts:</strong> {common['start']}<br>"
-            f"<strong>Location:</strong> {common['location']}</p>"
-            "<p>See you there!</p>"
-        )
-    else:
-        subject = f"Confirmare înscriere: {common['title']}"
-        body = (
-            f"Salut {common['name']},\n\n"
-            f"Te-ai înscris la evenimentul '{common['title']}'.\n"
-            f"Data și ora de start: {common['start']}.\n"
-            f"Locația: {common['location']}.\n\n"
-            "Ne vedem acolo!"
-        )
-        html = (
-            f"<p>Salut {common['name']},</p>"
-            f"<p>Te-ai înscris la <strong>{common['title']}</strong>.</p>"
-            f"<p><strong>Începe la:</strong> {common['start']}<br>"
-            f"<strong>Locație:</strong> {common['location']}</p>"
-            "<p>Ne vedem acolo!</p>"
-        )
-    return subject, body, html
+
+
+registry = TemplateRegistry()
+
+
+def negotiate_language(accept_language: Optional[str]) -> str:
+    return registry.negotiate(accept_language)
+
+
+def render_registration_email(event: Event, user: User, lang: str = "ro") -> tuple[str, str, str]:
+    return registry.render_for_event("registration", negotiate_language(lang), event, user.full_name or user.email)
 
 
 def render_password_reset_email(user: User, reset_link: str, lang: str = "ro") -> tuple[str, str, str]:
-    lang = (lang or "ro").split(",")[0][:2].lower()
-    if lang == "en":
-        subject = "Reset your EventLink password"
-        body = (
-            f"You requested a password reset for {user.email}.\n\n"
-            f"Use this link (valid for 1 hour): {reset_link}\n\n"
-            "If you did not request this, please ignore this email."
-        )
-        html = (
-            f"<p>You requested a password reset for <strong>{user.email}</strong>.</p>"
-            f"<p><a href=\"{reset_link}\">Reset password</a> (valid for 1 hour)</p>"
-            "<p>If you did not request this, you can ignore this email.</p>"
-        )
-    else:
-        subject = "Resetare parolă EventLink"
-        body = (
-            f"Ai cerut resetarea parolei pentru contul {user.email}.\n\n"
-            f"Folosește link-ul (valabil 1 oră): {reset_link}\n\n"
-            "Dacă nu ai cerut tu această resetare, poți ignora acest email."
-        )
-        html = (
-            f"<p>Ai cerut resetarea parolei pentru <strong>{user.email}</strong>.</p>"
-            f"<p><a href=\"{reset_link}\">Resetează parola</a> (valabil 1 oră)</p>"
-            "<p>Dacă nu ai cerut tu această resetare, poți ignora acest email.</p>"
-        )
-    return subject, body, html
+    return registry.render("password_reset", negotiate_language(lang), email=user.email, reset_link=reset_link)
@@ -0,0 +1,197 @@
+"""Delivers queued rows from ``email_outbox``.
+
+    python -m app.email_worker          # poll until SIGTERM/SIGINT
+    python -m app.email_worker --once   # deliver one batch and exit
+
+Rows are claimed with ``FOR UPDATE SKIP LOCKED`` (Postgres), so several workers can run side by
+side. A batch is committed after its messages are handed to SMTP, which makes delivery
+at-least-once: a crash between sending and committing re-sends that batch.
+"""
+
+import argparse
+import random
+import signal
+import smtplib
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+from .email_service import build_message, open_smtp_connection
+from .logging_utils import configure_logging, log_event, log_warning
+from .metrics import EMAILS
+
+
+class SmtpUnavailable(Exception):
+    """The SMTP server could not be reached or refused the login."""
+
+
+class SmtpSession:
+    """One authenticated SMTP connection reused across messages and batches.
+
+    Opened lazily; if the server drops it between messages it is reopened once.
+    """
+
+    def __init__(self, connect: Callable[[], smtplib.SMTP] = open_smtp_connection):
+        self._connect = connect
+        self._server: Optional[smtplib.SMTP] = None
+        self.connections_opened = 0
+
+    def _ensure_connected(self) -> smtplib.SMTP:
+        if self._server is None:
+            try:
+                self._server = self._connect()
+            except (OSError, smtplib.SMTPException) as exc:
+                raise SmtpUnavailable(str(exc)) from exc
+            self.connections_opened += 1
+        return self._server
+
+    def send(self, message) -> None:
+        try:
+            self._ensure_connected().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._server = None
+            self._ensure_connected().send_message(message)
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (OSError, smtplib.SMTPException):
+                pass
+            self._server = None
+
+
+def backoff_delay(attempts: int) -> float:
+    """Capped exponential backoff with jitter: half the delay is fixed, the other half random."""
+    delay = min(
+        settings.email_outbox_backoff_max_seconds, settings.email_outbox_backoff_seconds * 2 ** max(attempts - 1, 0)
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _record_failure(row: models.EmailOutbox, error: str, now: datetime, final: bool = False) -> str:
+    row.attempts += 1
+    row.last_error = error[:1000]
+    if final or row.attempts >= settings.email_outbox_max_attempts:
+        row.status = "failed"
+        outcome = "failed"
+    else:
+        row.next_attempt_at = now + timedelta(seconds=backoff_delay(row.attempts))
+        outcome = "retry"
+    log_warning(
+        "email_send_failed_attempt",
+        outbox_id=row.id,
+        to=row.to_email,
+        subject=row.subject,
+        attempt=row.attempts,
+        final=outcome == "failed",
+        error=error,
+        **(row.context or {}),
+    )
+    return outcome
+
+
+def _record_sent(row: models.EmailOutbox, now: datetime) -> str:
+    row.attempts += 1
+    row.status = "sent"
+    row.sent_at = now
+    log_event("email_sent", outbox_id=row.id, to=row.to_email, subject=row.subject, attempt=row.attempts, **(row.context or {}))
+    return "sent"
+
+
+def _deliver(smtp: SmtpSession, row: models.EmailOutbox, now: datetime) -> str:
+    """Send one row and record its outcome; only ``SmtpUnavailable`` propagates."""
+    try:
+        message = build_message(row.to_email, row.subject, row.body_text, row.body_html)
+    except Exception as exc:  # noqa: BLE001 - e.g. a line break in a header; retrying cannot help
+        return _record_failure(row, str(exc) or type(exc).__name__, now, final=True)
+    try:
+        smtp.send(message)
+    except SmtpUnavailable:
+        raise
+    except Exception as exc:  # noqa: BLE001 - one bad row must not roll back the rows already sent
+        return _record_failure(row, str(exc) or type(exc).__name__, now)
+    return _record_sent(row, now)
+
+
+def deliver_batch(db: Session, smtp: SmtpSession) -> dict[str, int]:
+    """Send up to ``EMAIL_OUTBOX_BATCH_SIZE`` due messages; returns counts per outcome."""
+    now = datetime.now(timezone.utc)
+    rows = (
+        db.query(models.EmailOutbox)
+        .filter(models.EmailOutbox.status == "pending", models.EmailOutbox.next_attempt_at <= now)
+        .order_by(models.EmailOutbox.id)
+        .limit(settings.email_outbox_batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    results = {"sent": 0, "retry": 0, "failed": 0}
+    unavailable: Optional[str] = None
+    for row in rows:
+        if unavailable is None:
+            try:
+                outcome = _deliver(smtp, row, now)
+            except SmtpUnavailable as exc:
+                # No point dialling the server again for every remaining row.
+                unavailable = str(exc)
+        if unavailable is not None:
+            outcome = _record_failure(row, unavailable, now)
+        results[outcome] += 1
+        EMAILS.labels(outcome=outcome).inc()
+    db.commit()
+    return results
+
+
+def run(stop: Optional[threading.Event] = None, once: bool = False, smtp: Optional[SmtpSession] = None) -> None:
+    stop = stop or threading.Event()
+    smtp = smtp or SmtpSession()
+    try:
+        while not stop.is_set():
+            if not settings.smtp_host or not settings.smtp_sender:
+                log_warning("email_smtp_not_configured")
+                results = {}
+            else:
+                db = SessionLocal()
+                try:
+                    results = deliver_batch(db, smtp)
+                except Exception as exc:  # noqa: BLE001 - keep polling; the rows stay pending
+                    db.rollback()
+                    log_warning("email_outbox_batch_failed", error=str(exc))
+                    results = {}
+                finally:
+                    db.close()
+                if any(results.values()):
+                    log_event("email_outbox_batch", **results)
+            busy = sum(results.values()) >= settings.email_outbox_batch_size
+            if not busy:
+                # Keep the connection only while there is a backlog; idle sessions get dropped by servers.
+                smtp.close()
+            if once:
+                return
+            if not busy:
+                stop.wait(settings.email_outbox_poll_seconds)
+    finally:
+        smtp.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.email_worker", description="Deliver queued emails")
+    parser.add_argument("--once", action="store_true", help="Deliver a single batch and exit")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    run(stop, once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
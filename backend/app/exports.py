@@ -0,0 +1,74 @@
+"""Streaming CSV exports.
+
+Rows come from a server-side cursor (``yield_per``; a named cursor on Postgres) and are written
+out in ~64 KiB chunks, optionally gzip-compressed on the fly, so memory stays flat regardless of
+how many participants an event has. The generator opens its own session because it keeps
+running after the endpoint has returned.
+"""
+
+import csv
+import io
+import zlib
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from . import models
+from .database import SessionLocal
+
+PARTICIPANT_COLUMNS = ("Nume", "Email", "Ora înscrierii", "Prezență", "Cover URL")
+FETCH_ROWS = 1000
+CHUNK_BYTES = 64 * 1024
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell(value: str) -> str:
+    # Spreadsheets evaluate cells starting with these characters as formulas.
+    return f"'{value}" if value.startswith(_FORMULA_PREFIXES) else value
+
+
+def participants_csv(event_id: int, cover_url: Optional[str], compress: bool = False) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(PARTICIPANT_COLUMNS)
+
+    def drain(final: bool = False) -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        if compressor is None:
+            return data
+        return compressor.compress(data) + (compressor.flush() if final else b"")
+
+    statement = (
+        select(
+            models.User.full_name,
+            models.User.email,
+            models.Registration.registration_time,
+            models.Registration.attended,
+        )
+        .join(models.Registration, models.User.id == models.Registration.user_id)
+        .where(models.Registration.event_id == event_id)
+        .order_by(models.Registration.registration_time, models.Registration.user_id)
+        .execution_options(yield_per=FETCH_ROWS)
+    )
+    db = SessionLocal()
+    try:
+        for full_name, email, registration_time, attended in db.execute(statement):
+            writer.writerow(
+                (
+                    _cell(full_name or "-"),
+                    _cell(email),
+                    registration_time.isoformat() if registration_time else "",
+                    "prezent" if attended else "absent",
+                    cover_url or "",
+                )
+            )
+            if buffer.tell() >= CHUNK_BYTES:
+                chunk = drain()
+                if chunk:
+                    yield chunk
+    finally:
+        db.close()
+    yield drain(final=True)
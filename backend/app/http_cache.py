@@ -0,0 +1,59 @@
+"""Conditional GET helpers (weak ETags, Last-Modified, 304 responses).
+
+Endpoints compute their validators from a cheap probe query (``updated_at`` of the rows the body
+is built from) and call ``not_modified`` before running the full query, so an unchanged resource
+costs one small query and no serialization.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import sha1
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def weak_etag(*parts) -> str:
+    digest = sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime], private: bool = False) -> dict[str, str]:
+    # no-cache: clients may store the body but must revalidate, which is what makes 304s useful.
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache" if private else "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    return headers
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request: Request, headers: dict[str, str]) -> Optional[Response]:
+    """A 304 carrying ``headers`` if the request's preconditions match them, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison (RFC 9110 13.1.2); If-Modified-Since is ignored when If-None-Match is present.
+        etag = _opaque(headers["ETag"])
+        if if_none_match.strip() == "*" or any(_opaque(tag) == etag for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return None
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if parsedate_to_datetime(headers["Last-Modified"]) <= since:
+            return Response(status_code=304, headers=headers)
+    return None
@@ -1,11 +1,34 @@
 import contextvars
 import json
 import logging
+import time
 from uuid import uuid4
 from typing import Any, Dict
 
 request_id_ctx: contextvars.ContextVar[str | None] = contextvars.ContextVar('request_id', default=None)
 
+
+class RequestMetrics:
+    """Database work attributed to the current request (mutated in place, so threadpool and
+    greenlet copies of the context still update the same object)."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+    def record_query(self, seconds: float) -> None:
+        self.db_queries += 1
+        self.db_seconds += seconds
+
+
+request_metrics_ctx: contextvars.ContextVar[RequestMetrics | None] = contextvars.ContextVar('request_metrics', default=None)
+
+
+def record_db_query(seconds: float) -> None:
+    metrics = request_metrics_ctx.get()
+    if metrics is not None:
+        metrics.record_query(seconds)
+
 class RequestIdFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
         record.request_id = request_id_ctx.get() or "-"
@@ -70,7 +93,51 @@ class RequestIdMiddleware:
         finally:
             request_id_ctx.reset(token)
 
+class AccessLogMiddleware:
+    """One structured access log line per request plus a ``Server-Timing`` header carrying the
+    request's database query count and time (fed by the engine hooks in ``database``)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics = RequestMetrics()
+        token = request_metrics_ctx.set(metrics)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message.get("type") == "http.response.start":
+                status_code = message["status"]
+                timing = (
+                    f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_queries} queries", '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.1f}"
+                )
+                message.setdefault("headers", []).append((b"server-timing", timing.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            access_logger.info(
+                "request_completed",
+                extra={
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "db_queries": metrics.db_queries,
+                    "db_time_ms": round(metrics.db_seconds * 1000, 2),
+                },
+            )
+            request_metrics_ctx.reset(token)
+
 logger = logging.getLogger("event_link")
+access_logger = logging.getLogger("event_link.access")
 
 def log_event(message: str, **kwargs: Any) -> None:
     logger.info(message, extra=kwargs)
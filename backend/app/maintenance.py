@@ -0,0 +1,108 @@
+import argparse
+import sys
+from typing import List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import models, notifications, recommendations, trending
+from .database import SessionLocal
+from .logging_utils import configure_logging, log_event, log_warning
+
+
+def find_seat_count_drift(db: Session) -> List[Tuple[int, int, int]]:
+    """Return (event_id, stored, actual) for events whose seats_taken counter disagrees with registrations."""
+    counts = (
+        db.query(
+            models.Registration.event_id.label("event_id"),
+            func.count(models.Registration.id).label("actual"),
+        )
+        .group_by(models.Registration.event_id)
+        .subquery()
+    )
+    actual = func.coalesce(counts.c.actual, 0)
+    rows = (
+        db.query(models.Event.id, models.Event.seats_taken, actual)
+        .outerjoin(counts, counts.c.event_id == models.Event.id)
+        .filter(models.Event.seats_taken != actual)
+        .order_by(models.Event.id)
+        .all()
+    )
+    return [(event_id, stored, int(real)) for event_id, stored, real in rows]
+
+
+def reconcile_seat_counts(db: Session, fix: bool = False) -> List[Tuple[int, int, int]]:
+    """Detect (and optionally repair) drift between events.seats_taken and the registrations table."""
+    drift = find_seat_count_drift(db)
+    for event_id, stored, real in drift:
+        log_warning("seats_taken_drift", event_id=event_id, stored=stored, actual=real)
+    if fix and drift:
+        for event_id, _stored, real in drift:
+            db.query(models.Event).filter(models.Event.id == event_id).update(
+                {models.Event.seats_taken: real}, synchronize_session=False
+            )
+        db.commit()
+    log_event("seats_taken_reconciled", drifted=len(drift), fixed=bool(fix and drift))
+    return drift
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance", description="Event Link maintenance commands")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    reconcile = subcommands.add_parser("reconcile-seats", help="Compare events.seats_taken with registrations")
+    reconcile.add_argument("--fix", action="store_true", help="Rewrite drifted counters with the real count")
+    subcommands.add_parser("run-notifications", help="Finish notification jobs interrupted by a restart")
+    refresh = subcommands.add_parser(
+        "refresh-recommendations", help="Recompute recommendations for students and events marked dirty"
+    )
+    refresh.add_argument("--all", action="store_true", help="Rebuild every student's recommendations")
+    refresh.add_argument("--chunk-size", type=int, default=None, help="Students/events per committed chunk")
+    train = subcommands.add_parser(
+        "train-recommendations", help="Retrain co-registration similarities, then rebuild every student"
+    )
+    train.add_argument("--neighbours", type=int, default=None, help="Similar events kept per event")
+    subcommands.add_parser("refresh-trending", help="Recompute the time-decayed trending scores")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    db = SessionLocal()
+    try:
+        if args.command == "reconcile-seats":
+            drift = reconcile_seat_counts(db, fix=args.fix)
+            for event_id, stored, real in drift:
+                print(f"event {event_id}: stored={stored} actual={real}")
+            # Non-zero exit lets cron/CI alert on drift when not repairing.
+            return 1 if drift and not args.fix else 0
+        if args.command == "run-notifications":
+            results = notifications.run_unfinished_jobs()
+            for job_id, job_status in results:
+                print(f"notification job {job_id}: {job_status}")
+            return 1 if any(job_status != "done" for _, job_status in results) else 0
+        if args.command == "refresh-recommendations":
+            refresh_run = recommendations.refresh_all if args.all else recommendations.refresh_dirty
+            stats = refresh_run(args.chunk_size)
+            print(
+                f"users={stats.users} events={stats.events} scores={stats.scores} "
+                f"seconds={stats.seconds:.2f} scores/s={stats.scores_per_second:.0f}"
+            )
+            return 0
+        if args.command == "train-recommendations":
+            trained = recommendations.train_similarities(args.neighbours)
+            print(
+                f"students={trained.students} registrations={trained.registrations} events={trained.events} "
+                f"pairs={trained.pairs} seconds={trained.seconds:.2f}"
+            )
+            stats = recommendations.refresh_all()
+            print(f"users={stats.users} scores={stats.scores} seconds={stats.seconds:.2f}")
+            return 0
+        if args.command == "refresh-trending":
+            stats = trending.refresh_trending()
+            print(f"events={stats.events} signals={stats.signals} seconds={stats.seconds:.2f}")
+            return 0
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Prometheus metrics.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set (required when running several uvicorn workers) every worker
+writes its samples to that directory and ``/metrics`` aggregates all of them, so a scrape that
+lands on any worker reports the whole server. Pool and cache figures live in per-process objects;
+each worker republishes them into gauges (at most once per second, on request completion) and the
+``livesum`` mode adds up the live workers.
+"""
+
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "eventlink_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "eventlink_http_requests_in_progress", "Requests currently being served.", ["method"], multiprocess_mode="livesum"
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "eventlink_rate_limit_rejections_total", "Requests rejected with 429 by the rate limiter.", ["action"]
+)
+EMAILS = Counter("eventlink_emails_total", "Email delivery outcomes.", ["outcome"])
+EMAIL_QUEUE_DEPTH = Gauge(
+    "eventlink_email_queue_depth", "Emails waiting in in-process background tasks or the async sender queue.", multiprocess_mode="livesum"
+)
+EMAIL_OUTBOX_PENDING = Gauge(
+    "eventlink_email_outbox_pending", "Rows waiting in email_outbox.", multiprocess_mode="mostrecent"
+)
+DB_POOL = Gauge(
+    "eventlink_db_pool", "Database pool state and counters by engine.", ["engine", "stat"], multiprocess_mode="livesum"
+)
+CACHE = Gauge(
+    "eventlink_cache", "Cache lookups and size by cache name.", ["cache", "stat"], multiprocess_mode="livesum"
+)
+
+_POOL_STATS = ("checked_out", "checked_in", "overflow", "checkouts", "waits", "timeouts", "wait_seconds_total")
+_CACHE_STATS = ("hits", "misses", "entries", "evictions")
+_refresh_lock = threading.Lock()
+_next_refresh = 0.0
+
+
+def _publish_runtime_stats() -> None:
+    from . import auth
+    from .cache import event_list_cache
+    from .database import async_pool_status, pool_status
+
+    for engine_name, stats in (("sync", pool_status()), ("async", async_pool_status())):
+        for stat in _POOL_STATS:
+            if stats and stat in stats:
+                DB_POOL.labels(engine=engine_name, stat=stat).set(stats[stat])
+    for cache_name, stats in (("event_list", event_list_cache.stats()), ("principal", auth.principal_cache.stats())):
+        for stat in _CACHE_STATS:
+            if stat in stats:
+                CACHE.labels(cache=cache_name, stat=stat).set(stats[stat])
+
+
+def refresh_runtime_stats(force: bool = False) -> None:
+    global _next_refresh
+    now = time.monotonic()
+    if not force and now < _next_refresh:
+        return
+    with _refresh_lock:
+        _next_refresh = now + 1
+    _publish_runtime_stats()
+
+
+def _publish_outbox_depth() -> None:
+    from . import models
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        EMAIL_OUTBOX_PENDING.set(
+            db.query(models.EmailOutbox).filter(models.EmailOutbox.status == "pending").count()
+        )
+    except Exception:  # noqa: BLE001 - a scrape must not fail because the database is unavailable
+        pass
+    finally:
+        db.close()
+
+
+def render_latest() -> tuple[bytes, str]:
+    refresh_runtime_stats(force=True)
+    # One COUNT per scrape (not per request); "mostrecent" keeps a single value across workers.
+    _publish_outbox_depth()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Latency histogram per route template (not raw path, to bound label cardinality) and an in-flight gauge."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope.get("method", "GET")
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message.get("type") == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=method, route=getattr(route, "path", "unmatched"), status=str(status_code)
+            ).observe(time.perf_counter() - started)
+            refresh_runtime_stats()
@@ -1,4 +1,5 @@
 import enum
+from datetime import datetime, timezone
 from sqlalchemy import (
     Column,
     Integer,
@@ -11,6 +12,9 @@ from sqlalchemy import (
     UniqueConstraint,
     func,
     Boolean,
+    Float,
+    Index,
+    JSON,
 )
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -33,6 +37,8 @@ class User(Base):
     org_description = Column(Text)
     org_logo_url = Column(String(500))
     org_website = Column(String(255))
+    # Bumped to revoke issued tokens (password reset); also part of the principal cache key.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     events = relationship("Event", back_populates="owner")
     registrations = relationship("Registration", back_populates="user", cascade="all, delete-orphan")
@@ -59,11 +65,20 @@ class Event(Base):
     end_time = Column(TIMESTAMP(timezone=True), nullable=True)
     location = Column(String(255))
     max_seats = Column(Integer)
+    seats_taken = Column(Integer, nullable=False, default=0, server_default="0")
     cover_url = Column(String(500))
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     status = Column(String(20), nullable=False, server_default="published")
     publish_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    # Bumped on every ORM flush or UPDATE (including the seats_taken counter); drives ETags.
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
 
     owner = relationship("User", back_populates="events")
     registrations = relationship("Registration", back_populates="event", cascade="all, delete-orphan")
@@ -78,8 +93,19 @@ class Registration(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
-    registration_time = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Python-side default keeps a consistent (microsecond) format across dialects so
+    # (registration_time, user_id) keyset cursors compare correctly on SQLite too.
+    registration_time = Column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     attended = Column(Boolean, server_default="false", nullable=False)
+    # Language of the confirmation email, reused for later notifications about the event.
+    lang = Column(String(8))
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
 
     user = relationship("User", back_populates="registrations")
     event = relationship("Event", back_populates="registrations")
@@ -111,6 +137,132 @@ class PasswordResetToken(Base):
     user = relationship("User")
 
 
+class EmailOutbox(Base):
+    """Outgoing email, written in the same transaction as the change that triggers it and
+    delivered by ``app.email_worker``."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body_text = Column(Text, nullable=False)
+    body_html = Column(Text)
+    context = Column(JSON)
+    status = Column(String(20), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
+    last_error = Column(Text)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    sent_at = Column(TIMESTAMP(timezone=True))
+
+
+class NotificationJob(Base):
+    """Bulk email to everyone registered for an event, delivered in chunks after the request.
+
+    ``context`` snapshots the event fields the templates need, so the job outlives a deleted event.
+    """
+
+    __tablename__ = "notification_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(40), nullable=False)
+    context = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="pending", server_default="pending")
+    total = Column(Integer, nullable=False, default=0, server_default="0")
+    processed = Column(Integer, nullable=False, default=0, server_default="0")
+    # Last recipient user_id handled; a restarted job resumes after it.
+    cursor = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(Text)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(TIMESTAMP(timezone=True))
+
+
+class NotificationRecipient(Base):
+    """Registrants captured when the job was created (registrations vanish with a deleted event)."""
+
+    __tablename__ = "notification_recipients"
+
+    job_id = Column(Integer, ForeignKey("notification_jobs.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    lang = Column(String(8))
+
+
+class UserTagAffinity(Base):
+    """Sparse tag-affinity vector of a student (see ``app.recommendations``)."""
+
+    __tablename__ = "user_tag_affinity"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    weight = Column(Float, nullable=False)
+
+
+class UserRecommendation(Base):
+    """Precomputed top-N recommendations of a student, read by ``GET /api/recommendations``."""
+
+    __tablename__ = "user_recommendations"
+    __table_args__ = (Index("ix_user_recommendations_user_score", "user_id", "score"),)
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    # Blended score; tag_score/cf_score back ?strategy=tags|cf.
+    score = Column(Float, nullable=False)
+    tag_score = Column(Float, nullable=False, default=0, server_default="0")
+    cf_score = Column(Float, nullable=False, default=0, server_default="0")
+    # Explanations of the tag and co-registration components.
+    reason = Column(String(255))
+    cf_reason = Column(String(255))
+    computed_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+
+class EventSimilarity(Base):
+    """Item-item co-registration similarity: an event's nearest upcoming neighbours (see ``app.recommendations``)."""
+
+    __tablename__ = "event_similarities"
+    __table_args__ = (Index("ix_event_similarities_similar_event_id", "similar_event_id"),)
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    similar_event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+
+
+class EventTrending(Base):
+    """Time-decayed registration/favorite velocity per upcoming event, rebuilt by ``app.trending``."""
+
+    __tablename__ = "event_trending"
+    __table_args__ = (Index("ix_event_trending_score", "score"),)
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+
+class RecommendationDirtyUser(Base):
+    """A student whose registrations, favorites or attendance changed since the last refresh."""
+
+    __tablename__ = "recommendation_dirty_users"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    marked_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+
+class RecommendationDirtyEvent(Base):
+    """An event created, edited or freed up since the last refresh."""
+
+    __tablename__ = "recommendation_dirty_events"
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, nullable=False, index=True)
+    marked_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+
 event_tags = Table(
     "event_tags",
     Base.metadata,
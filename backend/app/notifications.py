@@ -0,0 +1,143 @@
+"""Bulk notifications to everyone registered for an event.
+
+``create_job`` runs inside the organizer's request: it snapshots the event and copies its
+registrants into ``notification_recipients`` with one ``INSERT ... SELECT``, in the same
+transaction as the edit. ``run_job`` runs after the response (or from
+``python -m app.maintenance run-notifications``): it walks the recipients in chunks of
+``NOTIFICATION_CHUNK_SIZE``, renders each language once and hands each chunk to the configured
+``EMAIL_DELIVERY_MODE``: ``outbox`` inserts it into ``email_outbox`` with a single statement,
+``async`` queues it on the in-process sender and ``background`` (or ``async`` outside the API
+process) sends it from the job's own thread. Progress is committed after every chunk, so a
+restarted job resumes after the last recipient it handled.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert, literal, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+from .email_async import EmailJob, email_sender
+from .email_service import _send_email
+from .email_templates import DEFAULT_LANG, event_context, registry
+from .logging_utils import log_event, log_warning
+from .metrics import EMAILS
+
+
+def create_job(db: Session, event: models.Event, kind: str, owner_id: int) -> Optional[models.NotificationJob]:
+    """Queue ``kind`` (a template name) for the event's registrants; the caller commits."""
+    if not event.seats_taken:
+        return None
+    job = models.NotificationJob(event_id=event.id, owner_id=owner_id, kind=kind, context=event_context(event))
+    db.add(job)
+    db.flush()
+    recipients = select(literal(job.id), models.Registration.user_id, models.Registration.lang).where(
+        models.Registration.event_id == event.id
+    )
+    result = db.execute(
+        insert(models.NotificationRecipient).from_select(["job_id", "user_id", "lang"], recipients)
+    )
+    job.total = result.rowcount
+    return job
+
+
+def _enqueue_chunk(db: Session, job: models.NotificationJob, rows) -> None:
+    if not settings.email_enabled:
+        EMAILS.labels(outcome="skipped").inc(len(rows))
+        return
+    messages = []
+    for row in rows:
+        lang = row.lang or DEFAULT_LANG
+        # Rendered once per (template, lang, event); only the name differs between recipients.
+        subject, body_text, body_html = registry.render_personalized(
+            job.kind, lang, job.event_id, job.context, row.full_name or row.email
+        )
+        messages.append(
+            {
+                "to_email": row.email,
+                "subject": subject,
+                "body_text": body_text,
+                "body_html": body_html,
+                "context": {"notification_job_id": job.id, "event_id": job.event_id, "user_id": row.user_id, "lang": lang},
+            }
+        )
+    if settings.email_delivery_mode not in ("background", "async"):
+        db.execute(insert(models.EmailOutbox), messages)
+        return
+    for message in messages:
+        email = EmailJob(**message)
+        if settings.email_delivery_mode != "async" or not email_sender.submit(email):
+            _send_email(email.to_email, email.subject, email.body_text, email.body_html, email.context)
+
+
+def run_job(job_id: int) -> Optional[str]:
+    """Deliver the remaining recipients of a job; returns its final status."""
+    db = SessionLocal()
+    try:
+        job = db.get(models.NotificationJob, job_id)
+        if job is None or job.status == "done":
+            return job.status if job else None
+        job.status = "running"
+        db.commit()
+        try:
+            while True:
+                rows = (
+                    db.query(
+                        models.NotificationRecipient.user_id,
+                        models.NotificationRecipient.lang,
+                        models.User.email,
+                        models.User.full_name,
+                    )
+                    .join(models.User, models.User.id == models.NotificationRecipient.user_id)
+                    .filter(
+                        models.NotificationRecipient.job_id == job.id,
+                        models.NotificationRecipient.user_id > job.cursor,
+                    )
+                    .order_by(models.NotificationRecipient.user_id)
+                    .limit(settings.notification_chunk_size)
+                    .all()
+                )
+                if not rows:
+                    break
+                _enqueue_chunk(db, job, rows)
+                job.processed += len(rows)
+                job.cursor = rows[-1].user_id
+                db.commit()
+                log_event(
+                    "notification_job_progress",
+                    job_id=job.id,
+                    event_id=job.event_id,
+                    processed=job.processed,
+                    total=job.total,
+                )
+            job.status = "done"
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            log_event("notification_job_done", job_id=job.id, event_id=job.event_id, kind=job.kind, total=job.total)
+        except Exception as exc:  # noqa: BLE001 - recorded on the job; rerun with app.maintenance
+            db.rollback()
+            job.status = "failed"
+            job.error = str(exc)[:1000]
+            db.commit()
+            log_warning("notification_job_failed", job_id=job.id, event_id=job.event_id, error=str(exc))
+        return job.status
+    finally:
+        db.close()
+
+
+def run_unfinished_jobs() -> list[tuple[int, Optional[str]]]:
+    """Run every job that is not ``done`` (e.g. interrupted by a restart); returns ``(id, status)`` pairs."""
+    db = SessionLocal()
+    try:
+        job_ids = [
+            job_id
+            for (job_id,) in db.query(models.NotificationJob.id)
+            .filter(models.NotificationJob.status != "done")
+            .order_by(models.NotificationJob.id)
+        ]
+    finally:
+        db.close()
+    return [(job_id, run_job(job_id)) for job_id in job_ids]
@@ -0,0 +1,605 @@
+"""Precomputed recommendations: tag affinity blended with co-registration similarity.
+
+Tag score: each student has a sparse tag-affinity vector (``user_tag_affinity``): every
+registration adds ``REGISTRATION_WEIGHT`` to the event's tags, an attended one another
+``ATTENDANCE_WEIGHT`` and a favorite ``FAVORITE_WEIGHT``. An event's vector is its ``event_tags``
+rows (1 per tag); the score is their cosine similarity.
+
+Collaborative score: ``train_similarities`` computes item-item cosine similarity over the
+registration matrix (students x events) and keeps each event's ``RECOMMENDATIONS_NEIGHBOURS``
+most similar upcoming events in ``event_similarities``. A student's score for an event is its
+summed similarity to the events they registered for, capped at 1 like the tag cosine so the two
+blend on the same scale.
+
+The stored ``score`` is ``(1 - w) * tag_score + w * cf_score`` with ``w = RECOMMENDATIONS_CF_WEIGHT``.
+Candidates are upcoming, published, not full and not registered; for each student the best
+``RECOMMENDATIONS_TOP_N`` by each of the three scores are kept in ``user_recommendations``, so
+``GET /api/recommendations?strategy=`` is a single indexed read whichever score it orders by.
+
+Requests only mark what changed, in their own transaction: ``mark_user_dirty`` when a student's
+registrations, favorites or attendance change, ``mark_event_dirty`` when an event is created or
+edited or frees a seat. ``refresh_dirty`` (scheduled every ``RECOMMENDATIONS_REFRESH_SECONDS`` or
+``python -m app.maintenance refresh-recommendations``) recomputes dirty users in full and, for
+dirty events, only the students whose vector shares one of the event's tags or who registered
+for one of its neighbours. Similarities change only when retrained
+(``python -m app.maintenance train-recommendations``, which then rebuilds every student).
+
+Vectors and the co-registration matrix are sparse (a handful of tags per event, a few dozen
+registrations per student), so they are plain dicts keyed by id.
+"""
+
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import case, func, insert, select, union
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+from .logging_utils import log_event
+
+REGISTRATION_WEIGHT = 1.0
+ATTENDANCE_WEIGHT = 1.0
+FAVORITE_WEIGHT = 0.5
+REASON_TAGS = 3
+STRATEGIES = ("blend", "tags", "cf")
+FETCH_ROWS = 1000
+
+
+@dataclass
+class RefreshStats:
+    users: int = 0
+    events: int = 0
+    scores: int = 0
+    seconds: float = 0.0
+
+    @property
+    def scores_per_second(self) -> float:
+        return self.scores / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class TrainStats:
+    students: int = 0
+    registrations: int = 0
+    events: int = 0
+    pairs: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class Candidate:
+    event_id: int
+    start_time: datetime
+    tag_score: float = 0.0
+    matched_tags: list[int] = field(default_factory=list)
+    cf_score: float = 0.0
+    cf_source: Optional[int] = None
+
+    @property
+    def score(self) -> float:
+        return blend(self.tag_score, self.cf_score)
+
+
+def blend(tag_score: float, cf_score: float, cf_weight: Optional[float] = None) -> float:
+    cf_weight = settings.recommendations_cf_weight if cf_weight is None else cf_weight
+    return (1 - cf_weight) * tag_score + cf_weight * cf_score
+
+
+def pick_reason(strategy: str, tag_score: float, cf_score: float, reason: Optional[str], cf_reason: Optional[str]):
+    """The stored explanation matching the score the list was ordered by."""
+    if strategy == "tags":
+        return reason
+    if strategy == "cf":
+        return cf_reason
+    cf_weight = settings.recommendations_cf_weight
+    return cf_reason if cf_weight * cf_score > (1 - cf_weight) * tag_score else reason
+
+
+def item_similarities(
+    baskets: Iterable[Iterable[int]], targets: Optional[set[int]] = None, neighbours: int = 20
+) -> dict[int, list[tuple[int, float]]]:
+    """Cosine similarity between the columns of the registration matrix.
+
+    ``baskets`` yields the event ids each student registered for. Returns, per event, its
+    ``neighbours`` most similar events among ``targets`` (all events when None), best first.
+    """
+    counts: dict[int, int] = {}
+    together: dict[int, dict[int, int]] = {}
+    for basket in baskets:
+        items = set(basket)
+        for event_id in items:
+            counts[event_id] = counts.get(event_id, 0) + 1
+        if len(items) < 2:
+            continue
+        wanted = items if targets is None else items & targets
+        for event_id in items:
+            for other in wanted:
+                if other != event_id:
+                    row = together.setdefault(event_id, {})
+                    row[other] = row.get(other, 0) + 1
+    similarities = {}
+    for event_id, row in together.items():
+        scored = [(other, shared / math.sqrt(counts[event_id] * counts[other])) for other, shared in row.items()]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        similarities[event_id] = scored[:neighbours]
+    return similarities
+
+
+def collaborative_scores(edges: Iterable[tuple[int, int, float]]) -> dict[int, tuple[float, int]]:
+    """``target -> (score, strongest source)`` from ``(source, target, similarity)`` edges whose
+    source is one of the student's registered events."""
+    totals: dict[int, float] = {}
+    strongest: dict[int, tuple[float, int]] = {}
+    for source, target, similarity in edges:
+        totals[target] = totals.get(target, 0.0) + similarity
+        if target not in strongest or similarity > strongest[target][0]:
+            strongest[target] = (similarity, source)
+    return {target: (min(1.0, total), strongest[target][1]) for target, total in totals.items()}
+
+
+def tag_score(affinity: dict[int, float], norm: float, event_tag_ids: Iterable[int]) -> tuple[float, list[int]]:
+    """Cosine similarity of a student's vector (of length ``norm``) and an event's tags, plus the shared tags."""
+    event_tag_ids = list(event_tag_ids)
+    matched = [tag_id for tag_id in event_tag_ids if tag_id in affinity]
+    if not matched:
+        return 0.0, []
+    return _score(affinity, norm, matched, len(event_tag_ids)), matched
+
+
+def mark_user_dirty(db: Session, user_id: int) -> None:
+    """Queue a full recompute of the student's recommendations; the caller commits."""
+    db.add(models.RecommendationDirtyUser(user_id=user_id))
+
+
+def mark_event_dirty(db: Session, event_id: int) -> None:
+    """Queue a rescore of the event for every student interested in it; the caller commits."""
+    db.add(models.RecommendationDirtyEvent(event_id=event_id))
+
+
+def user_affinity(db: Session, user_id: int) -> dict[int, float]:
+    """The student's tag-affinity vector, built from registrations, attendance and favorites."""
+    registration_weight = case(
+        (models.Registration.attended == True, REGISTRATION_WEIGHT + ATTENDANCE_WEIGHT),  # noqa: E712
+        else_=REGISTRATION_WEIGHT,
+    )
+    affinity: dict[int, float] = {}
+    registered = (
+        db.query(models.event_tags.c.tag_id, func.sum(registration_weight))
+        .join(models.Registration, models.Registration.event_id == models.event_tags.c.event_id)
+        .filter(models.Registration.user_id == user_id)
+        .group_by(models.event_tags.c.tag_id)
+    )
+    favorited = (
+        db.query(models.event_tags.c.tag_id, func.count() * FAVORITE_WEIGHT)
+        .join(models.FavoriteEvent, models.FavoriteEvent.event_id == models.event_tags.c.event_id)
+        .filter(models.FavoriteEvent.user_id == user_id)
+        .group_by(models.event_tags.c.tag_id)
+    )
+    for query in (registered, favorited):
+        for tag_id, weight in query:
+            affinity[tag_id] = affinity.get(tag_id, 0.0) + float(weight)
+    return affinity
+
+
+def _candidate_filter(now: datetime):
+    # Scheduled publication is not checked here: the read path filters on publish_at, so an
+    # event shows up as soon as it goes live without another refresh.
+    return (
+        models.Event.start_time >= now,
+        models.Event.status == "published",
+        (models.Event.max_seats == None) | (models.Event.seats_taken < models.Event.max_seats),  # noqa: E711
+    )
+
+
+def _norm(affinity: dict[int, float]) -> float:
+    return math.sqrt(sum(weight * weight for weight in affinity.values()))
+
+
+def _score(affinity: dict[int, float], norm: float, matched: Iterable[int], tag_count: int) -> float:
+    return sum(affinity[tag_id] for tag_id in matched) / (norm * math.sqrt(tag_count))
+
+
+def _tag_names(db: Session, tag_ids: Iterable[int]) -> dict[int, str]:
+    tag_ids = list(tag_ids)
+    if not tag_ids:
+        return {}
+    return dict(db.query(models.Tag.id, models.Tag.name).filter(models.Tag.id.in_(tag_ids)))
+
+
+def _event_titles(db: Session, event_ids: Iterable[int]) -> dict[int, str]:
+    event_ids = list(event_ids)
+    if not event_ids:
+        return {}
+    return dict(db.query(models.Event.id, models.Event.title).filter(models.Event.id.in_(event_ids)))
+
+
+def _chunks(items: list[int], size: int) -> Iterator[list[int]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _keep_top(candidates: list[Candidate]) -> list[Candidate]:
+    """The best ``RECOMMENDATIONS_TOP_N`` by blended, tag and collaborative score (ties: earliest start)."""
+    keep: dict[int, Candidate] = {}
+    for key in (lambda c: c.score, lambda c: c.tag_score, lambda c: c.cf_score):
+        ranked = sorted(
+            (c for c in candidates if key(c) > 0), key=lambda c: (-key(c), c.start_time, c.event_id)
+        )
+        for candidate in ranked[: settings.recommendations_top_n]:
+            keep[candidate.event_id] = candidate
+    return list(keep.values())
+
+
+def _rows(
+    user_id: int,
+    candidates: list[Candidate],
+    affinity: dict[int, float],
+    names: dict[int, str],
+    titles: dict[int, str],
+) -> list[dict]:
+    computed_at = datetime.now(timezone.utc)
+    rows = []
+    for candidate in candidates:
+        reason = cf_reason = None
+        if candidate.matched_tags:
+            strongest = sorted(candidate.matched_tags, key=lambda tag_id: (-affinity[tag_id], names[tag_id]))
+            reason = f"Similar tags: {', '.join(names[tag_id] for tag_id in strongest[:REASON_TAGS])}"
+        if candidate.cf_source is not None:
+            cf_reason = f"Students who registered for {titles[candidate.cf_source]} also registered for this event"
+        rows.append(
+            {
+                "user_id": user_id,
+                "event_id": candidate.event_id,
+                "score": candidate.score,
+                "tag_score": candidate.tag_score,
+                "cf_score": candidate.cf_score,
+                "reason": reason,
+                "cf_reason": cf_reason,
+                "computed_at": computed_at,
+            }
+        )
+    return rows
+
+
+def score_events(db: Session, user_id: int, affinity: dict[int, float]) -> list[dict]:
+    """``user_recommendations`` rows for the student's best candidates."""
+    now = datetime.now(timezone.utc)
+    registered_ids = [
+        event_id
+        for (event_id,) in db.query(models.Registration.event_id).filter(models.Registration.user_id == user_id)
+    ]
+    candidates: dict[int, Candidate] = {}
+    if affinity:
+        # |event vector|^2: the event's tag count, read from the event_tags primary key.
+        own_tags = models.event_tags.alias("own_tags")
+        tag_count = select(func.count()).where(own_tags.c.event_id == models.Event.id).scalar_subquery()
+        rows = (
+            db.query(models.event_tags.c.event_id, models.event_tags.c.tag_id, tag_count, models.Event.start_time)
+            .join(models.Event, models.Event.id == models.event_tags.c.event_id)
+            .filter(models.event_tags.c.tag_id.in_(list(affinity)))
+            .filter(*_candidate_filter(now))
+            .filter(models.event_tags.c.event_id.not_in(registered_ids))
+            .all()
+        )
+        tag_counts: dict[int, int] = {}
+        for event_id, tag_id, tags, start_time in rows:
+            candidates.setdefault(event_id, Candidate(event_id, start_time)).matched_tags.append(tag_id)
+            tag_counts[event_id] = tags
+        norm = _norm(affinity)
+        for event_id, tags in tag_counts.items():
+            candidate = candidates[event_id]
+            candidate.tag_score = _score(affinity, norm, candidate.matched_tags, tags)
+    if registered_ids:
+        edges = (
+            db.query(
+                models.EventSimilarity.event_id,
+                models.EventSimilarity.similar_event_id,
+                models.EventSimilarity.score,
+                models.Event.start_time,
+            )
+            .join(models.Event, models.Event.id == models.EventSimilarity.similar_event_id)
+            .filter(models.EventSimilarity.event_id.in_(registered_ids))
+            .filter(*_candidate_filter(now))
+            .filter(models.EventSimilarity.similar_event_id.not_in(registered_ids))
+            .all()
+        )
+        start_times = {target: start_time for _source, target, _similarity, start_time in edges}
+        scores = collaborative_scores((s, t, w) for s, t, w, _start in edges)
+        for event_id, (cf_score, source) in scores.items():
+            candidate = candidates.setdefault(event_id, Candidate(event_id, start_times[event_id]))
+            candidate.cf_score, candidate.cf_source = cf_score, source
+
+    kept = _keep_top(list(candidates.values()))
+    names = _tag_names(db, {tag_id for candidate in kept for tag_id in candidate.matched_tags})
+    titles = _event_titles(db, {c.cf_source for c in kept if c.cf_source is not None})
+    return _rows(user_id, kept, affinity, names, titles)
+
+
+def refresh_user_in(db: Session, user_id: int) -> int:
+    """Recompute and store one student's affinity vector and recommendations; the caller commits."""
+    affinity = user_affinity(db, user_id)
+    rows = score_events(db, user_id, affinity)
+    db.query(models.UserTagAffinity).filter(models.UserTagAffinity.user_id == user_id).delete(
+        synchronize_session=False
+    )
+    db.query(models.UserRecommendation).filter(models.UserRecommendation.user_id == user_id).delete(
+        synchronize_session=False
+    )
+    if affinity:
+        db.execute(
+            insert(models.UserTagAffinity),
+            [{"user_id": user_id, "tag_id": tag_id, "weight": weight} for tag_id, weight in affinity.items()],
+        )
+    if rows:
+        db.execute(insert(models.UserRecommendation), rows)
+    return len(rows)
+
+
+def _trim(db: Session, user_ids: list[int]) -> None:
+    """Drop each student's rows outside the top-N (after events were rescored into them)."""
+    crowded = [
+        user_id
+        for (user_id,) in db.query(models.UserRecommendation.user_id)
+        .filter(models.UserRecommendation.user_id.in_(user_ids))
+        .group_by(models.UserRecommendation.user_id)
+        .having(func.count() > settings.recommendations_top_n)
+    ]
+    for user_id in crowded:
+        stored = [
+            Candidate(event_id, start_time, tag_score=tag, cf_score=cf)
+            for event_id, start_time, tag, cf in db.query(
+                models.UserRecommendation.event_id,
+                models.Event.start_time,
+                models.UserRecommendation.tag_score,
+                models.UserRecommendation.cf_score,
+            )
+            .join(models.Event, models.Event.id == models.UserRecommendation.event_id)
+            .filter(models.UserRecommendation.user_id == user_id)
+        ]
+        keep = {candidate.event_id for candidate in _keep_top(stored)}
+        extra = [candidate.event_id for candidate in stored if candidate.event_id not in keep]
+        if extra:
+            db.query(models.UserRecommendation).filter(
+                models.UserRecommendation.user_id == user_id, models.UserRecommendation.event_id.in_(extra)
+            ).delete(synchronize_session=False)
+
+
+def rescore_events(db: Session, event_ids: list[int], chunk_size: int) -> int:
+    """Replace the stored scores of ``event_ids`` for every student whose vector shares one of
+    their tags or who registered for one of their neighbours, ``chunk_size`` students at a time;
+    returns the rows written. The caller commits."""
+    now = datetime.now(timezone.utc)
+    db.query(models.UserRecommendation).filter(models.UserRecommendation.event_id.in_(event_ids)).delete(
+        synchronize_session=False
+    )
+    live = dict(
+        db.query(models.Event.id, models.Event.start_time).filter(models.Event.id.in_(event_ids), *_candidate_filter(now))
+    )
+    if not live:
+        return 0
+    event_tag_ids: dict[int, list[int]] = {event_id: [] for event_id in live}
+    for event_id, tag_id in db.query(models.event_tags.c.event_id, models.event_tags.c.tag_id).filter(
+        models.event_tags.c.event_id.in_(list(live))
+    ):
+        event_tag_ids[event_id].append(tag_id)
+    tag_ids = sorted({tag_id for tags in event_tag_ids.values() for tag_id in tags})
+    edges_by_source: dict[int, list[tuple[int, float]]] = {}
+    for source, target, similarity in db.query(
+        models.EventSimilarity.event_id, models.EventSimilarity.similar_event_id, models.EventSimilarity.score
+    ).filter(models.EventSimilarity.similar_event_id.in_(list(live))):
+        edges_by_source.setdefault(source, []).append((target, similarity))
+    sources = sorted(edges_by_source)
+
+    interested = []
+    if tag_ids:
+        interested.append(select(models.UserTagAffinity.user_id).where(models.UserTagAffinity.tag_id.in_(tag_ids)))
+    if sources:
+        interested.append(select(models.Registration.user_id).where(models.Registration.event_id.in_(sources)))
+    if not interested:
+        return 0
+    interested_users = (interested[0] if len(interested) == 1 else union(*interested)).subquery()
+    names = _tag_names(db, tag_ids)
+    titles = _event_titles(db, sources)
+
+    written = 0
+    last_user_id = 0
+    while True:
+        user_ids = [
+            user_id
+            for (user_id,) in db.query(interested_users.c.user_id)
+            .filter(interested_users.c.user_id > last_user_id)
+            .distinct()
+            .order_by(interested_users.c.user_id)
+            .limit(chunk_size)
+        ]
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+        vectors: dict[int, dict[int, float]] = {}
+        for user_id, tag_id, weight in db.query(
+            models.UserTagAffinity.user_id, models.UserTagAffinity.tag_id, models.UserTagAffinity.weight
+        ).filter(models.UserTagAffinity.user_id.in_(user_ids)):
+            vectors.setdefault(user_id, {})[tag_id] = weight
+        registered: dict[int, set[int]] = {}
+        for user_id, event_id in db.query(models.Registration.user_id, models.Registration.event_id).filter(
+            models.Registration.user_id.in_(user_ids), models.Registration.event_id.in_(sources + list(live))
+        ):
+            registered.setdefault(user_id, set()).add(event_id)
+
+        rows = []
+        for user_id in user_ids:
+            affinity = vectors.get(user_id, {})
+            norm = _norm(affinity)
+            own = registered.get(user_id, set())
+            edges = [
+                (source, target, similarity)
+                for source in own
+                for target, similarity in edges_by_source.get(source, ())
+            ]
+            cf = collaborative_scores(edges)
+            candidates = []
+            for event_id, start_time in live.items():
+                if event_id in own:
+                    continue
+                candidate = Candidate(event_id, start_time)
+                if affinity:
+                    candidate.tag_score, candidate.matched_tags = tag_score(affinity, norm, event_tag_ids[event_id])
+                if event_id in cf:
+                    candidate.cf_score, candidate.cf_source = cf[event_id]
+                if candidate.tag_score or candidate.cf_score:
+                    candidates.append(candidate)
+            rows.extend(_rows(user_id, candidates, affinity, names, titles))
+        if rows:
+            db.execute(insert(models.UserRecommendation), rows)
+            _trim(db, user_ids)
+            written += len(rows)
+    return written
+
+
+def _dirty_ids(db: Session, model, column, mark: Optional[int]) -> list[int]:
+    if mark is None:
+        return []
+    return [value for (value,) in db.query(column).filter(model.id <= mark).distinct().order_by(column)]
+
+
+def refresh_dirty(chunk_size: Optional[int] = None) -> RefreshStats:
+    """Process the users and events marked dirty so far, committing after every chunk."""
+    chunk_size = chunk_size or settings.recommendations_chunk_size
+    stats = RefreshStats()
+    started = time.perf_counter()
+    dirty_users, dirty_events = models.RecommendationDirtyUser, models.RecommendationDirtyEvent
+    db = SessionLocal()
+    try:
+        # Marks added while the run is in progress (ids above the snapshot) wait for the next run.
+        user_mark = db.query(func.max(dirty_users.id)).scalar()
+        event_mark = db.query(func.max(dirty_events.id)).scalar()
+        for chunk in _chunks(_dirty_ids(db, dirty_users, dirty_users.user_id, user_mark), chunk_size):
+            for user_id in chunk:
+                stats.scores += refresh_user_in(db, user_id)
+            db.query(dirty_users).filter(dirty_users.user_id.in_(chunk), dirty_users.id <= user_mark).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            stats.users += len(chunk)
+        for chunk in _chunks(_dirty_ids(db, dirty_events, dirty_events.event_id, event_mark), chunk_size):
+            stats.scores += rescore_events(db, chunk, chunk_size)
+            db.query(dirty_events).filter(dirty_events.event_id.in_(chunk), dirty_events.id <= event_mark).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            stats.events += len(chunk)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    stats.seconds = time.perf_counter() - started
+    if stats.users or stats.events:
+        _log_stats("recommendations_refreshed", stats)
+    return stats
+
+
+def refresh_all(chunk_size: Optional[int] = None) -> RefreshStats:
+    """Recompute every student who has registered or favorited something."""
+    chunk_size = chunk_size or settings.recommendations_chunk_size
+    stats = RefreshStats()
+    started = time.perf_counter()
+    dirty_users, dirty_events = models.RecommendationDirtyUser, models.RecommendationDirtyEvent
+    db = SessionLocal()
+    try:
+        user_mark = db.query(func.max(dirty_users.id)).scalar()
+        event_mark = db.query(func.max(dirty_events.id)).scalar()
+        user_ids = sorted(
+            {user_id for (user_id,) in db.query(models.Registration.user_id).distinct()}
+            | {user_id for (user_id,) in db.query(models.FavoriteEvent.user_id).distinct()}
+        )
+        for chunk in _chunks(user_ids, chunk_size):
+            for user_id in chunk:
+                stats.scores += refresh_user_in(db, user_id)
+            db.commit()
+            stats.users += len(chunk)
+        # The rebuild covers every mark taken before it started.
+        if user_mark is not None:
+            db.query(dirty_users).filter(dirty_users.id <= user_mark).delete(synchronize_session=False)
+        if event_mark is not None:
+            db.query(dirty_events).filter(dirty_events.id <= event_mark).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    stats.seconds = time.perf_counter() - started
+    _log_stats("recommendations_rebuilt", stats)
+    return stats
+
+
+def train_similarities(neighbours: Optional[int] = None) -> TrainStats:
+    """Recompute ``event_similarities`` from all registrations (past events included as sources,
+    only upcoming published events as neighbours) and replace the table in one transaction."""
+    neighbours = neighbours or settings.recommendations_neighbours
+    stats = TrainStats()
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        targets = {
+            event_id
+            for (event_id,) in db.query(models.Event.id).filter(
+                models.Event.start_time >= now, models.Event.status == "published"
+            )
+        }
+        registrations = db.execute(
+            select(models.Registration.user_id, models.Registration.event_id)
+            .order_by(models.Registration.user_id)
+            .execution_options(yield_per=FETCH_ROWS)
+        )
+
+        def baskets():
+            for _user_id, rows in itertools.groupby(registrations, key=lambda row: row.user_id):
+                basket = [row.event_id for row in rows]
+                stats.students += 1
+                stats.registrations += len(basket)
+                yield basket
+
+        similarities = item_similarities(baskets(), targets, neighbours)
+        db.query(models.EventSimilarity).delete(synchronize_session=False)
+        rows = [
+            {"event_id": event_id, "similar_event_id": other, "score": score}
+            for event_id, similar in similarities.items()
+            for other, score in similar
+        ]
+        if rows:
+            db.execute(insert(models.EventSimilarity), rows)
+        db.commit()
+        stats.events = len(similarities)
+        stats.pairs = len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    stats.seconds = time.perf_counter() - started
+    log_event(
+        "recommendations_trained",
+        students=stats.students,
+        registrations=stats.registrations,
+        events=stats.events,
+        pairs=stats.pairs,
+        seconds=round(stats.seconds, 3),
+    )
+    return stats
+
+
+def _log_stats(event: str, stats: RefreshStats) -> None:
+    log_event(
+        event,
+        users=stats.users,
+        events=stats.events,
+        scores=stats.scores,
+        seconds=round(stats.seconds, 3),
+        scores_per_second=round(stats.scores_per_second, 1),
+    )
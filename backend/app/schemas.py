@@ -88,6 +88,18 @@ class EventBase(BaseModel):
     status: Optional[str] = Field(default="published", pattern="^(published|draft)$")
     publish_at: Optional[datetime] = None
 
+    @field_validator("title")
+    @classmethod
+    def single_line_title(cls, v: str) -> str:
+        return _single_line(v)
+
+
+def _single_line(v: Optional[str]) -> Optional[str]:
+    # Titles end up in email subjects, where a line break is a header injection.
+    if v is not None and ("\r" in v or "\n" in v):
+        raise ValueError("Title must be a single line")
+    return v
+
 
 class EventCreate(EventBase):
     pass
@@ -106,6 +118,11 @@ class EventUpdate(BaseModel):
     status: Optional[str] = Field(default=None, pattern="^(published|draft)$")
     publish_at: Optional[datetime] = None
 
+    @field_validator("title")
+    @classmethod
+    def single_line_title(cls, v: Optional[str]) -> Optional[str]:
+        return _single_line(v)
+
 
 class EventResponse(BaseModel):
     id: int
@@ -151,9 +168,10 @@ class ParticipantListResponse(BaseModel):
     seats_taken: int
     max_seats: Optional[int]
     participants: list[ParticipantResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class OrganizerProfileBase(BaseModel):
@@ -180,9 +198,25 @@ class FavoriteListResponse(BaseModel):
 
 class PaginatedEvents(BaseModel):
     items: List[EventResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+class NotificationJobResponse(BaseModel):
+    id: int
+    event_id: int
+    kind: str
+    status: str
+    total: int
+    processed: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 
 class PasswordResetRequest(BaseModel):
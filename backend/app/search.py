@@ -0,0 +1,130 @@
+"""Full-text search over events.
+
+Postgres keeps a weighted ``events.search_vector`` tsvector (title > description > location)
+up to date with a trigger and serves it from a GIN index; ``location`` additionally gets a
+trigram index so the ``location`` substring filter stays indexable. SQLite (tests, local dev)
+uses an FTS5 external-content table kept in sync by triggers. The DDL is attached to the
+``events`` table so ``create_all`` sets it up; production databases get it from migration 0006.
+"""
+
+import re
+
+from sqlalchemy import DDL, and_, event, func, literal_column, or_, select, text
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import column, table
+
+from . import models
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_PG_CREATE = [
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION events_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.location, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER events_search_vector_trg
+    BEFORE INSERT OR UPDATE OF title, description, location ON events
+    FOR EACH ROW EXECUTE FUNCTION events_search_vector_update()
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING gin (search_vector)",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_events_location_trgm ON events USING gin (lower(location) gin_trgm_ops)",
+]
+
+_SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts
+    USING fts5(title, description, location, content='events', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, description, location ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO events_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+]
+
+for _statement in _PG_CREATE:
+    event.listen(models.Event.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+event.listen(
+    models.Event.__table__,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS events_search_vector_update()").execute_if(dialect="postgresql"),
+)
+for _statement in _SQLITE_CREATE:
+    event.listen(models.Event.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    models.Event.__table__, "before_drop", DDL("DROP TABLE IF EXISTS events_fts").execute_if(dialect="sqlite")
+)
+
+_events_fts = table("events_fts", column("rowid"))
+
+
+def search_tokens(term: str | None) -> list[str]:
+    return _TOKEN_RE.findall((term or "").lower())
+
+
+def apply_search(db: Session, query: Query, term: str):
+    """Filter ``query`` to events matching ``term``; return ``(query, rank)``.
+
+    Every token must match (as a prefix) in title, description or location, or the term must
+    name one of the event's tags. ``rank`` is a column expression where higher means more relevant.
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return query, literal_column("0")
+    tag_match = models.Event.tags.any(func.lower(models.Tag.name).in_(tokens + [" ".join(tokens)]))
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        vector = literal_column("events.search_vector")
+        rank = func.coalesce(func.ts_rank(vector, ts_query), 0)
+        return query.filter(or_(vector.op("@@")(ts_query), tag_match)), rank
+
+    if dialect == "sqlite":
+        fts_query = " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+        matches = (
+            select(_events_fts.c.rowid.label("event_id"), func.bm25(text("events_fts")).label("score"))
+            .select_from(_events_fts)
+            .where(text("events_fts MATCH :fts_query").bindparams(fts_query=fts_query))
+            .subquery()
+        )
+        # bm25() is negative with better matches further below zero.
+        rank = func.coalesce(-matches.c.score, 0)
+        query = query.outerjoin(matches, matches.c.event_id == models.Event.id)
+        return query.filter(or_(matches.c.event_id != None, tag_match)), rank  # noqa: E711
+
+    # Unknown dialects: plain substring matching, unranked.
+    conditions = [
+        or_(
+            func.lower(models.Event.title).like(f"%{token}%"),
+            func.lower(models.Event.description).like(f"%{token}%"),
+            func.lower(models.Event.location).like(f"%{token}%"),
+        )
+        for token in tokens
+    ]
+    return query.filter(or_(and_(*conditions), tag_match)), literal_column("0")
@@ -0,0 +1,81 @@
+"""Trending events: a table of time-decayed registration and favorite velocity.
+
+``refresh_trending`` (every ``TRENDING_REFRESH_SECONDS`` from the API, or
+``python -m app.maintenance refresh-trending``) streams the registrations and favorites of the
+last ``TRENDING_WINDOW_DAYS`` for upcoming published events, weighs each one by
+``0.5 ** (age / TRENDING_HALF_LIFE_HOURS)`` and replaces ``event_trending`` in one transaction.
+Readers (``GET /api/events/trending`` and the recommendation fallback) only read that table, so
+no request aggregates raw registrations. It works the same on SQLite and Postgres.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from . import models
+from .config import settings
+from .database import SessionLocal
+from .logging_utils import log_event
+
+REGISTRATION_WEIGHT = 1.0
+FAVORITE_WEIGHT = 0.5
+FETCH_ROWS = 1000
+
+
+@dataclass
+class TrendingStats:
+    events: int = 0
+    signals: int = 0
+    seconds: float = 0.0
+
+
+def _decay(now: datetime, at: datetime | None) -> float:
+    if at is None:
+        return 0.0
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    age_hours = max(0.0, (now - at).total_seconds() / 3600)
+    return 0.5 ** (age_hours / settings.trending_half_life_hours)
+
+
+def refresh_trending() -> TrendingStats:
+    """Recompute every upcoming event's trending score and swap the table contents."""
+    stats = TrendingStats()
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=settings.trending_window_days)
+    upcoming = select(models.Event.id).where(models.Event.start_time >= now, models.Event.status == "published")
+    signals = (
+        (models.Registration, models.Registration.registration_time, REGISTRATION_WEIGHT),
+        (models.FavoriteEvent, models.FavoriteEvent.created_at, FAVORITE_WEIGHT),
+    )
+    db = SessionLocal()
+    try:
+        scores: dict[int, float] = {}
+        for model, created, weight in signals:
+            rows = db.execute(
+                select(model.event_id, created)
+                .where(created >= cutoff, model.event_id.in_(upcoming))
+                .execution_options(yield_per=FETCH_ROWS)
+            )
+            for event_id, at in rows:
+                scores[event_id] = scores.get(event_id, 0.0) + weight * _decay(now, at)
+                stats.signals += 1
+        db.query(models.EventTrending).delete(synchronize_session=False)
+        if scores:
+            db.execute(
+                insert(models.EventTrending),
+                [{"event_id": event_id, "score": score, "computed_at": now} for event_id, score in scores.items()],
+            )
+        db.commit()
+        stats.events = len(scores)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    stats.seconds = time.perf_counter() - started
+    log_event("trending_refreshed", events=stats.events, signals=stats.signals, seconds=round(stats.seconds, 3))
+    return stats
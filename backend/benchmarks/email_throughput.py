@@ -0,0 +1,106 @@
+"""Measure email delivery throughput against a local SMTP sink (aiosmtpd).
+
+Compares the legacy ``smtplib`` path (one connection per message, as used by
+``EMAIL_DELIVERY_MODE=background``) with the async sender for different consumer counts.
+
+    cd backend
+    python benchmarks/email_throughput.py --messages 500 --workers 1 4 8
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class SinkHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _bench_smtplib(total: int) -> float:
+    from app.email_service import _send_email
+
+    started = time.perf_counter()
+    for idx in range(total):
+        _send_email(f"bench{idx}@test.ro", "Benchmark", "Body")
+    return time.perf_counter() - started
+
+
+def _bench_async(total: int, workers: int) -> float:
+    from app.config import settings
+    from app.email_async import AsyncEmailSender, EmailJob
+
+    settings.email_async_workers = workers
+    settings.email_async_queue_size = total
+    sender = AsyncEmailSender()
+
+    async def scenario():
+        started = time.perf_counter()
+        for idx in range(total):
+            await sender.enqueue(EmailJob(f"bench{idx}@test.ro", "Benchmark", "Body"))
+        await sender.stop(timeout=600)
+        return time.perf_counter() - started
+
+    return asyncio.run(scenario())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500, help="Messages per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8], help="Async consumer counts to compare")
+    args = parser.parse_args()
+
+    from aiosmtpd.controller import Controller
+
+    port = _free_port()
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite:///{tmp.name}/bench.db",
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret"),
+            "EMAIL_ENABLED": "true",
+            "SMTP_HOST": "127.0.0.1",
+            "SMTP_PORT": str(port),
+            "SMTP_SENDER": "bench@eventlink.test",
+            "SMTP_USE_TLS": "false",
+        }
+    )
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    handler = SinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        print(f"messages={args.messages} cpus={os.cpu_count()}")
+        print(f"{'path':>14} {'seconds':>9} {'msgs/s':>9} {'received':>9}")
+        runs = [("smtplib", lambda: _bench_smtplib(args.messages))]
+        runs += [(f"async x{workers}", lambda workers=workers: _bench_async(args.messages, workers)) for workers in args.workers]
+        for label, bench in runs:
+            handler.received = 0
+            elapsed = bench()
+            print(f"{label:>14} {elapsed:>9.3f} {args.messages / elapsed:>9.1f} {handler.received:>9}")
+    finally:
+        controller.stop()
+        tmp.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Measure POST /login throughput for different password hashing pool sizes.
+
+Each pool size runs in a fresh interpreter (the executor is sized at import time) against a
+throwaway SQLite database, driving the ASGI app in-process with concurrent httpx clients.
+
+    cd backend
+    python benchmarks/login_throughput.py --workers 1 2 4 8 --requests 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PASSWORD = "benchmark-password"
+
+
+async def _run_logins(total: int, concurrency: int) -> dict:
+    import httpx
+
+    from app import auth, models
+    from app.api import app
+    from app.database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    # Distinct users keep the per-email login rate limit out of the measurement; one shared hash
+    # keeps setup fast.
+    password_hash = auth.get_password_hash(PASSWORD)
+    db = SessionLocal()
+    db.add_all(
+        models.User(email=f"bench{idx}@test.ro", password_hash=password_hash, role=models.UserRole.student)
+        for idx in range(total)
+    )
+    db.commit()
+    db.close()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for idx in range(total):
+        queue.put_nowait(idx)
+    failures = 0
+
+    async def client_loop(client):
+        nonlocal failures
+        while not queue.empty():
+            idx = queue.get_nowait()
+            resp = await client.post("/login", json={"email": f"bench{idx}@test.ro", "password": PASSWORD})
+            if resp.status_code != 200:
+                failures += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"requests": total, "failures": failures, "seconds": round(elapsed, 3), "logins_per_second": round(total / elapsed, 1)}
+
+
+def _run_child(workers: int, total: int, concurrency: int, rounds: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret"),
+            "EMAIL_ENABLED": "false",
+            "PASSWORD_HASH_WORKERS": str(workers),
+            "BCRYPT_ROUNDS": str(rounds),
+        }
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", "--requests", str(total), "--concurrency", str(concurrency)],
+            cwd=BACKEND_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Pool sizes to compare")
+    parser.add_argument("--requests", type=int, default=200, help="Logins per run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, str(BACKEND_DIR))
+        print(json.dumps(asyncio.run(_run_logins(args.requests, args.concurrency))))
+        return 0
+
+    print(f"bcrypt rounds={args.rounds} requests={args.requests} concurrency={args.concurrency} cpus={os.cpu_count()}")
+    print(f"{'workers':>8} {'seconds':>9} {'logins/s':>9} {'failures':>9}")
+    for workers in args.workers:
+        result = _run_child(workers, args.requests, args.concurrency, args.rounds)
+        print(f"{workers:>8} {result['seconds']:>9} {result['logins_per_second']:>9} {result['failures']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Measure the participant CSV export: rows/sec and the server's peak RSS.
+
+Seeds a throwaway SQLite database with one event and ``--participants`` registrations, starts
+uvicorn in a subprocess and streams ``GET /api/organizer/events/{id}/participants.csv`` with and
+without gzip. Peak RSS is the server's ``VmHWM`` (Linux only), read before and after each export.
+
+    cd backend
+    python benchmarks/participants_export.py --participants 50000
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _peak_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _seed(participants: int) -> tuple[int, str]:
+    from sqlalchemy import insert
+
+    from app import auth, models
+    from app.database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    organizer = models.User(email="org@bench.ro", password_hash="-", role=models.UserRole.organizator)
+    db.add(organizer)
+    db.flush()
+    event = models.Event(
+        title="Benchmark",
+        start_time=datetime.now(timezone.utc) + timedelta(days=7),
+        owner_id=organizer.id,
+        seats_taken=participants,
+    )
+    db.add(event)
+    db.commit()
+    db.execute(
+        insert(models.User),
+        [
+            {
+                "email": f"student{idx}@bench.ro",
+                "password_hash": "-",
+                "role": models.UserRole.student,
+                "full_name": f"Student {idx}",
+            }
+            for idx in range(participants)
+        ],
+    )
+    students = db.query(models.User.id).filter(models.User.id != organizer.id).order_by(models.User.id)
+    student_ids = [user_id for (user_id,) in students]
+    start = datetime.now(timezone.utc)
+    db.execute(
+        insert(models.Registration),
+        [
+            {
+                "user_id": user_id,
+                "event_id": event.id,
+                "registration_time": start + timedelta(seconds=idx),
+                "attended": idx % 3 == 0,
+            }
+            for idx, user_id in enumerate(student_ids)
+        ],
+    )
+    db.commit()
+    token = auth.create_access_token(auth.token_claims(organizer))
+    event_id = event.id
+    db.close()
+    return event_id, token
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--participants", type=int, default=50000, help="Registrations to seed")
+    args = parser.parse_args()
+
+    import httpx
+
+    tmp = tempfile.TemporaryDirectory()
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp.name}/bench.db",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret"),
+        "EMAIL_ENABLED": "false",
+        "AUTO_CREATE_TABLES": "false",
+    }
+    os.environ.update(env)
+    sys.path.insert(0, str(BACKEND_DIR))
+    event_id, token = _seed(args.participants)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    url = f"{base_url}/api/organizer/events/{event_id}/participants.csv"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/api/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        print(f"participants={args.participants}")
+        print(f"{'encoding':>9} {'seconds':>8} {'rows/s':>10} {'MiB sent':>9} {'RSS before':>11} {'RSS peak':>9}")
+        for encoding in ("identity", "gzip"):
+            rss_before = _peak_rss_mb(server.pid)
+            sent = 0
+            started = time.perf_counter()
+            headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": encoding}
+            with httpx.stream("GET", url, headers=headers, timeout=300) as resp:
+                resp.raise_for_status()
+                for chunk in resp.iter_raw():
+                    sent += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{encoding:>9} {elapsed:>8.2f} {args.participants / elapsed:>10.0f} {sent / 2**20:>9.1f}"
+                f" {rss_before:>10.1f}M {_peak_rss_mb(server.pid):>8.1f}M"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+        tmp.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Offline evaluation of the recommenders (hit-rate@10) and similarity training time.
+
+Leave-one-out: for every student with at least three registrations one registration is held
+out, the model is trained on the rest and each strategy ranks every event the student is not
+registered for; a hit is the held-out event landing in the top ``--k``. ``popular`` (most
+registrations) is the baseline. Scoring uses the same functions as ``app.recommendations``.
+
+Data is synthetic by default: students follow two of eight topics (events carry their topic's
+tags plus some noise) and belong to cohorts that tend to register for the same events, which
+tags alone cannot see. ``--from-db`` evaluates the registrations in ``DATABASE_URL`` instead.
+Training time is then measured on growing synthetic populations.
+
+    cd backend
+    python benchmarks/recommendations_eval.py --students 5000 --events 2000
+    python benchmarks/recommendations_eval.py --train-sizes 10000 50000 100000
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from app.recommendations import (  # noqa: E402
+    REGISTRATION_WEIGHT,
+    blend,
+    collaborative_scores,
+    item_similarities,
+    tag_score,
+)
+
+TOPICS = 8
+TAGS_PER_TOPIC = 5
+
+
+def synthetic(students: int, events: int, seed: int = 7):
+    """``(baskets, event_tags)``: registrations per student and tag ids per event."""
+    rng = random.Random(seed)
+    event_topic = [rng.randrange(TOPICS) for _ in range(events)]
+    event_tags = {}
+    for event_id, topic in enumerate(event_topic):
+        tags = set(rng.sample(range(topic * TAGS_PER_TOPIC, (topic + 1) * TAGS_PER_TOPIC), rng.randint(1, 3)))
+        if rng.random() < 0.3:
+            tags.add(rng.randrange(TOPICS * TAGS_PER_TOPIC))
+        event_tags[event_id] = tags
+    by_topic = [[e for e in range(events) if event_topic[e] == topic] for topic in range(TOPICS)]
+    # Zipf-like popularity inside each topic.
+    weights = {e: 1 / (1 + rank) for topic in by_topic for rank, e in enumerate(rng.sample(topic, len(topic)))}
+    cohort_events = [rng.sample(range(events), 12) for _ in range(max(1, students // 30))]
+
+    baskets = {}
+    for student in range(students):
+        topics = rng.sample(range(TOPICS), 2)
+        pool = [e for topic in topics for e in by_topic[topic]]
+        basket = set(rng.choices(pool, weights=[weights[e] for e in pool], k=rng.randint(3, 10)))
+        basket.update(e for e in cohort_events[student % len(cohort_events)] if rng.random() < 0.4)
+        baskets[student] = sorted(basket)
+    return baskets, event_tags
+
+
+def from_database():
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        baskets = {}
+        for user_id, event_id in db.query(models.Registration.user_id, models.Registration.event_id):
+            baskets.setdefault(user_id, []).append(event_id)
+        event_tags = {event_id: set() for (event_id,) in db.query(models.Event.id)}
+        for event_id, tag_id in db.query(models.event_tags.c.event_id, models.event_tags.c.tag_id):
+            event_tags[event_id].add(tag_id)
+    finally:
+        db.close()
+    return baskets, event_tags
+
+
+def split(baskets, seed: int = 11):
+    rng = random.Random(seed)
+    train, held_out = {}, {}
+    for student, basket in baskets.items():
+        if len(basket) >= 3:
+            held = rng.choice(basket)
+            held_out[student] = held
+            train[student] = [e for e in basket if e != held]
+        else:
+            train[student] = list(basket)
+    return train, held_out
+
+
+def evaluate(baskets, event_tags, k: int, neighbours: int, cf_weight: float, sample: int):
+    train, held_out = split(baskets)
+    started = time.perf_counter()
+    similarities = item_similarities(train.values(), neighbours=neighbours)
+    train_seconds = time.perf_counter() - started
+
+    popularity = {}
+    for basket in train.values():
+        for event_id in basket:
+            popularity[event_id] = popularity.get(event_id, 0) + 1
+    popular = sorted(event_tags, key=lambda e: (-popularity.get(e, 0), e))
+    events_by_tag = {}
+    for event_id, tags in event_tags.items():
+        for tag_id in tags:
+            events_by_tag.setdefault(tag_id, set()).add(event_id)
+
+    hits = {"popular": 0, "tags": 0, "cf": 0, "blend": 0}
+    students = sorted(held_out)[:sample] if sample else sorted(held_out)
+    for student in students:
+        own = set(train[student])
+        affinity = {}
+        for event_id in own:
+            for tag_id in event_tags.get(event_id, ()):
+                affinity[tag_id] = affinity.get(tag_id, 0.0) + REGISTRATION_WEIGHT
+        norm = math.sqrt(sum(w * w for w in affinity.values()))
+        tags = {}
+        for event_id in set().union(*(events_by_tag.get(t, set()) for t in affinity)) - own:
+            tags[event_id] = tag_score(affinity, norm, event_tags[event_id])[0]
+        edges = [(source, target, sim) for source in own for target, sim in similarities.get(source, ())]
+        cf = {e: score for e, (score, _src) in collaborative_scores(edges).items() if e not in own}
+        combined = {e: blend(tags.get(e, 0.0), cf.get(e, 0.0), cf_weight) for e in set(tags) | set(cf)}
+
+        target = held_out[student]
+        hits["popular"] += target in [e for e in popular if e not in own][:k]
+        for name, scores in (("tags", tags), ("cf", cf), ("blend", combined)):
+            top = sorted(scores, key=lambda e: (-scores[e], e))[:k]
+            hits[name] += target in top
+    return {name: hit / len(students) for name, hit in hits.items()}, len(students), train_seconds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--from-db", action="store_true", help="Evaluate the registrations in DATABASE_URL")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--neighbours", type=int, default=20)
+    parser.add_argument("--cf-weight", type=float, default=0.8)
+    parser.add_argument("--sample", type=int, default=2000, help="Held-out students to score (0 = all)")
+    parser.add_argument("--train-sizes", type=int, nargs="*", default=[5000, 20000, 50000])
+    args = parser.parse_args()
+
+    baskets, event_tags = from_database() if args.from_db else synthetic(args.students, args.events)
+    registrations = sum(len(b) for b in baskets.values())
+    print(f"students={len(baskets)} events={len(event_tags)} registrations={registrations}")
+    rates, evaluated, train_seconds = evaluate(
+        baskets, event_tags, args.k, args.neighbours, args.cf_weight, args.sample
+    )
+    print(f"held-out students scored={evaluated} (training {train_seconds:.2f}s)")
+    print(f"{'strategy':>8} {'hit@' + str(args.k):>8}")
+    for name, rate in rates.items():
+        print(f"{name:>8} {rate:>8.3f}")
+
+    print(f"\n{'students':>9} {'regs':>9} {'pairs':>10} {'seconds':>8} {'regs/s':>9}")
+    for size in args.train_sizes:
+        sized, _tags = synthetic(size, max(args.events, size // 10))
+        regs = sum(len(b) for b in sized.values())
+        started = time.perf_counter()
+        similarities = item_similarities(sized.values(), neighbours=args.neighbours)
+        elapsed = time.perf_counter() - started
+        pairs = sum(len(similar) for similar in similarities.values())
+        print(f"{size:>9} {regs:>9} {pairs:>10} {elapsed:>8.2f} {regs / elapsed:>9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,12 @@ from fastapi.testclient import TestClient
 
 os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
 os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
 
-from app import models, auth
+from app import models, auth, recommendations, trending
+from app import api as api_module
 from app.api import app
+from app.cache import event_list_cache
 from app.database import Base, engine, SessionLocal, get_db
 
 
@@ -16,6 +19,9 @@ from app.database import Base, engine, SessionLocal, get_db
 def reset_db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    event_list_cache.clear()
+    auth.principal_cache.clear()
+    api_module._rate_limit_backend.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -76,6 +82,35 @@ def helpers(client):
     }
 
 
+@pytest.fixture()
+def count_queries():
+    """``with count_queries() as statements:`` collects the SQL run on the sync and async engines."""
+    from contextlib import contextmanager
+
+    from sqlalchemy import event as sa_event
+
+    from app.database import get_async_engine
+
+    engines = [engine, get_async_engine().sync_engine]
+
+    @contextmanager
+    def _counter():
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        for target in engines:
+            sa_event.listen(target, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                sa_event.remove(target, "before_cursor_execute", record)
+
+    return _counter
+
+
 def test_student_registration_and_duplicate_email(helpers):
     client = helpers["client"]
     client.post(
@@ -288,6 +323,17 @@ def test_event_validation_rules(helpers):
     resp = client.post("/api/events", json=bad_payload, headers=helpers["auth_header"](organizer_token))
     assert resp.status_code == 422
 
+    multiline = {
+        "title": "Event\r\nBcc: everyone@test.ro",
+        "description": "Desc",
+        "category": "Tech",
+        "start_time": helpers["future_time"](days=1),
+        "location": "Loc",
+        "max_seats": 10,
+    }
+    resp = client.post("/api/events", json=multiline, headers=helpers["auth_header"](organizer_token))
+    assert resp.status_code == 422
+
 
 def test_recommendations_skip_full_and_past(helpers):
     client = helpers["client"]
@@ -314,7 +360,7 @@ def test_recommendations_skip_full_and_past(helpers):
     student_token = helpers["register_student"]("stud@test.ro")
     client.post(f"/api/events/{full_event['id']}/register", headers=helpers["auth_header"](student_token))
 
-    rec = client.get("/api/recommendations", headers=helpers["auth_header"](student_token)).json()
+    rec = client.get("/api/recommendations", headers=helpers["auth_header"](student_token)).json()["items"]
     titles = [e["title"] for e in rec]
     assert "Full Event" not in titles
     assert "Past Event" not in titles
@@ -389,12 +435,293 @@ def test_recommended_uses_tags_and_excludes_registered(helpers):
 
     rec_resp = client.get("/api/recommendations", headers=helpers["auth_header"](student_token))
     assert rec_resp.status_code == 200
-    rec = rec_resp.json()
+    rec = rec_resp.json()["items"]
     rec_ids = [e["id"] for e in rec]
     assert another_python["id"] in rec_ids
     assert python_event["id"] not in rec_ids
 
 
+def test_recommendations_rank_by_weighted_tag_affinity(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    organizer_token = helpers["login"]("org@test.ro", "organizer123")
+    base = {"description": "Desc", "category": "Tech", "location": "Loc", "max_seats": 10}
+
+    def create(title, days, tags):
+        return client.post(
+            "/api/events",
+            json={**base, "title": title, "start_time": helpers["future_time"](days=days), "tags": tags},
+            headers=helpers["auth_header"](organizer_token),
+        ).json()
+
+    attended = create("Attended", 1, ["python", "ai"])
+    # Created before "Favorite" so that id order and start order disagree on the tie below.
+    create("AI only", 3, ["ai"])
+    favorite = create("Favorite", 6, ["ai"])
+    both = create("Both", 4, ["python", "ai"])
+    create("Python only", 2, ["python"])
+    create("Music", 2, ["music"])
+
+    student_token = helpers["register_student"]("stud@test.ro")
+    student_headers = helpers["auth_header"](student_token)
+    client.post(f"/api/events/{attended['id']}/register", headers=student_headers)
+    client.post(f"/api/events/{favorite['id']}/favorite", headers=student_headers)
+    assert recommendations.refresh_dirty().users == 1
+
+    rec = client.get("/api/recommendations", headers=student_headers).json()["items"]
+    # python=1, ai=1.5 (registration + favorite): cosine ranks the two-tag event first, ties by start time.
+    assert [e["title"] for e in rec] == ["Both", "AI only", "Favorite", "Python only"]
+    assert rec[0]["recommendation_reason"] == "Similar tags: ai, python"
+
+    db = SessionLocal()
+    try:
+        stored = db.query(models.UserRecommendation).order_by(models.UserRecommendation.score.desc()).all()
+        assert [row.event_id for row in stored][0] == both["id"]
+        affinity = {
+            tag: weight
+            for tag, weight in db.query(models.Tag.name, models.UserTagAffinity.weight).join(
+                models.UserTagAffinity, models.UserTagAffinity.tag_id == models.Tag.id
+            )
+        }
+    finally:
+        db.close()
+    assert affinity == {"python": 1.0, "ai": 1.5}
+
+    client.post(f"/api/events/{both['id']}/register", headers=student_headers)
+    recommendations.refresh_dirty()
+    rec = client.get("/api/recommendations", headers=student_headers).json()["items"]
+    assert "Both" not in [e["title"] for e in rec]
+
+
+def test_recommendation_refresh_rescores_only_dirty_events(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    organizer_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+    base = {"description": "Desc", "category": "Tech", "location": "Loc", "max_seats": 10}
+
+    def create(title, days, tags):
+        return client.post(
+            "/api/events",
+            json={**base, "title": title, "start_time": helpers["future_time"](days=days), "tags": tags},
+            headers=organizer_headers,
+        ).json()
+
+    seen = create("Seen", 1, ["rust"])
+    create("Rust 1", 2, ["rust"])
+    students = [helpers["auth_header"](helpers["register_student"](f"s{idx}@test.ro")) for idx in range(3)]
+    for headers in students[:2]:
+        client.post(f"/api/events/{seen['id']}/register", headers=headers)
+    first = recommendations.refresh_dirty(chunk_size=1)
+    assert (first.users, first.events) == (2, 2)
+    assert recommendations.refresh_dirty().users == 0
+
+    # A new matching event reaches both interested students without recomputing them.
+    rust_2 = create("Rust 2", 3, ["rust", "systems"])
+    stats = recommendations.refresh_dirty(chunk_size=1)
+    assert (stats.users, stats.events, stats.scores) == (0, 1, 2)
+    for headers in students[:2]:
+        titles = [e["title"] for e in client.get("/api/recommendations", headers=headers).json()["items"]]
+        assert titles == ["Rust 1", "Rust 2"]
+    fallback = client.get("/api/recommendations", headers=students[2]).json()["items"]
+    assert {e["recommendation_reason"] for e in fallback} == {"Trending / upcoming events"}
+
+    client.put(f"/api/events/{rust_2['id']}", json={"tags": ["music"]}, headers=organizer_headers)
+    recommendations.refresh_dirty()
+    titles = [e["title"] for e in client.get("/api/recommendations", headers=students[0]).json()["items"]]
+    assert titles == ["Rust 1"]
+
+
+def test_registration_that_fills_an_event_marks_it_dirty(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    organizer_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+    base = {"description": "Desc", "category": "Tech", "location": "Loc", "tags": ["rust"]}
+
+    def create(title, days, max_seats):
+        return client.post(
+            "/api/events",
+            json={**base, "title": title, "start_time": helpers["future_time"](days=days), "max_seats": max_seats},
+            headers=organizer_headers,
+        ).json()
+
+    seen = create("Seen", 1, 10)
+    roomy = create("Roomy", 2, 10)
+    last_seat = create("Last seat", 3, 2)
+    interested, first, second = (
+        helpers["auth_header"](helpers["register_student"](email)) for email in ("s0@test.ro", "s1@test.ro", "s2@test.ro")
+    )
+    client.post(f"/api/events/{seen['id']}/register", headers=interested)
+    client.post(f"/api/events/{last_seat['id']}/register", headers=first)
+    recommendations.refresh_dirty()
+
+    def stored():
+        db = SessionLocal()
+        try:
+            user_id = db.query(models.User.id).filter(models.User.email == "s0@test.ro").scalar()
+            rows = db.query(models.UserRecommendation.event_id).filter(models.UserRecommendation.user_id == user_id)
+            return {event_id for (event_id,) in rows}
+        finally:
+            db.close()
+
+    assert stored() == {roomy["id"], last_seat["id"]}
+    # A seat left over: only the student is marked.
+    client.post(f"/api/events/{roomy['id']}/register", headers=second)
+    assert recommendations.refresh_dirty().events == 0
+    # The last seat: the event is rescored and leaves the other student's precomputed rows.
+    client.post(f"/api/events/{last_seat['id']}/register", headers=second)
+    stats = recommendations.refresh_dirty()
+    assert (stats.users, stats.events) == (1, 1)
+    assert stored() == {roomy["id"]}
+
+
+def test_recommendations_strategy_uses_co_registrations(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    organizer_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+    base = {"description": "Desc", "category": "Tech", "location": "Loc", "max_seats": 10}
+
+    def create(title, days, tags):
+        return client.post(
+            "/api/events",
+            json={**base, "title": title, "start_time": helpers["future_time"](days=days), "tags": tags},
+            headers=organizer_headers,
+        ).json()
+
+    workshop = create("Workshop", 1, ["python"])
+    hackathon = create("Hackathon", 2, ["teams"])
+    create("Python talk", 3, ["python"])
+    create("Concert", 4, ["music"])
+    students = [helpers["auth_header"](helpers["register_student"](f"s{idx}@test.ro")) for idx in range(3)]
+    for headers in students[:2]:
+        client.post(f"/api/events/{workshop['id']}/register", headers=headers)
+        client.post(f"/api/events/{hackathon['id']}/register", headers=headers)
+    client.post(f"/api/events/{workshop['id']}/register", headers=students[2])
+
+    trained = recommendations.train_similarities()
+    assert (trained.students, trained.registrations) == (3, 5)
+    recommendations.refresh_all()
+
+    def recommended(strategy):
+        resp = client.get(f"/api/recommendations?strategy={strategy}", headers=students[2])
+        assert resp.status_code == 200
+        return [(e["title"], e["recommendation_reason"]) for e in resp.json()["items"]]
+
+    assert recommended("cf") == [("Hackathon", "Students who registered for Workshop also registered for this event")]
+    assert recommended("tags") == [("Python talk", "Similar tags: python")]
+    # The default RECOMMENDATIONS_CF_WEIGHT (0.8) puts the co-registration ahead of the tag match.
+    assert [title for title, _ in recommended("blend")] == ["Hackathon", "Python talk"]
+    resp = client.get("/api/recommendations?strategy=random", headers=students[2])
+    assert resp.status_code == 400
+
+
+def test_recommendations_paginate_with_cursor_and_filters(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    organizer_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+
+    def create(title, days, category="Tech", max_seats=10):
+        return client.post(
+            "/api/events",
+            json={
+                "title": title,
+                "description": "Desc",
+                "category": category,
+                "location": "Loc",
+                "max_seats": max_seats,
+                "start_time": helpers["future_time"](days=days),
+                "tags": ["python"],
+            },
+            headers=organizer_headers,
+        ).json()
+
+    seed = create("Seed", 1)
+    open_events = [create(f"Open {idx}", 2 + idx, category="Tech" if idx % 2 else "Science") for idx in range(9)]
+    full_events = [create(f"Full {idx}", 2 + idx, max_seats=1) for idx in range(4)]
+    filler = helpers["auth_header"](helpers["register_student"]("filler@test.ro"))
+    for event in full_events:
+        client.post(f"/api/events/{event['id']}/register", headers=filler)
+    student = helpers["auth_header"](helpers["register_student"]("stud@test.ro"))
+    client.post(f"/api/events/{seed['id']}/register", headers=student)
+    recommendations.refresh_dirty()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"page_size": 4, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/recommendations", params=params, headers=student).json()
+        seen += [e["id"] for e in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    # Full events are filtered in SQL, so every page is complete until the last one.
+    assert pages == 3
+    assert sorted(seen) == sorted(e["id"] for e in open_events)
+
+    science = client.get(
+        "/api/recommendations", params={"category": "science", "page_size": 2, "page": 2}, headers=student
+    ).json()
+    assert science["page"] == 2
+    # Equal scores: the sooner event first.
+    assert [e["title"] for e in science["items"]] == ["Open 4", "Open 6"]
+    assert all(e["recommendation_reason"] == "Similar tags: python" for e in science["items"])
+
+    bad = client.get("/api/recommendations", params={"cursor": "not-a-cursor"}, headers=student)
+    assert bad.status_code == 400
+
+
+def test_trending_events_decay_older_signals(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    organizer_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+
+    def create(title, days):
+        return client.post(
+            "/api/events",
+            json={
+                "title": title,
+                "description": "Desc",
+                "category": "Tech",
+                "location": "Loc",
+                "max_seats": 10,
+                "start_time": helpers["future_time"](days=days),
+                "tags": ["python"],
+            },
+            headers=organizer_headers,
+        ).json()
+
+    titles = ["Old", "Fresh", "Liked", "Quiet", "Stale"]
+    old, fresh, liked, quiet, stale = (create(title, idx + 1) for idx, title in enumerate(titles))
+    students = [helpers["auth_header"](helpers["register_student"](f"s{idx}@test.ro")) for idx in range(3)]
+    for headers in students[:2]:
+        client.post(f"/api/events/{old['id']}/register", headers=headers)
+    client.post(f"/api/events/{stale['id']}/register", headers=students[0])
+    client.post(f"/api/events/{fresh['id']}/register", headers=students[0])
+    client.post(f"/api/events/{liked['id']}/favorite", headers=students[1])
+    db = SessionLocal()
+    now = datetime.now(timezone.utc)
+    for event_id, age in ((old["id"], timedelta(days=10)), (stale["id"], timedelta(days=30))):
+        db.query(models.Registration).filter(models.Registration.event_id == event_id).update(
+            {models.Registration.registration_time: now - age}, synchronize_session=False
+        )
+    db.commit()
+    db.close()
+
+    stats = trending.refresh_trending()
+    # Two 10-day-old registrations (2 * 0.5**5) trail one fresh registration and one fresh favorite;
+    # the 30-day-old registration is outside the window.
+    assert (stats.events, stats.signals) == (3, 4)
+    first = client.get("/api/events/trending", params={"page_size": 2}).json()
+    assert [e["title"] for e in first["items"]] == ["Fresh", "Liked"]
+    rest = client.get("/api/events/trending", params={"cursor": first["next_cursor"]}).json()
+    assert [e["title"] for e in rest["items"]] == ["Old"]
+    assert rest["next_cursor"] is None
+
+    # Students without recommendations get trending events first, then everything else.
+    fallback = client.get("/api/recommendations", headers=students[2]).json()["items"]
+    assert [e["title"] for e in fallback] == ["Fresh", "Liked", "Old", "Quiet", "Stale"]
+    assert client.get(f"/api/events/{quiet['id']}").status_code == 200
+
+
 def test_duplicate_registration_blocked(helpers):
     client = helpers["client"]
     helpers["make_organizer"]()
@@ -622,3 +949,718 @@ def test_participants_pagination(helpers):
     assert len(body["participants"]) == 2
     emails = [p["email"] for p in body["participants"]]
     assert emails == sorted(emails, reverse=True)
+
+
+def test_seats_taken_counter_and_reconciliation(helpers):
+    from app.maintenance import find_seat_count_drift, reconcile_seat_counts
+
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    event = client.post(
+        "/api/events",
+        json={
+            "title": "Counter",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](),
+            "location": "Loc",
+            "max_seats": 5,
+            "tags": [],
+        },
+        headers=helpers["auth_header"](org_token),
+    ).json()
+    tokens = [helpers["register_student"](f"c{idx}@test.ro") for idx in range(2)]
+    for token in tokens:
+        client.post(f"/api/events/{event['id']}/register", headers=helpers["auth_header"](token))
+    client.delete(f"/api/events/{event['id']}/register", headers=helpers["auth_header"](tokens[0]))
+
+    db = SessionLocal()
+    try:
+        assert db.get(models.Event, event["id"]).seats_taken == 1
+        assert find_seat_count_drift(db) == []
+
+        db.query(models.Event).filter(models.Event.id == event["id"]).update({models.Event.seats_taken: 4})
+        db.commit()
+        assert reconcile_seat_counts(db, fix=True) == [(event["id"], 4, 1)]
+        assert find_seat_count_drift(db) == []
+    finally:
+        db.close()
+
+    listed = client.get("/api/events").json()["items"][0]
+    assert listed["seats_taken"] == 1
+
+
+def test_parallel_registrations_never_overbook(helpers):
+    from concurrent.futures import ThreadPoolExecutor
+
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    event = client.post(
+        "/api/events",
+        json={
+            "title": "Popular",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](),
+            "location": "Loc",
+            "max_seats": 25,
+            "tags": [],
+        },
+        headers=helpers["auth_header"](org_token),
+    ).json()
+
+    db = SessionLocal()
+    students = [
+        models.User(email=f"rush{idx}@test.ro", password_hash="x", role=models.UserRole.student) for idx in range(200)
+    ]
+    db.add_all(students)
+    db.commit()
+    tokens = [
+        auth.create_access_token({"sub": str(s.id), "email": s.email, "role": s.role.value}) for s in students
+    ]
+    db.close()
+
+    def attempt(token: str) -> int:
+        return client.post(f"/api/events/{event['id']}/register", headers=helpers["auth_header"](token)).status_code
+
+    # Every student tries once, and the first few also hammer the same registration.
+    attempts = tokens + tokens[:5] * 4
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        codes = list(pool.map(attempt, attempts))
+
+    assert codes.count(201) == 25
+    assert set(codes) <= {201, 400, 409}
+    db = SessionLocal()
+    try:
+        assert db.query(models.Registration).filter(models.Registration.event_id == event["id"]).count() == 25
+        assert db.get(models.Event, event["id"]).seats_taken == 25
+    finally:
+        db.close()
+
+
+def test_cursor_pagination_for_events_and_participants(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    same_start = helpers["future_time"](days=4)
+    created = []
+    for idx in range(5):
+        created.append(
+            client.post(
+                "/api/events",
+                json={
+                    "title": f"Cursor {idx}",
+                    "description": "Desc",
+                    "category": "Cat",
+                    # Two events share a start time so the id tie-breaker is exercised.
+                    "start_time": same_start if idx >= 3 else helpers["future_time"](days=idx + 1),
+                    "location": "Loc",
+                    "max_seats": 10,
+                    "tags": [],
+                },
+                headers=helpers["auth_header"](org_token),
+            ).json()["id"]
+        )
+
+    first = client.get("/api/events", params={"page_size": 2}).json()
+    assert first["total"] == 5
+    seen = [e["id"] for e in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get("/api/events", params={"page_size": 2, "cursor": cursor}).json()
+        assert page["total"] is None
+        seen.extend(e["id"] for e in page["items"])
+        cursor = page["next_cursor"]
+    assert seen == created
+
+    with_total = client.get("/api/events", params={"page_size": 2, "cursor": first["next_cursor"], "include_total": True})
+    assert with_total.json()["total"] == 5
+    assert client.get("/api/events", params={"cursor": "not-a-cursor"}).status_code == 400
+
+    event_id = created[0]
+    for idx in range(3):
+        token = helpers["register_student"](f"k{idx}@test.ro")
+        client.post(f"/api/events/{event_id}/register", headers=helpers["auth_header"](token))
+    db = SessionLocal()
+    tied = datetime.now(timezone.utc).replace(microsecond=0)
+    db.query(models.Registration).update({models.Registration.registration_time: tied})
+    db.commit()
+    db.close()
+    url = f"/api/organizer/events/{event_id}/participants"
+    headers = helpers["auth_header"](org_token)
+    page = client.get(url, params={"page_size": 2}, headers=headers).json()
+    emails = [p["email"] for p in page["participants"]]
+    page = client.get(url, params={"page_size": 2, "cursor": page["next_cursor"]}, headers=headers).json()
+    emails.extend(p["email"] for p in page["participants"])
+    assert emails == ["k0@test.ro", "k1@test.ro", "k2@test.ro"]
+    assert page["next_cursor"] is None
+    assert client.get(url, params={"sort_by": "email", "cursor": "x"}, headers=headers).status_code == 400
+
+
+def test_full_text_search_ranks_and_covers_description_and_tags(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    base = {"category": "Tech", "location": "Cluj", "max_seats": 10}
+
+    def create(title, description, tags, days):
+        return client.post(
+            "/api/events",
+            json={**base, "title": title, "description": description, "tags": tags, "start_time": helpers["future_time"](days)},
+            headers=helpers["auth_header"](org_token),
+        ).json()["id"]
+
+    in_description = create("Evening meetup", "Talks about robotics and sensors", [], 1)
+    in_title = create("Robotics Lab", "Hands-on session", [], 2)
+    by_tag = create("Hack night", "Bring a laptop", ["robotics"], 3)
+    create("Party Night", "Music", [], 4)
+
+    result = client.get("/api/events", params={"search": "robot"}).json()
+    ids = [e["id"] for e in result["items"]]
+    assert set(ids) == {in_description, in_title}
+    assert ids[0] == in_title
+    assert result["next_cursor"] is None
+
+    tagged = client.get("/api/events", params={"search": "Robotics"}).json()
+    assert {e["id"] for e in tagged["items"]} == {in_description, in_title, by_tag}
+
+    chronological = client.get("/api/events", params={"search": "robotics", "sort": "start_time"}).json()
+    assert [e["id"] for e in chronological["items"]] == [in_description, in_title, by_tag]
+
+    client.put(
+        f"/api/events/{in_description}",
+        json={"description": "Nothing to see here"},
+        headers=helpers["auth_header"](org_token),
+    )
+    updated = client.get("/api/events", params={"search": "sensors"}).json()
+    assert updated["total"] == 0
+
+
+def test_anonymous_event_list_cache_hits_and_invalidation(helpers):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    event = client.post(
+        "/api/events",
+        json={
+            "title": "Cached",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](),
+            "location": "Loc",
+            "max_seats": 10,
+            "tags": [],
+        },
+        headers=helpers["auth_header"](org_token),
+    ).json()
+
+    before = client.get("/api/health/cache").json()["event_list"]
+    first = client.get("/api/events", params={"page": 1, "page_size": 10}).json()
+    second = client.get("/api/events", params={"page_size": 10, "page": 1}).json()
+    assert first == second
+    stats = client.get("/api/health/cache").json()["event_list"]
+    assert stats["hits"] == before["hits"] + 1
+    assert stats["misses"] == before["misses"] + 1
+
+    # Authenticated callers bypass the cache entirely.
+    client.get("/api/events", headers=helpers["auth_header"](org_token))
+    assert client.get("/api/health/cache").json()["event_list"]["hits"] == stats["hits"]
+
+    student_token = helpers["register_student"]("cache@test.ro")
+    client.post(f"/api/events/{event['id']}/register", headers=helpers["auth_header"](student_token))
+    refreshed = client.get("/api/events", params={"page": 1, "page_size": 10}).json()
+    assert refreshed["items"][0]["seats_taken"] == 1
+
+
+def test_rate_limit_headers_and_retry_after(helpers):
+    from app import api
+
+    client = helpers["client"]
+    api._rate_limit_backend.clear()
+    payload = {"token": "missing", "new_password": "newpass123", "confirm_password": "newpass123"}
+    try:
+        first = client.post("/password/reset", json=payload)
+        assert first.status_code == 400
+        assert first.headers["X-RateLimit-Limit"] == "10"
+        assert first.headers["X-RateLimit-Remaining"] == "9"
+        assert int(first.headers["X-RateLimit-Reset"]) <= 300
+        for _ in range(9):
+            client.post("/password/reset", json=payload)
+        limited = client.post("/password/reset", json=payload)
+        assert limited.status_code == 429
+        assert 1 <= int(limited.headers["Retry-After"]) <= 600
+        assert limited.headers["X-RateLimit-Remaining"] == "0"
+    finally:
+        api._rate_limit_backend.clear()
+
+
+def test_password_hashing_runs_on_dedicated_pool(helpers, monkeypatch):
+    import threading
+
+    client = helpers["client"]
+    threads = []
+    original_hash, original_verify = auth.get_password_hash, auth.verify_password
+
+    def tracking_hash(password):
+        threads.append(threading.current_thread().name)
+        return original_hash(password)
+
+    def tracking_verify(plain, hashed):
+        threads.append(threading.current_thread().name)
+        return original_verify(plain, hashed)
+
+    monkeypatch.setattr(auth, "get_password_hash", tracking_hash)
+    monkeypatch.setattr(auth, "verify_password", tracking_verify)
+
+    helpers["register_student"]("pool@test.ro")
+    assert client.post("/login", json={"email": "pool@test.ro", "password": "wrong-password"}).status_code == 401
+    helpers["login"]("pool@test.ro", "password123")
+    assert len(threads) == 3
+    assert all(name.startswith("password-hash") for name in threads)
+
+    db = SessionLocal()
+    stored_hash = db.query(models.User).filter(models.User.email == "pool@test.ro").one().password_hash
+    db.close()
+    assert stored_hash.startswith("$2b$04$")  # BCRYPT_ROUNDS is honoured
+
+
+def test_principal_cache_skips_user_lookup_and_is_invalidated(helpers, count_queries, monkeypatch):
+    from app.config import settings
+
+    client = helpers["client"]
+    token = helpers["register_student"]("principal@test.ro")
+    headers = helpers["auth_header"](token)
+    with count_queries() as statements:
+        assert client.get("/me", headers=headers).json()["role"] == "student"
+        assert client.get("/me", headers=headers).json()["email"] == "principal@test.ro"
+    assert len([s for s in statements if "FROM users" in s]) == 1
+
+    # Role changes are visible immediately with the same token.
+    monkeypatch.setattr(settings, "organizer_invite_code", "invite")
+    assert client.post("/organizer/upgrade", json={"invite_code": "invite"}, headers=headers).json() == {"status": "upgraded"}
+    assert client.get("/me", headers=headers).json()["role"] == "organizator"
+
+    # A password reset revokes tokens issued before it.
+    client.post("/password/forgot", json={"email": "principal@test.ro"})
+    db = SessionLocal()
+    reset_token = db.query(models.PasswordResetToken).filter(models.PasswordResetToken.used == False).first().token
+    db.close()
+    client.post("/password/reset", json={"token": reset_token, "new_password": "newpass123", "confirm_password": "newpass123"})
+    assert client.get("/me", headers=headers).status_code == 401
+    fresh = helpers["login"]("principal@test.ro", "newpass123")
+    assert client.get("/me", headers=helpers["auth_header"](fresh)).status_code == 200
+
+
+def test_db_pool_metrics_endpoint(helpers):
+    client = helpers["client"]
+    before = client.get("/api/health/db").json()["pool"]
+    assert client.get("/api/health").status_code == 200
+    after = client.get("/api/health/db").json()["pool"]
+    assert after["checkouts"] > before["checkouts"]
+    assert after["pool_size"] == 10 and after["max_overflow"] == 20
+    assert after["checked_out"] == 0
+    assert after["timeouts"] == 0
+
+
+def test_public_reads_run_on_async_engine_with_sync_fallback(helpers, monkeypatch):
+    from app.config import settings
+
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    event_id = client.post(
+        "/api/events",
+        json={
+            "title": "Async read",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](days=2),
+            "location": "Loc",
+            "max_seats": 10,
+            "tags": ["async"],
+        },
+        headers=helpers["auth_header"](org_token),
+    ).json()["id"]
+
+    def read_all():
+        listing = client.get("/api/events", params={"search": "async"})
+        detail = client.get(f"/api/events/{event_id}")
+        ics = client.get(f"/api/events/{event_id}/ics")
+        missing = client.get("/api/events/999999/ics")
+        assert listing.status_code == detail.status_code == ics.status_code == 200
+        assert missing.status_code == 404
+        return listing.json()["items"], detail.json()["tags"], ics.text.count("BEGIN:VEVENT")
+
+    async_result = read_all()
+    assert client.get("/api/health/db").json()["async_pool"]["checkouts"] > 0
+    event_list_cache.clear()
+    monkeypatch.setattr(settings, "async_db_enabled", False)
+    assert read_all() == async_result
+    assert async_result[0][0]["id"] == event_id
+
+
+def test_event_lists_run_a_fixed_number_of_queries(helpers, count_queries):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    student_token = helpers["register_student"]("n1@test.ro")
+    db = SessionLocal()
+    organizer_id = db.query(models.User).filter(models.User.email == "org@test.ro").one().id
+    db.close()
+    endpoints = [
+        ("/api/events?page_size=100", None),
+        ("/api/organizer/events", org_token),
+        (f"/api/organizers/{organizer_id}", None),
+        ("/api/me/events", student_token),
+        ("/api/me/favorites", student_token),
+    ]
+
+    def statements_per_endpoint():
+        counts = {}
+        for path, token in endpoints:
+            headers = helpers["auth_header"](token) if token else {}
+            client.get(path, headers=headers)  # warm the principal cache
+            event_list_cache.clear()
+            with count_queries() as statements:
+                assert client.get(path, headers=headers).status_code == 200
+            counts[path] = len(statements)
+        return counts
+
+    def add_events(count, offset):
+        for idx in range(offset, offset + count):
+            event_id = client.post(
+                "/api/events",
+                json={
+                    "title": f"N+1 {idx}",
+                    "description": "Desc",
+                    "category": "Cat",
+                    "start_time": helpers["future_time"](days=idx + 1),
+                    "location": "Loc",
+                    "max_seats": 10,
+                    "tags": [f"tag{idx}", "shared"],
+                },
+                headers=helpers["auth_header"](org_token),
+            ).json()["id"]
+            client.post(f"/api/events/{event_id}/register", headers=helpers["auth_header"](student_token))
+            client.post(f"/api/events/{event_id}/favorite", headers=helpers["auth_header"](student_token))
+
+    add_events(2, 0)
+    small = statements_per_endpoint()
+    add_events(10, 2)
+    large = statements_per_endpoint()
+    assert large == small
+    assert max(large.values()) <= 5
+
+
+def test_request_db_instrumentation_headers_and_slow_query_log(helpers, monkeypatch, caplog):
+    import logging
+
+    from app.config import settings
+
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    token = helpers["login"]("org@test.ro", "organizer123")
+
+    def db_timing(resp):
+        db_part = next(part for part in resp.headers["server-timing"].split(", ") if part.startswith("db;"))
+        return int(db_part.split('desc="')[1].split(" ")[0])
+
+    # Async (run_read) and threadpool (sync handler) paths are both attributed to the request.
+    assert db_timing(client.get("/api/events")) >= 1
+    assert db_timing(client.get("/api/organizer/events", headers=helpers["auth_header"](token))) >= 1
+    assert db_timing(client.get("/")) == 0
+
+    monkeypatch.setattr(settings, "slow_query_ms", 0.000001)
+    with caplog.at_level(logging.INFO):
+        client.get("/api/events", params={"category": "Muzica"})
+    access = [r for r in caplog.records if r.getMessage() == "request_completed" and r.path == "/api/events"]
+    assert access and access[-1].status == 200 and access[-1].db_queries >= 1
+    slow = [r for r in caplog.records if r.getMessage() == "slow_query"]
+    assert slow and all(len(r.fingerprint) == 16 for r in slow)
+    assert any("lower(events.category) = ?" in r.statement for r in slow)
+    assert not any("Muzica" in r.statement for r in slow)
+
+
+def test_metrics_endpoint_exposes_latency_rate_limits_and_emails(helpers):
+    from app import api
+
+    client = helpers["client"]
+    api._rate_limit_backend.clear()
+    client.get("/api/events")
+    client.get("/api/events/12345")
+    payload = {"token": "missing", "new_password": "newpass123", "confirm_password": "newpass123"}
+    try:
+        for _ in range(11):
+            client.post("/password/reset", json=payload)
+    finally:
+        api._rate_limit_backend.clear()
+    helpers["register_student"]("metrics@test.ro")
+    client.post("/password/forgot", json={"email": "metrics@test.ro"})
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert 'eventlink_http_request_duration_seconds_count{method="GET",route="/api/events",status="200"}' in body
+    assert 'route="/api/events/{event_id}",status="404"' in body
+    assert 'eventlink_rate_limit_rejections_total{action="password_reset"}' in body
+    assert 'eventlink_email_outbox_pending 1.0' in body
+    assert 'eventlink_db_pool{engine="sync",stat="checkouts"}' in body
+    assert 'eventlink_cache{cache="event_list",stat="misses"}' in body
+
+
+def test_registration_and_password_reset_emails_go_to_outbox(helpers, monkeypatch):
+    from app.config import settings
+
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_token = helpers["login"]("org@test.ro", "organizer123")
+    event_id = client.post(
+        "/api/events",
+        json={
+            "title": "Outbox",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](days=3),
+            "location": "Loc",
+            "max_seats": 1,
+            "tags": [],
+        },
+        headers=helpers["auth_header"](org_token),
+    ).json()["id"]
+    first = helpers["register_student"]("outbox1@test.ro")
+    second = helpers["register_student"]("outbox2@test.ro")
+    assert client.post(f"/api/events/{event_id}/register", headers=helpers["auth_header"](first)).status_code == 201
+    # A rejected registration leaves nothing behind.
+    assert client.post(f"/api/events/{event_id}/register", headers=helpers["auth_header"](second)).status_code == 409
+    client.post("/password/forgot", json={"email": "outbox2@test.ro"}, headers={"Accept-Language": "en"})
+
+    db = SessionLocal()
+    rows = db.query(models.EmailOutbox).order_by(models.EmailOutbox.id).all()
+    assert [(row.to_email, row.status) for row in rows] == [("outbox1@test.ro", "pending"), ("outbox2@test.ro", "pending")]
+    assert rows[0].context == {"user_id": rows[0].context["user_id"], "event_id": event_id, "lang": "ro"}
+    assert rows[1].subject == "Reset your EventLink password"
+    db.close()
+
+    monkeypatch.setattr(settings, "email_delivery_mode", "background")
+    client.post("/password/forgot", json={"email": "outbox1@test.ro"})
+    db = SessionLocal()
+    assert db.query(models.EmailOutbox).count() == 2
+    db.close()
+
+
+def test_schedule_changes_and_deletion_notify_registrants_in_chunks(helpers, monkeypatch):
+    from app import email_templates
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "notification_chunk_size", 2)
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+    event_id = client.post(
+        "/api/events",
+        json={
+            "title": "Fan-out",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](days=3),
+            "location": "Aula",
+            "max_seats": 10,
+            "tags": [],
+        },
+        headers=org_headers,
+    ).json()["id"]
+    for idx in range(5):
+        token = helpers["register_student"](f"fan{idx}@test.ro")
+        lang = "en-US,en;q=0.9" if idx < 2 else "ro"
+        headers = {**helpers["auth_header"](token), "Accept-Language": lang}
+        assert client.post(f"/api/events/{event_id}/register", headers=headers).status_code == 201
+
+    resp = client.put(f"/api/events/{event_id}", json={"title": "Fan-out 2"}, headers=org_headers)
+    assert "X-Notification-Job" not in resp.headers
+
+    before = email_templates.registry.render_cache.stats()
+    resp = client.put(f"/api/events/{event_id}", json={"location": "Sala 2"}, headers=org_headers)
+    assert resp.status_code == 200
+    job_id = resp.headers["X-Notification-Job"]
+    after = email_templates.registry.render_cache.stats()
+    # Three chunks, two languages: each language is rendered once.
+    assert after["misses"] - before["misses"] == 2
+    assert after["hits"] - before["hits"] == 3
+
+    progress = client.get(f"/api/notification-jobs/{job_id}", headers=org_headers).json()
+    assert (progress["status"], progress["processed"], progress["total"]) == ("done", 5, 5)
+    db = SessionLocal()
+    updates = db.query(models.EmailOutbox).filter(models.EmailOutbox.subject.like("%Fan-out 2")).all()
+    assert sorted(row.subject for row in updates) == ["Eveniment modificat: Fan-out 2"] * 3 + ["Event updated: Fan-out 2"] * 2
+    assert all("Sala 2" in row.body_text for row in updates)
+    db.close()
+
+    resp = client.delete(f"/api/events/{event_id}", headers=org_headers)
+    assert resp.status_code == 204
+    cancel_job = resp.headers["X-Notification-Job"]
+    assert client.get(f"/api/notification-jobs/{cancel_job}", headers=org_headers).json()["processed"] == 5
+    db = SessionLocal()
+    cancelled = db.query(models.EmailOutbox).filter(models.EmailOutbox.subject.like("Event% cancelled%")).count()
+    assert cancelled == 2
+    assert db.query(models.EmailOutbox).filter(models.EmailOutbox.subject == "Eveniment anulat: Fan-out 2").count() == 3
+    db.close()
+
+    student_headers = helpers["auth_header"](helpers["login"]("fan0@test.ro", "password123"))
+    assert client.get(f"/api/notification-jobs/{cancel_job}", headers=student_headers).status_code == 403
+
+
+@pytest.mark.parametrize("mode", ["background", "async"])
+def test_notifications_follow_the_delivery_mode(helpers, monkeypatch, mode):
+    from app import notifications
+    from app.config import settings
+
+    sent = []
+    monkeypatch.setattr(settings, "email_delivery_mode", mode)
+    monkeypatch.setattr(notifications, "_send_email", lambda to, subject, *args: sent.append((to, subject)))
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+    event_id = client.post(
+        "/api/events",
+        json={
+            "title": "Moved",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](days=3),
+            "location": "Aula",
+            "max_seats": 10,
+            "tags": [],
+        },
+        headers=org_headers,
+    ).json()["id"]
+    for idx in range(3):
+        client.post(f"/api/events/{event_id}/register", headers=helpers["auth_header"](helpers["register_student"](f"m{idx}@test.ro")))
+
+    resp = client.put(f"/api/events/{event_id}", json={"location": "Sala 2"}, headers=org_headers)
+    assert resp.status_code == 200
+    # No email worker runs in these modes, so nothing may be left in the outbox. Without a running
+    # in-process sender (no startup hooks here) async jobs send from their own thread.
+    db = SessionLocal()
+    assert db.query(models.EmailOutbox).count() == 0
+    db.close()
+    assert sorted(sent) == [(f"m{idx}@test.ro", "Eveniment modificat: Moved") for idx in range(3)]
+
+
+def test_participants_csv_export_streams_and_compresses(helpers, monkeypatch):
+    import csv
+    import gzip
+    import io
+
+    from app import exports
+
+    monkeypatch.setattr(exports, "CHUNK_BYTES", 1)
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+    event_id = client.post(
+        "/api/events",
+        json={
+            "title": "Export",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](days=3),
+            "location": "Aula",
+            "max_seats": 10,
+            "tags": [],
+        },
+        headers=org_headers,
+    ).json()["id"]
+    for idx in range(3):
+        token = helpers["register_student"](f"csv{idx}@test.ro")
+        client.post(f"/api/events/{event_id}/register", headers=helpers["auth_header"](token))
+    db = SessionLocal()
+    db.query(models.User).filter(models.User.email == "csv0@test.ro").update({"full_name": "=HYPERLINK(1)"})
+    db.query(models.Event).filter(models.Event.id == event_id).update({"cover_url": "https://img.test/c.png"})
+    db.commit()
+    db.close()
+
+    listing = client.get(f"/api/organizer/events/{event_id}/participants", headers=org_headers).json()
+    student_ids = [row["id"] for row in listing["participants"]]
+    for student_id, attended in zip(student_ids, ("true", "true", "false")):
+        client.put(
+            f"/api/organizer/events/{event_id}/participants/{student_id}", params={"attended": attended}, headers=org_headers
+        )
+
+    url = f"/api/organizer/events/{event_id}/participants.csv"
+    with client.stream("GET", url, headers={**org_headers, "Accept-Encoding": "gzip"}) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-encoding"] == "gzip"
+        raw = b"".join(resp.iter_raw())
+    rows = list(csv.reader(io.StringIO(gzip.decompress(raw).decode("utf-8"))))
+    assert rows[0] == list(exports.PARTICIPANT_COLUMNS)
+    assert [row[1] for row in rows[1:]] == ["csv0@test.ro", "csv1@test.ro", "csv2@test.ro"]
+    assert rows[1][0] == "'=HYPERLINK(1)"
+    assert [row[3] for row in rows[1:]] == ["prezent", "prezent", "absent"]
+    assert rows[2][4] == "https://img.test/c.png"
+
+    plain = client.get(url, headers={**org_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["content-type"].startswith("text/csv")
+    assert list(csv.reader(io.StringIO(plain.text))) == rows
+
+    helpers["make_organizer"]("other@test.ro", "organizer123")
+    other_headers = helpers["auth_header"](helpers["login"]("other@test.ro", "organizer123"))
+    assert client.get(url, headers=other_headers).status_code == 403
+
+
+def test_conditional_get_returns_304_from_a_single_probe(helpers, count_queries):
+    client = helpers["client"]
+    helpers["make_organizer"]()
+    org_headers = helpers["auth_header"](helpers["login"]("org@test.ro", "organizer123"))
+    event_id = client.post(
+        "/api/events",
+        json={
+            "title": "Etag",
+            "description": "Desc",
+            "category": "Cat",
+            "start_time": helpers["future_time"](days=3),
+            "location": "Aula",
+            "max_seats": 10,
+            "tags": [],
+        },
+        headers=org_headers,
+    ).json()["id"]
+    student_headers = helpers["auth_header"](helpers["register_student"]("etag@test.ro"))
+
+    for path in (f"/api/events/{event_id}", f"/api/events/{event_id}/ics"):
+        first = client.get(path)
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"') and first.headers["last-modified"].endswith("GMT")
+        with count_queries() as statements:
+            resp = client.get(path, headers={"If-None-Match": etag})
+        assert resp.status_code == 304 and resp.content == b""
+        assert len(statements) == 1
+        assert client.get(path, headers={"If-Modified-Since": first.headers["last-modified"]}).status_code == 304
+        assert client.get(path, headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+    detail_etag = client.get(f"/api/events/{event_id}").headers["etag"]
+    calendar = client.get("/api/me/calendar", headers=student_headers)
+    assert calendar.headers["cache-control"] == "private, no-cache"
+    # Registering bumps the seat counter (event) and adds a registration (calendar).
+    client.post(f"/api/events/{event_id}/register", headers=student_headers)
+    assert client.get(f"/api/events/{event_id}", headers={"If-None-Match": detail_etag}).status_code == 200
+    conditional = {**student_headers, "If-None-Match": calendar.headers["etag"]}
+    refreshed = client.get("/api/me/calendar", headers=conditional)
+    assert refreshed.status_code == 200 and "event-" in refreshed.text
+    conditional = {**student_headers, "If-None-Match": refreshed.headers["etag"]}
+    assert client.get("/api/me/calendar", headers=conditional).status_code == 304
+
+    # The per-user state (registered/favorite) is part of the detail ETag.
+    mine = client.get(f"/api/events/{event_id}", headers=student_headers)
+    client.post(f"/api/events/{event_id}/favorite", headers=student_headers)
+    conditional = {**student_headers, "If-None-Match": mine.headers["etag"]}
+    assert client.get(f"/api/events/{event_id}", headers=conditional).status_code == 200
+
+    profile = client.get("/api/organizers/1")
+    assert "last-modified" not in profile.headers
+    assert client.get("/api/organizers/1", headers={"If-None-Match": profile.headers["etag"]}).status_code == 304
+    client.put(f"/api/events/{event_id}", json={"tags": ["nou"]}, headers=org_headers)
+    assert client.get("/api/organizers/1", headers={"If-None-Match": profile.headers["etag"]}).status_code == 200
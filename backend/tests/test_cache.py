@@ -0,0 +1,91 @@
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app.cache import MISSING, CacheBackend, MemoryCacheBackend, RedisCacheBackend, ResponseCache
+
+
+def test_memory_backend_lru_eviction_and_stats():
+    cache = MemoryCacheBackend(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["entries"] == 2
+
+
+def test_memory_backend_expiry_and_incr():
+    cache = MemoryCacheBackend(max_entries=10)
+    cache.set("k", "v", ttl=0.05)
+    assert cache.incr("n", ttl=0.05) == 1
+    assert cache.incr("n", amount=2) == 3
+    time.sleep(0.06)
+    assert cache.get("k") is MISSING
+    assert cache.incr("n") == 1
+
+
+def test_response_cache_invalidation_and_disabled():
+    cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl_seconds=60)
+    cache.set(("page", 1), {"items": []})
+    assert cache.get(("page", 1)) == {"items": []}
+    cache.invalidate()
+    assert cache.get(("page", 1)) is MISSING
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    disabled = ResponseCache(MemoryCacheBackend(max_entries=10), ttl_seconds=0)
+    disabled.set("k", "v")
+    assert disabled.get("k") is MISSING
+
+
+def test_redis_backend_is_shared_between_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    worker_a = RedisCacheBackend(fakeredis.FakeRedis(server=server), prefix="eventlink:test")
+    worker_b = RedisCacheBackend(fakeredis.FakeRedis(server=server), prefix="eventlink:test")
+
+    # Counters (rate limiting) accumulate across workers.
+    assert worker_a.incr("login:x", ttl=60) == 1
+    assert worker_b.incr("login:x", ttl=60) == 2
+
+    # A response cached by one worker is served by the other until either invalidates.
+    cache_a = ResponseCache(worker_a, ttl_seconds=30)
+    cache_b = ResponseCache(worker_b, ttl_seconds=30)
+    cache_a.set(("events", 1), {"items": [1, 2]})
+    assert cache_b.get(("events", 1)) == {"items": [1, 2]}
+    cache_b.invalidate()
+    assert cache_a.get(("events", 1)) is MISSING
+
+    worker_a.clear()
+    assert worker_b.get("login:x") is MISSING
+
+
+def test_memory_backend_sweeps_idle_keys():
+    cache = MemoryCacheBackend(max_entries=100, sweep_interval=0)
+    for idx in range(10):
+        cache.incr(f"login:user{idx}", ttl=0.01)
+    time.sleep(0.02)
+    cache.incr("login:fresh", ttl=60)  # any write triggers the periodic sweep
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["expired"] == 10
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return MISSING
+
+    with pytest.raises(TypeError):
+        GetOnly()
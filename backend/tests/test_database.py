@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app import database
+
+
+def test_exhausted_pool_records_waits_and_timeouts(tmp_path, monkeypatch):
+    metrics = database.PoolMetrics()
+    monkeypatch.setattr(database.InstrumentedQueuePool, "metrics", metrics)
+    pool = database.InstrumentedQueuePool(
+        lambda: sqlite3.connect(tmp_path / "pool.db", check_same_thread=False), pool_size=1, max_overflow=0, timeout=0.05
+    )
+    held = pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+
+    released = threading.Timer(0.02, held.close)
+    released.start()
+    second = pool.connect()  # blocks until the timer returns the only connection
+    second.close()
+    released.join()
+
+    stats = metrics.snapshot(pool)
+    assert stats["waits"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["max_wait_seconds"] >= 0.01
+    assert stats["pool_size"] == 1 and stats["checked_out"] == 0
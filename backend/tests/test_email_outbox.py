@@ -0,0 +1,232 @@
+import asyncio
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app import email_worker, models
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.email_async import AsyncEmailSender, EmailJob
+from app.email_service import enqueue_email
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((session.peer, envelope.rcpt_tos, envelope.content))
+        return "250 OK"
+
+
+@pytest.fixture(autouse=True)
+def reset_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def smtp_settings(monkeypatch):
+    port = _free_port()
+    monkeypatch.setattr(settings, "email_enabled", True)
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", port)
+    monkeypatch.setattr(settings, "smtp_sender", "noreply@eventlink.test")
+    monkeypatch.setattr(settings, "smtp_use_tls", False)
+    monkeypatch.setattr(settings, "smtp_username", None)
+    return port
+
+
+@pytest.fixture()
+def smtp_server(smtp_settings):
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=smtp_settings)
+    controller.start()
+    yield handler
+    controller.stop()
+
+
+def _enqueue(count: int) -> None:
+    db = SessionLocal()
+    for idx in range(count):
+        enqueue_email(db, f"student{idx}@test.ro", f"Subject {idx}", "Body", "<p>Body</p>", context={"idx": idx})
+    db.commit()
+    db.close()
+
+
+def test_worker_sends_batch_over_one_connection(smtp_server):
+    _enqueue(3)
+    smtp = email_worker.SmtpSession()
+    email_worker.run(once=True, smtp=smtp)
+
+    assert smtp.connections_opened == 1
+    assert len(smtp_server.messages) == 3
+    assert len({peer for peer, _, _ in smtp_server.messages}) == 1
+    assert smtp_server.messages[0][1] == ["student0@test.ro"]
+    db = SessionLocal()
+    rows = db.query(models.EmailOutbox).order_by(models.EmailOutbox.id).all()
+    assert [(row.status, row.attempts) for row in rows] == [("sent", 1)] * 3
+    assert all(row.sent_at is not None for row in rows)
+    db.close()
+
+
+def test_bad_row_fails_alone_and_keeps_the_rest_of_the_batch(smtp_server):
+    db = SessionLocal()
+    for idx, subject in enumerate(["First", "Broken\nSubject", "Last"]):
+        enqueue_email(db, f"student{idx}@test.ro", subject, "Body", None)
+    db.commit()
+
+    assert email_worker.deliver_batch(db, email_worker.SmtpSession()) == {"sent": 2, "retry": 0, "failed": 1}
+    rows = db.query(models.EmailOutbox).order_by(models.EmailOutbox.id).all()
+    # The malformed message cannot succeed later, so it fails without using up retries.
+    assert [(row.status, row.attempts) for row in rows] == [("sent", 1), ("failed", 1), ("sent", 1)]
+    assert "linefeed" in rows[1].last_error
+    assert [rcpt for _, rcpt, _ in smtp_server.messages] == [["student0@test.ro"], ["student2@test.ro"]]
+    db.close()
+
+
+def test_worker_survives_a_failing_batch(smtp_settings, monkeypatch):
+    def broken(db, smtp):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(email_worker, "deliver_batch", broken)
+    email_worker.run(once=True, smtp=email_worker.SmtpSession())
+
+
+def test_unreachable_server_backs_off_then_fails(smtp_settings, monkeypatch):
+    monkeypatch.setattr(settings, "email_outbox_max_attempts", 2)
+    _enqueue(2)
+    before = datetime.now(timezone.utc)
+    smtp = email_worker.SmtpSession()
+
+    db = SessionLocal()
+    assert email_worker.deliver_batch(db, smtp) == {"sent": 0, "retry": 2, "failed": 0}
+    rows = db.query(models.EmailOutbox).all()
+    for row in rows:
+        next_attempt = row.next_attempt_at.replace(tzinfo=row.next_attempt_at.tzinfo or timezone.utc)
+        assert row.status == "pending" and row.attempts == 1 and row.last_error
+        # First retry waits between half and the full base delay.
+        assert before + timedelta(seconds=settings.email_outbox_backoff_seconds / 2) <= next_attempt
+        assert next_attempt <= before + timedelta(seconds=settings.email_outbox_backoff_seconds + 1)
+    assert email_worker.deliver_batch(db, smtp) == {"sent": 0, "retry": 0, "failed": 0}  # not due yet
+
+    for row in rows:
+        row.next_attempt_at = before
+    db.commit()
+    assert email_worker.deliver_batch(db, smtp) == {"sent": 0, "retry": 0, "failed": 2}
+    assert {row.status for row in db.query(models.EmailOutbox).all()} == {"failed"}
+    db.close()
+
+
+def test_backoff_grows_exponentially_and_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "email_outbox_backoff_seconds", 10)
+    monkeypatch.setattr(settings, "email_outbox_backoff_max_seconds", 100)
+    assert 5 <= email_worker.backoff_delay(1) <= 10
+    assert 20 <= email_worker.backoff_delay(3) <= 40
+    assert 50 <= email_worker.backoff_delay(10) <= 100
+
+
+def _jobs(count: int) -> list[EmailJob]:
+    return [EmailJob(f"student{idx}@test.ro", f"Subject {idx}", "Body", context={"idx": idx}) for idx in range(count)]
+
+
+def test_async_sender_keeps_one_connection_per_consumer(smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "email_async_workers", 2)
+    sender = AsyncEmailSender()
+
+    async def scenario():
+        results = [await sender.enqueue(job) for job in _jobs(6)]
+        await sender.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [True] * 6
+    assert len(smtp_server.messages) == 6
+    assert sum(conn.connections_opened for conn in sender.connections) <= 2
+    assert not sender.running
+
+
+def test_async_sender_defers_overflow_to_outbox(smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "email_async_workers", 1)
+    monkeypatch.setattr(settings, "email_async_queue_size", 1)
+    sender = AsyncEmailSender()
+
+    async def scenario():
+        # The consumer has not run yet, so the second message finds the queue full.
+        results = [await sender.enqueue(job) for job in _jobs(2)]
+        await sender.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [True, False]
+    assert [rcpt for _, rcpt, _ in smtp_server.messages] == [["student0@test.ro"]]
+    db = SessionLocal()
+    assert [(row.to_email, row.status) for row in db.query(models.EmailOutbox).all()] == [("student1@test.ro", "pending")]
+    db.close()
+
+
+def test_async_sender_accepts_jobs_from_other_threads(smtp_server):
+    sender = AsyncEmailSender()
+    assert sender.submit(_jobs(1)[0]) is False  # not running: the caller sends it itself
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def start():
+        sender.start()
+
+    asyncio.run_coroutine_threadsafe(start(), loop).result()
+    assert [sender.submit(job) for job in _jobs(2)] == [True, True]
+    asyncio.run_coroutine_threadsafe(sender.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    assert sorted(rcpt[0] for _, rcpt, _ in smtp_server.messages) == ["student0@test.ro", "student1@test.ro"]
+
+
+def test_async_sender_skips_when_smtp_is_not_configured(monkeypatch):
+    monkeypatch.setattr(settings, "email_enabled", True)
+    monkeypatch.setattr(settings, "smtp_host", None)
+    sender = AsyncEmailSender()
+
+    async def scenario():
+        return await sender.enqueue(_jobs(1)[0])
+
+    assert asyncio.run(scenario()) is False
+    # Like the sync path: no consumers, no connection attempts, nothing deferred.
+    assert not sender.running
+    db = SessionLocal()
+    assert db.query(models.EmailOutbox).count() == 0
+    db.close()
+
+
+@pytest.mark.parametrize("policy, expected_rows", [("defer", 2), ("drop", 0)])
+def test_async_sender_shutdown_hands_off_undelivered(smtp_settings, monkeypatch, policy, expected_rows):
+    # No server listens on the port: nothing can be delivered before the drain window closes.
+    monkeypatch.setattr(settings, "email_async_overflow", policy)
+    sender = AsyncEmailSender(retry_delay=0)
+
+    async def scenario():
+        for job in _jobs(2):
+            await sender.enqueue(job)
+        await sender.stop(timeout=0)
+
+    asyncio.run(scenario())
+    assert sender.qsize() == 0
+    db = SessionLocal()
+    assert db.query(models.EmailOutbox).count() == expected_rows
+    db.close()
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app.email_templates import (
+    TemplateRegistry,
+    negotiate_language,
+    parse_accept_language,
+    render_password_reset_email,
+    render_registration_email,
+)
+
+
+def _event(**overrides):
+    values = {"id": 7, "title": "Rust <meetup> & co", "location": "Aula", "start_time": datetime(2030, 5, 1, 18, 0)}
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_accept_language_orders_by_quality():
+    assert parse_accept_language("ro;q=0.5, en-US, de;q=0.9, fr;q=0") == ("en", "de", "ro")
+    assert parse_accept_language("en-GB;q=0.8,en;q=0.9") == ("en",)
+    assert parse_accept_language("xx;q=abc") == ()
+    assert parse_accept_language(None) == ()
+
+
+def test_negotiation_falls_back_to_romanian():
+    assert negotiate_language("de-DE,en;q=0.7") == "en"
+    assert negotiate_language("de-DE,*;q=0.5,en;q=0.1") == "ro"
+    assert negotiate_language("") == "ro"
+    assert negotiate_language("en") == "en"
+
+
+def test_html_is_escaped_but_text_is_not():
+    user = SimpleNamespace(full_name="Ana <b>", email="ana@test.ro")
+    subject, text, html = render_registration_email(_event(), user, lang="en-US,en;q=0.9")
+
+    assert subject == "Registration confirmed: Rust <meetup> & co"
+    assert "You are registered for 'Rust <meetup> & co'." in text
+    assert text.startswith("Hi Ana <b>,")
+    assert "<strong>Rust &lt;meetup&gt; &amp; co</strong>" in html
+    assert "<p>Hi Ana &lt;b&gt;,</p>" in html
+
+    subject, text, html = render_password_reset_email(user, "https://app/reset?a=1&b=2", lang="ro")
+    assert subject == "Resetare parolă EventLink"
+    assert "https://app/reset?a=1&b=2" in text
+    assert 'href="https://app/reset?a=1&amp;b=2"' in html
+
+
+def test_subject_is_a_single_line_even_for_legacy_titles():
+    user = SimpleNamespace(full_name="Ana", email="ana@test.ro")
+    subject, _text, _html = render_registration_email(_event(title="Rust\r\nBcc: x@test.ro"), user, lang="en")
+    assert subject == "Registration confirmed: Rust Bcc: x@test.ro"
+
+
+def test_event_render_is_cached_per_event_and_refreshed_after_edits():
+    registry = TemplateRegistry()
+    registry.load()
+    first = registry.render_for_event("registration", "ro", _event(), "Ana")
+    second = registry.render_for_event("registration", "ro", _event(), "Bogdan")
+    assert registry.render_cache.stats()["hits"] == 1
+    assert first[1].startswith("Salut Ana,") and second[1].startswith("Salut Bogdan,")
+
+    moved = registry.render_for_event("registration", "ro", _event(location="Sala 2"), "Ana")
+    assert "Locația: Sala 2." in moved[1]
+    registry.render_for_event("registration", "en", _event(), "Ana")
+    assert registry.render_cache.stats()["entries"] == 2
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+WORKER = """
+from app.metrics import EMAILS, REQUESTS_IN_PROGRESS
+EMAILS.labels(outcome="sent").inc(3)
+REQUESTS_IN_PROGRESS.labels(method="GET").inc()
+"""
+
+SCRAPE = """
+from app.metrics import render_latest
+print(render_latest()[0].decode())
+"""
+
+
+def _run(code: str, tmp_path: Path) -> str:
+    multiproc_dir = tmp_path / "prometheus"
+    multiproc_dir.mkdir(exist_ok=True)
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir),
+        "DATABASE_URL": f"sqlite:///{tmp_path}/metrics.db",
+        "SECRET_KEY": "test-secret",
+    }
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    _run(WORKER, tmp_path)
+    _run(WORKER, tmp_path)
+    body = _run(SCRAPE, tmp_path)
+    assert 'eventlink_emails_total{outcome="sent"} 6.0' in body
+    # livesum gauges keep the samples of workers that have not been marked dead.
+    assert 'eventlink_http_requests_in_progress{method="GET"} 2.0' in body
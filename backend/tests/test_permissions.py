@@ -16,6 +16,7 @@ from app.database import Base, engine, SessionLocal, get_db
 def reset_db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    auth.principal_cache.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
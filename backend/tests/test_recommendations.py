@@ -0,0 +1,40 @@
+import math
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app.recommendations import blend, collaborative_scores, item_similarities, tag_score
+
+
+def test_item_similarities_are_cosine_over_registrations():
+    baskets = [[1, 2], [1, 2, 3], [1, 3], [2], [4]]
+    similarities = item_similarities(baskets)
+
+    # 1 and 3 share two students out of 3 and 2: 2 / sqrt(3 * 2) beats 1-2's 2 / sqrt(3 * 3).
+    assert similarities[1] == [(3, 2 / math.sqrt(3 * 2)), (2, 2 / 3)]
+    assert similarities[3] == [(1, 2 / math.sqrt(2 * 3)), (2, 1 / math.sqrt(2 * 3))]
+    assert 4 not in similarities
+
+
+def test_item_similarities_keep_only_targets_and_top_neighbours():
+    baskets = [[1, 2, 3, 4], [1, 2], [1, 3]]
+    similarities = item_similarities(baskets, targets={2, 3, 4}, neighbours=2)
+
+    assert [other for other, _ in similarities[1]] == [2, 3]
+    assert all(other != 1 for similar in similarities.values() for other, _ in similar)
+
+
+def test_collaborative_and_tag_scores_blend():
+    edges = [(10, 20, 0.5), (11, 20, 0.3), (11, 21, 0.9), (12, 21, 0.6)]
+    scores = collaborative_scores(edges)
+    assert scores[20] == (0.8, 10)
+    # Summed similarity saturates at 1, the tag cosine's range.
+    assert scores[21] == (1.0, 11)
+
+    affinity = {1: 1.0, 2: 1.5}
+    score, matched = tag_score(affinity, math.sqrt(3.25), [2, 3])
+    assert matched == [2]
+    assert math.isclose(score, 1.5 / (math.sqrt(3.25) * math.sqrt(2)))
+    assert tag_score(affinity, math.sqrt(3.25), [3]) == (0.0, [])
+    assert math.isclose(blend(0.8, 0.4, cf_weight=0.25), 0.7)
@@ -21,7 +21,7 @@ export default function () {
     'has items array': (r) => r.json('items') !== undefined,
   });
 
-  const rec = http.get(`${BASE_URL}/api/events/recommended?page=1&page_size=5`, {
+  const rec = http.get(`${BASE_URL}/api/recommendations?page_size=5`, {
     headers: { Authorization: __ENV.K6_TOKEN ? `Bearer ${__ENV.K6_TOKEN}` : '' },
   });
   check(rec, {
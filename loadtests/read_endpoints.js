@@ -0,0 +1,53 @@
+// Compares the read-heavy endpoints on the async DB path against the sync (threadpool) path.
+// Run it once against a server started with ASYNC_DB_ENABLED=true and once with false:
+//   K6_LABEL=async K6_TOKEN=<student token> K6_EVENT_ID=1 k6 run loadtests/read_endpoints.js
+//   K6_LABEL=sync  K6_TOKEN=<student token> K6_EVENT_ID=1 k6 run loadtests/read_endpoints.js
+import http from 'k6/http';
+import { check } from 'k6';
+
+const BASE_URL = __ENV.K6_BASE_URL || 'http://localhost:8000';
+const VUS = Number(__ENV.K6_VUS || 50);
+const DURATION = __ENV.K6_DURATION || '60s';
+const EVENT_ID = __ENV.K6_EVENT_ID || '1';
+const LABEL = __ENV.K6_LABEL || 'run';
+
+export const options = {
+  vus: VUS,
+  duration: DURATION,
+  thresholds: {
+    http_req_failed: ['rate<0.01'],
+  },
+};
+
+const authHeaders = { headers: { Authorization: __ENV.K6_TOKEN ? `Bearer ${__ENV.K6_TOKEN}` : '' } };
+
+export default function () {
+  // Authenticated list requests bypass the anonymous response cache, so every call reaches the DB.
+  const list = http.get(`${BASE_URL}/api/events?page=1&page_size=10`, { ...authHeaders, tags: { name: 'events' } });
+  const detail = http.get(`${BASE_URL}/api/events/${EVENT_ID}`, { ...authHeaders, tags: { name: 'event' } });
+  const ics = http.get(`${BASE_URL}/api/events/${EVENT_ID}/ics`, { tags: { name: 'ics' } });
+  const favorites = http.get(`${BASE_URL}/api/me/favorites`, { ...authHeaders, tags: { name: 'favorites' } });
+  const recommendations = http.get(`${BASE_URL}/api/recommendations`, { ...authHeaders, tags: { name: 'recommendations' } });
+
+  check(list, { 'events 200': (r) => r.status === 200 });
+  check(detail, { 'event 200': (r) => r.status === 200 });
+  check(ics, { 'ics 200': (r) => r.status === 200 });
+  check(favorites, { 'favorites 200': (r) => r.status === 200 });
+  check(recommendations, { 'recommendations 200': (r) => r.status === 200 });
+}
+
+export function handleSummary(data) {
+  const duration = data.metrics.http_req_duration.values;
+  const summary = {
+    label: LABEL,
+    vus: VUS,
+    requests_per_second: Number(data.metrics.http_reqs.values.rate.toFixed(1)),
+    p95_ms: Number(duration['p(95)'].toFixed(1)),
+    median_ms: Number(duration.med.toFixed(1)),
+    failed_rate: data.metrics.http_req_failed.values.rate,
+  };
+  return {
+    stdout: `${JSON.stringify(summary)}\n`,
+    [`loadtests/read-${LABEL}-summary.json`]: JSON.stringify(summary, null, 2),
+  };
+}
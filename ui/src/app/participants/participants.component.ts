@@ -65,22 +65,19 @@ export class ParticipantsComponent implements OnInit {
 
   exportCsv(): void {
     if (!this.data) return;
-    const rows = [
-      ['Nume', 'Email', 'Ora înscrierii', 'Prezență', 'Cover URL'],
-      ...this.data.participants.map((p) => [
-        p.full_name || '-',
-        p.email,
-        p.registration_time,
-        p.attended ? 'prezent' : 'absent',
-        this.data?.cover_url || '',
-      ]),
-    ];
-    const csv = rows.map((r) => r.join(',')).join('\n');
-    const blob = new Blob([csv], { type: 'text/csv' });
+    const eventId = this.data.event_id;
+    // The backend streams every participant (not just the loaded page).
+    this.eventService.exportParticipantsCsv(eventId).subscribe({
+      next: (blob) => this.download(blob, `participanti-${eventId}.csv`),
+      error: () => (this.error = 'Nu am putut exporta participanții.'),
+    });
+  }
+
+  private download(blob: Blob, filename: string): void {
     const url = URL.createObjectURL(blob);
     const link = document.createElement('a');
     link.href = url;
-    link.download = `participanti-${this.data.event_id}.csv`;
+    link.download = filename;
     link.click();
     URL.revokeObjectURL(url);
   }
@@ -1,6 +1,6 @@
 import { Inject, Injectable } from '@angular/core';
 import { HttpClient, HttpParams } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { Observable, map } from 'rxjs';
 import { EventDetail, EventItem, ParticipantList, PaginatedEvents, OrganizerProfile } from '../models';
 import { API_BASE_URL } from '../api-tokens';
 
@@ -52,8 +52,11 @@ export class EventService {
     return this.http.get<PaginatedEvents>(`${this.baseUrl}/events`, { params });
   }
 
-  recommended(): Observable<EventItem[]> {
-    return this.http.get<EventItem[]>(`${this.baseUrl}/recommendations`);
+  recommended(pageSize = 10): Observable<EventItem[]> {
+    const params = new HttpParams().set('page_size', pageSize);
+    return this.http
+      .get<PaginatedEvents>(`${this.baseUrl}/recommendations`, { params })
+      .pipe(map((page) => page.items));
   }
 
   getEvent(id: number): Observable<EventDetail> {
@@ -92,6 +95,10 @@ export class EventService {
     return this.http.get<ParticipantList>(`${this.baseUrl}/organizer/events/${eventId}/participants`);
   }
 
+  exportParticipantsCsv(eventId: number): Observable<Blob> {
+    return this.http.get(`${this.baseUrl}/organizer/events/${eventId}/participants.csv`, { responseType: 'blob' });
+  }
+
   myEvents(): Observable<EventItem[]> {
     return this.http.get<EventItem[]>(`${this.baseUrl}/me/events`);
   }